@@ -0,0 +1,39 @@
+"""booking no overlap
+
+Revision ID: 5b1e7c2d9a40
+Revises: e83427d341cf
+Create Date: 2026-10-18 09:00:12.418230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1e7c2d9a40"
+down_revision: Union[str, None] = "e83427d341cf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # btree_gist lets the plain integer place_id take part in a GiST index.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE bookings ADD CONSTRAINT excl_bookings_place_time "
+        "EXCLUDE USING gist ("
+        "place_id WITH =, "
+        "tstzrange(start_datetime, end_datetime, '[)') WITH &&"
+        ") WHERE (status <> 'CANCELLED')"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        "ALTER TABLE bookings DROP CONSTRAINT excl_bookings_place_time"
+    )
@@ -0,0 +1,52 @@
+"""keyset pagination indexes
+
+Revision ID: 9c4f02a7e1b3
+Revises: 5b1e7c2d9a40
+Create Date: 2026-10-18 11:00:41.107592
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4f02a7e1b3"
+down_revision: Union[str, None] = "5b1e7c2d9a40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_users_created_at_id", "users", ["created_at", "id"]
+    )
+    op.create_index(
+        "ix_bookings_created_at_id", "bookings", ["created_at", "id"]
+    )
+    op.create_index(
+        "ix_bookings_user_id_created_at_id",
+        "bookings",
+        ["user_id", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_balance_transactions_user_id_created_at_id",
+        "balance_transactions",
+        ["user_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_balance_transactions_user_id_created_at_id",
+        table_name="balance_transactions",
+    )
+    op.drop_index(
+        "ix_bookings_user_id_created_at_id", table_name="bookings"
+    )
+    op.drop_index("ix_bookings_created_at_id", table_name="bookings")
+    op.drop_index("ix_users_created_at_id", table_name="users")
@@ -0,0 +1,45 @@
+"""hot path indexes
+
+Revision ID: e4d2a8c61f07
+Revises: 9c4f02a7e1b3
+Create Date: 2026-10-18 13:00:12.513204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4d2a8c61f07"
+down_revision: Union[str, None] = "9c4f02a7e1b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_bookings_active_place_time",
+        "bookings",
+        ["place_id", "start_datetime", "end_datetime"],
+        postgresql_where=sa.text("status <> 'CANCELLED'"),
+        sqlite_where=sa.text("status <> 'CANCELLED'"),
+    )
+    op.create_index(
+        "ix_otps_user_id_code_expires_at",
+        "otps",
+        ["user_id", "code", "expires_at"],
+    )
+    op.create_index("ix_zones_branch_id_id", "zones", ["branch_id", "id"])
+    op.create_index("ix_places_zone_id_id", "places", ["zone_id", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_places_zone_id_id", table_name="places")
+    op.drop_index("ix_zones_branch_id_id", table_name="zones")
+    op.drop_index("ix_otps_user_id_code_expires_at", table_name="otps")
+    op.drop_index("ix_bookings_active_place_time", table_name="bookings")
@@ -0,0 +1,51 @@
+"""jobs
+
+Revision ID: 8b5d3e2f9a14
+Revises: 3f7a91c0d2e6
+Create Date: 2026-10-18 17:00:03.218807
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8b5d3e2f9a14"
+down_revision: Union[str, None] = "3f7a91c0d2e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "jobs",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column("unique_key", sa.String(length=200), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("unique_key"),
+    )
+    op.create_index(
+        "ix_jobs_pending_run_at",
+        "jobs",
+        ["run_at"],
+        postgresql_where=sa.text("failed_at IS NULL"),
+        sqlite_where=sa.text("failed_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_jobs_pending_run_at", table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,33 @@
+"""users unverified cleanup index
+
+Revision ID: c2a6f0e8d417
+Revises: 8b5d3e2f9a14
+Create Date: 2026-10-18 18:00:44.671032
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2a6f0e8d417"
+down_revision: Union[str, None] = "8b5d3e2f9a14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_users_is_verified_created_at_id",
+        "users",
+        ["is_verified", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_is_verified_created_at_id", table_name="users")
@@ -0,0 +1,35 @@
+"""pending bookings expiry index
+
+Revision ID: 71d9c3b5e2a8
+Revises: c2a6f0e8d417
+Create Date: 2026-10-18 19:00:12.408115
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "71d9c3b5e2a8"
+down_revision: Union[str, None] = "c2a6f0e8d417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_bookings_pending_created_at_id",
+        "bookings",
+        ["created_at", "id"],
+        postgresql_where=sa.text("status = 'PENDING'"),
+        sqlite_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_bookings_pending_created_at_id", table_name="bookings")
@@ -0,0 +1,34 @@
+"""booking completed status
+
+Revision ID: a4f8e1c7b392
+Revises: 71d9c3b5e2a8
+Create Date: 2026-10-18 20:00:37.115904
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f8e1c7b392"
+down_revision: Union[str, None] = "71d9c3b5e2a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block before PG 12.
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE bookingstatus ADD VALUE IF NOT EXISTS 'COMPLETED'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # PostgreSQL cannot drop an enum value; fold the rows back instead.
+    op.execute("UPDATE bookings SET status = 'CONFIRMED' WHERE status = 'COMPLETED'")
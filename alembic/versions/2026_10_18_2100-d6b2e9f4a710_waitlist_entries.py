@@ -0,0 +1,58 @@
+"""waitlist entries
+
+Revision ID: d6b2e9f4a710
+Revises: a4f8e1c7b392
+Create Date: 2026-10-18 21:00:05.730246
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d6b2e9f4a710"
+down_revision: Union[str, None] = "a4f8e1c7b392"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "waitlist_entries",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("zone_id", sa.Integer(), nullable=False),
+        sa.Column("start_datetime", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_datetime", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("booking_id", sa.Integer(), nullable=True),
+        sa.Column("fulfilled_at", sa.DateTime(), nullable=True),
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["zone_id"], ["zones.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["booking_id"], ["bookings.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_waitlist_entries_waiting_zone_start",
+        "waitlist_entries",
+        ["zone_id", "start_datetime"],
+        postgresql_where=sa.text("fulfilled_at IS NULL"),
+        sqlite_where=sa.text("fulfilled_at IS NULL"),
+    )
+    op.create_index(
+        "ix_waitlist_entries_user_id_created_at_id",
+        "waitlist_entries",
+        ["user_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_waitlist_entries_user_id_created_at_id", table_name="waitlist_entries")
+    op.drop_index("ix_waitlist_entries_waiting_zone_start", table_name="waitlist_entries")
+    op.drop_table("waitlist_entries")
@@ -0,0 +1,40 @@
+"""unique slot only among active bookings
+
+Revision ID: 5e0c7a3d9b16
+Revises: d6b2e9f4a710
+Create Date: 2026-10-18 21:30:48.209517
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0c7a3d9b16"
+down_revision: Union[str, None] = "d6b2e9f4a710"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint("uix_place_time", "bookings", type_="unique")
+    op.create_index(
+        "uix_place_time",
+        "bookings",
+        ["place_id", "start_datetime", "end_datetime"],
+        unique=True,
+        postgresql_where=sa.text("status <> 'CANCELLED'"),
+        sqlite_where=sa.text("status <> 'CANCELLED'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uix_place_time", table_name="bookings")
+    op.create_unique_constraint(
+        "uix_place_time", "bookings", ["place_id", "start_datetime", "end_datetime"]
+    )
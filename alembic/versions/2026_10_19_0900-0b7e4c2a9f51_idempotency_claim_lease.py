@@ -0,0 +1,29 @@
+"""lease for in-flight idempotency claims
+
+Revision ID: 0b7e4c2a9f51
+Revises: 5e0c7a3d9b16
+Create Date: 2026-10-19 09:00:12.418530
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0b7e4c2a9f51"
+down_revision: Union[str, None] = "5e0c7a3d9b16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("idempotency_keys", sa.Column("locked_until", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("idempotency_keys", "locked_until")
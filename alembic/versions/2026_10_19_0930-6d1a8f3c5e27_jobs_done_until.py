@@ -0,0 +1,29 @@
+"""keep finished periodic jobs until their slot has passed
+
+Revision ID: 6d1a8f3c5e27
+Revises: 0b7e4c2a9f51
+Create Date: 2026-10-19 09:30:41.902117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6d1a8f3c5e27"
+down_revision: Union[str, None] = "0b7e4c2a9f51"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("jobs", sa.Column("done_until", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("jobs", "done_until")
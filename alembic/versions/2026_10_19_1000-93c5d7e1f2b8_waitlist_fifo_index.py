@@ -0,0 +1,43 @@
+"""waitlist index in fill order
+
+Revision ID: 93c5d7e1f2b8
+Revises: 6d1a8f3c5e27
+Create Date: 2026-10-19 10:00:27.551093
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "93c5d7e1f2b8"
+down_revision: Union[str, None] = "6d1a8f3c5e27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("ix_waitlist_entries_waiting_zone_start", table_name="waitlist_entries")
+    op.create_index(
+        "ix_waitlist_entries_waiting_zone_created",
+        "waitlist_entries",
+        ["zone_id", "created_at", "id", "start_datetime", "end_datetime"],
+        postgresql_where=sa.text("fulfilled_at IS NULL"),
+        sqlite_where=sa.text("fulfilled_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_waitlist_entries_waiting_zone_created", table_name="waitlist_entries")
+    op.create_index(
+        "ix_waitlist_entries_waiting_zone_start",
+        "waitlist_entries",
+        ["zone_id", "start_datetime"],
+        postgresql_where=sa.text("fulfilled_at IS NULL"),
+        sqlite_where=sa.text("fulfilled_at IS NULL"),
+    )
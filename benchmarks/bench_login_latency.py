@@ -0,0 +1,94 @@
+"""
+p99 latency of GET /branches while bcrypt logins are in flight.
+
+    python benchmarks/bench_login_latency.py --logins 20 --probes 200
+    python benchmarks/bench_login_latency.py --blocking   # old behaviour
+
+Runs the app in-process over ASGITransport against an in-memory SQLite
+database, so it needs the same environment variables as the app itself.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from main import app
+from core.api.v1 import auth as auth_api
+from core.database.db_helper import db_helper
+from core.database.models.base import Base
+from core.database.models.models import Branch, User
+from core.services import auth as auth_service
+
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+
+
+async def main(args) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        db.add_all([
+            User(first_name="Bench", last_name="User", phone_number="100",
+                 password_hash=auth_service.get_password_hash("secret")),
+            Branch(name="Bench branch"),
+        ])
+        await db.commit()
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[db_helper.scoped_session_dependency] = override_get_db
+    if args.blocking:
+        async def blocking_verify(plain, hashed):
+            return auth_service.verify_password(plain, hashed)
+        auth_api.verify_password_async = blocking_verify
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def login():
+            resp = await client.post("/auth/login", data={"username": "100", "password": "secret"})
+            return resp.status_code
+
+        async def probe(latencies: list[float]):
+            for _ in range(args.probes):
+                started = time.perf_counter()
+                await client.get("/branches")
+                latencies.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(args.interval / 1000)
+
+        latencies: list[float] = []
+        started = time.perf_counter()
+        statuses, _ = await asyncio.gather(
+            asyncio.gather(*(login() for _ in range(args.logins))),
+            probe(latencies),
+        )
+        elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+    mode = "blocking" if args.blocking else f"{auth_service.settings.PASSWORD_HASH_EXECUTOR} pool"
+    print(f"mode={mode} logins={args.logins} statuses={sorted(set(statuses))} elapsed={elapsed:.2f}s")
+    print(
+        f"/branches latency ms: p50={statistics.median(latencies):.1f} "
+        f"p99={percentile(latencies, 0.99):.1f} max={max(latencies):.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=5.0, help="ms between probes")
+    parser.add_argument("--blocking", action="store_true", help="verify passwords on the event loop")
+    asyncio.run(main(parser.parse_args()))
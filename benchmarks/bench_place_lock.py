@@ -0,0 +1,133 @@
+"""
+Many clients booking the same seat at once, with and without the per-place
+lock (core/services/place_lock.py).
+
+    python benchmarks/bench_place_lock.py --clients 200 --rounds 5
+    python benchmarks/bench_place_lock.py --backend redis      # needs REDIS_URL
+    DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_place_lock.py --backend postgres
+
+Every round, `--clients` sessions race for the same place with partly
+overlapping intervals; exactly one booking must win. Prints outcomes,
+end-to-end latency and the lock's wait-time stats. Defaults to a SQLite
+file, so it needs the same environment variables as the app itself.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.crud import booking as booking_crud
+from core.database.models.base import Base
+from core.database.models.models import BalanceTransaction, Booking, Branch, Place, User, Zone
+from core.schemas.booking import BookingCreate
+from core.services.booking_index import booking_index
+from core.services.place_lock import PlaceLock, build_backend
+
+START = datetime(2030, 1, 1, 18, 0, tzinfo=timezone.utc)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+
+
+@asynccontextmanager
+async def no_lock(db, place_ids):
+    yield
+
+
+async def reset(session_factory) -> None:
+    async with session_factory() as db:
+        await db.execute(delete(BalanceTransaction))
+        await db.execute(delete(Booking))
+        await db.commit()
+    booking_index.invalidate()
+
+
+async def main(args) -> None:
+    url = os.environ.get("DATABASE_URL", "")
+    if not url.startswith("postgresql"):
+        url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(url, pool_size=args.clients, max_overflow=0) if url.startswith("postgresql") else create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"id": i, "first_name": "U", "last_name": "U", "phone_number": str(i), "password_hash": "x", "balance": 10**6}
+            for i in range(1, args.clients + 1)
+        ])
+        await conn.execute(insert(Branch).values(id=1, name="B"))
+        await conn.execute(insert(Zone).values(id=1, branch_id=1, name="Z"))
+        await conn.execute(insert(Place).values(id=1, zone_id=1, name="P1"))
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def run(name, locked_places) -> None:
+        booking_crud.locked_places = locked_places
+        outcomes, latencies = Counter(), []
+        started = time.perf_counter()
+        for round_no in range(args.rounds):
+            await reset(session_factory)
+
+            async def client(i):
+                data = BookingCreate(
+                    place_id=1,
+                    start_datetime=START + timedelta(minutes=i % 60),
+                    end_datetime=START + timedelta(hours=2, minutes=i % 60),
+                    amount=Decimal(1),
+                )
+                t = time.perf_counter()
+                async with session_factory() as db:
+                    try:
+                        await booking_crud.create_booking(db, i, data, f"bench-{round_no}-{i}")
+                        outcomes["201"] += 1
+                    except HTTPException as e:
+                        outcomes[str(e.status_code)] += 1
+                    except Exception as e:
+                        outcomes[type(e).__name__] += 1
+                latencies.append((time.perf_counter() - t) * 1000)
+
+            await asyncio.gather(*(client(i) for i in range(1, args.clients + 1)))
+            async with session_factory() as db:
+                winners = (await db.execute(select(func.count()).select_from(Booking))).scalar_one()
+            if winners != 1:
+                outcomes[f"round with {winners} bookings"] += 1
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:<10} {elapsed:6.2f}s  p50={statistics.median(latencies):7.1f}ms  "
+            f"p99={percentile(latencies, 0.99):7.1f}ms  {dict(sorted(outcomes.items()))}"
+        )
+
+    original = booking_crud.locked_places
+    lock = PlaceLock(build_backend(args.backend), timeout=args.timeout)
+    try:
+        await run("no lock", no_lock)
+        await run(args.backend, lock.hold)
+        stats = asdict(lock.stats)
+        acquired = stats["acquired"] or 1
+        print(f"lock wait: avg={stats['wait_ms_total'] / acquired:.1f}ms {stats}")
+    finally:
+        booking_crud.locked_places = original
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--backend", choices=["memory", "postgres", "redis"], default="memory")
+    parser.add_argument("--timeout", type=float, default=30)
+    asyncio.run(main(parser.parse_args()))
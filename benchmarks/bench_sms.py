@@ -0,0 +1,85 @@
+"""
+SMS throughput against a local fake Eskiz server (tests/fake_eskiz.py)
+served by uvicorn over real TCP.
+
+    python benchmarks/bench_sms.py --messages 500 --latency 0.02
+
+Compares the old per-message flow (new httpx client + login for every SMS)
+with the pooled EskizClient, one request per SMS and in batch mode.
+Needs the same environment variables as the app itself.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+import httpx
+import uvicorn
+
+from core.services.sms import EskizClient
+from tests.fake_eskiz import create_fake_eskiz
+
+
+async def legacy_send(base: str, phone: str, text: str) -> None:
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        auth = await client.post(f"{base}/auth/login", json={"username": "u", "password": "p"})
+        token = auth.json()["data"]["token"]
+        resp = await client.post(
+            f"{base}/message/sms/send",
+            json={"mobile_phone": phone, "message": text, "from": "4546"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        resp.raise_for_status()
+
+
+async def main(args) -> None:
+    fake = create_fake_eskiz(latency=args.latency)
+    server = uvicorn.Server(uvicorn.Config(fake, host="127.0.0.1", port=args.port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    base = f"http://127.0.0.1:{args.port}/api"
+    messages = [(f"99890{i:07d}", f"Ваш OTP-код: {i:06d}") for i in range(args.messages)]
+
+    async def run(name, coro_factory):
+        fake.state.eskiz.logins = 0
+        started = time.perf_counter()
+        await coro_factory()
+        elapsed = time.perf_counter() - started
+        print(f"{name:<10} {len(messages) / elapsed:8.1f} msg/s  {elapsed:6.2f}s  logins={fake.state.eskiz.logins}")
+
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def legacy():
+        async def one(phone, text):
+            async with limit:
+                await legacy_send(base, phone, text)
+        await asyncio.gather(*(one(p, t) for p, t in messages))
+
+    client = EskizClient(
+        auth_url=f"{base}/auth/login",
+        send_url=f"{base}/message/sms/send",
+        batch_url=f"{base}/message/sms/send-batch",
+        username="u", password="p", sender="4546",
+        max_concurrency=args.concurrency,
+    )
+    try:
+        await run("legacy", legacy)
+        await run("pooled", lambda: client.send_many(messages))
+        await run("batch", lambda: client.send_many(messages, batch=True))
+    finally:
+        await client.aclose()
+        server.should_exit = True
+        await serving
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated Eskiz latency per call, seconds")
+    parser.add_argument("--port", type=int, default=8099)
+    asyncio.run(main(parser.parse_args()))
@@ -1,30 +1,37 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import JWTError, jwt
+from jose import JWTError
 from core.database.db_helper import db_helper
 from core.crud.user import get_user_by_phone
-from core.config import settings
+from core.services.user_cache import user_cache, UserSnapshot
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(db_helper.scoped_session_dependency),
-):
+) -> UserSnapshot:
+    """
+    Resolve the bearer token to a cached snapshot of the user (id, role,
+    is_active). Load the full row with the session when more is needed.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = user_cache.decode_token(token)
         phone_number: str = payload.get("sub")
         if phone_number is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
+    snapshot = user_cache.get(phone_number)
+    if snapshot is not None:
+        return snapshot
     user = await get_user_by_phone(db, phone=phone_number)
     if user is None:
         raise credentials_exception
-    return user
+    return user_cache.put(user)
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.crud.user import get_user_by_phone, create_user
+from core.crud.users import get_user_by_id
 from core.schemas.user import UserCreate, UserRead
 from core.schemas.token import Token
-from core.services.auth import verify_password, create_access_token, create_refresh_token
+from core.services.auth import verify_password_async, create_access_token, create_refresh_token
 from core.database.db_helper import db_helper
 from core.api.deps import get_current_user
 
@@ -26,7 +27,7 @@ async def login(
     db: AsyncSession = Depends(db_helper.scoped_session_dependency),
 ):
     user = await get_user_by_phone(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -48,4 +49,7 @@ async def get_current_user(
     """
     Returns the currently authenticated user.
     """
-    return current_user
+    user = await get_user_by_id(db, current_user.id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
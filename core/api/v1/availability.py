@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.schemas.availability import AvailabilityGrid, FreeSlot, NextSlots, SeatAvailability
+from core.crud.availability import seat_bookings
+from core.services.availability import SlotGrid, build_bitmaps, next_free_windows, parse_slot
+from core.database.db_helper import db_helper
+get_db = db_helper.scoped_session_dependency
+
+router = APIRouter(prefix="/availability", tags=["availability"])
+
+
+def _grid(start: datetime, end: datetime, slot: str) -> SlotGrid:
+    try:
+        return SlotGrid(start=start, end=end, slot=parse_slot(slot))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
+async def _availability(
+    db: AsyncSession,
+    grid: SlotGrid,
+    zone_id: int | None = None,
+    branch_id: int | None = None,
+) -> AvailabilityGrid:
+    rows = await seat_bookings(db, grid.start, grid.end, zone_id=zone_id, branch_id=branch_id)
+    bitmaps = build_bitmaps(grid, ((r.id, r.start_datetime, r.end_datetime) for r in rows))
+    seats, seen = [], set()
+    for r in rows:
+        if r.id in seen:
+            continue
+        seen.add(r.id)
+        seats.append(SeatAvailability(
+            place_id=r.id,
+            zone_id=r.zone_id,
+            name=r.name,
+            busy=grid.render(bitmaps[r.id]),
+        ))
+    return AvailabilityGrid(
+        zone_id=zone_id,
+        branch_id=branch_id,
+        start=grid.start,
+        end=grid.end,
+        slot_minutes=int(grid.slot.total_seconds() // 60),
+        slot_count=grid.slot_count,
+        seats=seats,
+    )
+
+
+@router.get(
+    "",
+    response_model=AvailabilityGrid
+)
+async def zone_availability(
+    zone_id: int = Query(..., ge=1),
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    slot: str = Query("15m", description="Slot width, e.g. 15m or 1h"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Seats × time-slots busy matrix for one zone.
+    """
+    return await _availability(db, _grid(start, end, slot), zone_id=zone_id)
+
+
+@router.get(
+    "/branch",
+    response_model=AvailabilityGrid
+)
+async def branch_availability(
+    branch_id: int = Query(..., ge=1),
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    slot: str = Query("15m", description="Slot width, e.g. 15m or 1h"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Seats × time-slots busy matrix for every zone of a branch.
+    """
+    return await _availability(db, _grid(start, end, slot), branch_id=branch_id)
+
+
+@router.get(
+    "/next",
+    response_model=NextSlots
+)
+async def next_available(
+    zone_id: int | None = Query(None, ge=1),
+    branch_id: int | None = Query(None, ge=1),
+    duration: str = Query(..., description="Window length, e.g. 90m or 2h"),
+    after: datetime | None = Query(None, description="Earliest start, defaults to now"),
+    within: str = Query("24h", description="How far ahead of `after` to look"),
+    limit: int = Query(5, ge=1, le=50),
+    near: int | None = Query(None, ge=1, description="Prefer seats next to this place"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Earliest seats of a zone (or branch) with a free window of `duration`.
+    """
+    if (zone_id is None) == (branch_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Pass exactly one of zone_id or branch_id",
+        )
+    try:
+        length, horizon = parse_slot(duration), parse_slot(within)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    start = after or datetime.now(timezone.utc)
+    end = start + horizon
+    rows = await seat_bookings(db, start, end, zone_id=zone_id, branch_id=branch_id)
+    seats = {r.id: r for r in rows}
+    windows = next_free_windows(
+        ((r.id, r.start_datetime, r.end_datetime) for r in rows),
+        start, end, length, limit, near=near,
+    )
+    return NextSlots(
+        zone_id=zone_id,
+        branch_id=branch_id,
+        duration_minutes=int(length.total_seconds() // 60),
+        slots=[
+            FreeSlot(
+                place_id=place_id,
+                zone_id=seats[place_id].zone_id,
+                name=seats[place_id].name,
+                start=slot_start,
+                end=slot_start + length,
+            )
+            for place_id, slot_start in windows
+        ],
+    )
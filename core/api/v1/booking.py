@@ -1,18 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
-from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.schemas.booking import (
-    BookingCreate, BookingRead, BookingUpdate
+    BookingCreate, BookingBatchCreate, BookingRead, BookingUpdate, BookingIndexReport,
+    BookingRecurringCreate, RecurringBookingResult
 )
+from core.schemas.pagination import CursorPage
 from core.crud.booking import (
     get_booking, list_bookings,
-    create_booking, update_booking, delete_booking
+    create_booking, create_bookings, create_recurring_bookings,
+    update_booking, delete_booking,
+    transition_booking
 )
+from core.crud.waitlist import fill_from_waitlist
+from core.services.booking_index import booking_index
 from core.api.deps import get_current_user
-from core.database.models.models import RoleEnum
+from core.database.models.models import BookingStatus, RoleEnum
 from core.database.db_helper import db_helper
 get_db = db_helper.scoped_session_dependency
+get_read_db = db_helper.read_session_dependency
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
@@ -34,24 +40,156 @@ async def post_booking(
     booking = await create_booking(db, current.id, data, idempotency_key)
     return booking
 
+@router.post(
+    "/batch",
+    response_model=list[BookingRead],
+    status_code=status.HTTP_201_CREATED
+)
+async def post_bookings_batch(
+    data: BookingBatchCreate,
+    idempotency_key: str = Header(..., alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Book several seats in one go; either every booking is created or none.
+    Idempotent via `Idempotency-Key`.
+    """
+    return await create_bookings(db, current.id, data.items, idempotency_key)
+
+@router.post(
+    "/recurring",
+    response_model=RecurringBookingResult,
+    status_code=status.HTTP_201_CREATED
+)
+async def post_recurring_booking(
+    data: BookingRecurringCreate,
+    idempotency_key: str = Header(..., alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Book the same seat daily or weekly. Free occurrences are booked,
+    taken ones are listed in `conflicts`. Idempotent via `Idempotency-Key`.
+    """
+    bookings, conflicts = await create_recurring_bookings(db, current.id, data, idempotency_key)
+    return {"bookings": bookings, "conflicts": conflicts}
+
 @router.get(
     "/",
-    response_model=List[BookingRead]
+    response_model=CursorPage[BookingRead]
 )
 async def get_bookings(
-    skip: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="`next_cursor` of the previous page"),
     limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current = Depends(get_current_user)
+):
+    """
+    List bookings, newest first. Regular users see own, admin/owner see all.
+    """
+    user_id = None
+    if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
+        user_id = current.id
+    bookings, next_cursor = await list_bookings(db, user_id, cursor=cursor, limit=limit)
+    return {"items": bookings, "next_cursor": next_cursor}
+
+@router.post(
+    "/index/rebuild",
+    response_model=BookingIndexReport
+)
+async def rebuild_booking_index(
+    place_id: int | None = Query(None, ge=1),
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Reload the in-memory overlap index from the database (admin/owner only).
+    """
+    if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    bookings = await booking_index.rebuild(db, place_id)
+    return BookingIndexReport(places=booking_index.loaded_places(), bookings=bookings)
+
+@router.get(
+    "/index/check",
+    response_model=BookingIndexReport
+)
+async def check_booking_index(
+    place_id: int | None = Query(None, ge=1),
     db: AsyncSession = Depends(get_db),
     current = Depends(get_current_user)
 ):
     """
-    List bookings. Regular users see own, admin/owner see all.
+    Compare the in-memory overlap index with the database (admin/owner only).
+    """
+    if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    drift = await booking_index.check(db, place_id)
+    return BookingIndexReport(places=booking_index.loaded_places(), drift=drift)
+
+@router.post(
+    "/{booking_id}/confirm",
+    response_model=BookingRead
+)
+async def confirm_booking(
+    booking_id: int,
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Confirm a pending booking and capture its frozen amount.
+    Regular users can only confirm their own bookings.
     """
     user_id = None
     if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
         user_id = current.id
-    bookings = await list_bookings(db, user_id, skip=skip, limit=limit)
-    return bookings
+    return await transition_booking(db, booking_id, "confirm", user_id=user_id)
+
+@router.post(
+    "/{booking_id}/cancel",
+    response_model=BookingRead
+)
+async def cancel_booking(
+    booking_id: int,
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Cancel a pending booking and release its frozen amount.
+    Regular users can only cancel their own bookings.
+    """
+    user_id = None
+    if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
+        user_id = current.id
+    booking = await transition_booking(db, booking_id, "cancel", user_id=user_id)
+    await fill_from_waitlist(db, booking.place_id, booking.start_datetime, booking.end_datetime)
+    return booking
+
+@router.post(
+    "/{booking_id}/complete",
+    response_model=BookingRead
+)
+async def complete_booking(
+    booking_id: int,
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Mark a confirmed booking as completed (admin/owner only).
+    """
+    if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return await transition_booking(db, booking_id, "complete")
 
 @router.patch(
     "/{booking_id}",
@@ -93,4 +231,6 @@ async def del_booking(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    await delete_booking(db, booking_id)
\ No newline at end of file
+    deleted = await delete_booking(db, booking_id)
+    if deleted is not None and deleted.status != BookingStatus.CANCELLED:
+        await fill_from_waitlist(db, deleted.place_id, deleted.start_datetime, deleted.end_datetime)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -16,22 +16,32 @@ from core.api.deps import get_current_user
 from core.database.models.models import RoleEnum
 from core.database.db_helper import db_helper
 get_db = db_helper.scoped_session_dependency
+get_read_db = db_helper.read_session_dependency
 
 router = APIRouter(prefix="", tags=["location"])
 
 
+def _set_total(response: Response, total: int | None) -> None:
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+
+
 @router.get(
     "/branches",
     response_model=List[BranchRead]
 )
 async def get_branches(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=100, description="Max number of records to return"),
-    db: AsyncSession = Depends(get_db)
+    name: str | None = Query(None, description="Filter by name (case-insensitive substring)"),
+    include_total: bool = Query(True, description="Return the total in X-Total-Count"),
+    db: AsyncSession = Depends(get_read_db)
 ):
 
-    all_branches = await list_branches(db)
-    return all_branches[skip : skip + limit]
+    branches, total = await list_branches(db, skip=skip, limit=limit, name=name, with_total=include_total)
+    _set_total(response, total)
+    return branches
 
 @router.post(
     "/branches",
@@ -100,14 +110,18 @@ async def del_branch(
     response_model=List[ZoneRead]
 )
 async def get_zones(
+    response: Response,
     branch_id: int = Query(..., ge=1),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    name: str | None = Query(None, description="Filter by name (case-insensitive substring)"),
+    include_total: bool = Query(True, description="Return the total in X-Total-Count"),
+    db: AsyncSession = Depends(get_read_db)
 ):
 
-    zones = await list_zones(db, branch_id)
-    return zones[skip : skip + limit]
+    zones, total = await list_zones(db, branch_id, skip=skip, limit=limit, name=name, with_total=include_total)
+    _set_total(response, total)
+    return zones
 
 @router.post(
     "/zones",
@@ -176,14 +190,18 @@ async def del_zone(
     response_model=List[PlaceRead]
 )
 async def get_places(
+    response: Response,
     zone_id: int = Query(..., ge=1),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    name: str | None = Query(None, description="Filter by name (case-insensitive substring)"),
+    include_total: bool = Query(True, description="Return the total in X-Total-Count"),
+    db: AsyncSession = Depends(get_read_db)
 ):
 
-    places = await list_places(db, zone_id)
-    return places[skip : skip + limit]
+    places, total = await list_places(db, zone_id, skip=skip, limit=limit, name=name, with_total=include_total)
+    _set_total(response, total)
+    return places
 
 @router.post(
     "/places",
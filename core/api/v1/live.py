@@ -0,0 +1,134 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.crud.availability import zone_bookings
+from core.database.db_helper import db_helper
+from core.services.live import RESYNC, live_broadcaster
+from core.services.location_cache import location_cache
+get_db = db_helper.scoped_session_dependency
+
+router = APIRouter(prefix="/zones", tags=["live"])
+
+
+async def zone_snapshot(db: AsyncSession, zone_id: int) -> dict:
+    """
+    Every seat of the zone with its active bookings from now until
+    LIVE_SNAPSHOT_HOURS ahead.
+    """
+    locations = await location_cache.snapshot(db)
+    start = datetime.now(timezone.utc)
+    end = start + timedelta(hours=settings.LIVE_SNAPSHOT_HOURS)
+    places = {
+        place_id: {"place_id": place_id, "name": locations.places[place_id].name, "bookings": []}
+        for place_id in locations.places_by_zone.get(zone_id, ())
+    }
+    for booking_id, place_id, b_start, b_end, b_status in await zone_bookings(db, zone_id, start, end):
+        if place_id in places:
+            places[place_id]["bookings"].append({
+                "booking_id": booking_id,
+                "start": b_start.isoformat(),
+                "end": b_end.isoformat(),
+                "status": b_status.value,
+            })
+    return {
+        "type": "snapshot",
+        "zone_id": zone_id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "places": list(places.values()),
+    }
+
+
+async def check_zone(db: AsyncSession, zone_id: int) -> None:
+    if zone_id not in (await location_cache.snapshot(db)).zones:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Zone not found")
+
+
+@router.get("/{zone_id}/live")
+async def zone_live_sse(
+    zone_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Server-sent events: a `snapshot` of the zone, then one `booking` event
+    per change. After a `resync` event the client should reconnect.
+    """
+    await check_zone(db, zone_id)
+    # Subscribe before reading the snapshot so no change falls in between.
+    subscription = live_broadcaster.subscribe(zone_id)
+    try:
+        snapshot = await zone_snapshot(db, zone_id)
+    except Exception:
+        live_broadcaster.unsubscribe(subscription)
+        raise
+
+    async def stream():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(settings.LIVE_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                if event is RESYNC:
+                    return
+        finally:
+            live_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/{zone_id}/live/ws")
+async def zone_live_ws(websocket: WebSocket, zone_id: int):
+    """
+    WebSocket version of `/zones/{zone_id}/live`; a `resync` is answered
+    with a fresh snapshot on the same connection.
+    """
+    async with db_helper.session_factory() as db:
+        if zone_id not in (await location_cache.snapshot(db)).zones:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        subscription = live_broadcaster.subscribe(zone_id)
+        try:
+            snapshot = await zone_snapshot(db, zone_id)
+        except Exception:
+            live_broadcaster.unsubscribe(subscription)
+            raise
+    receiver = asyncio.create_task(websocket.receive())
+    try:
+        await websocket.send_json(snapshot)
+        while True:
+            getter = asyncio.create_task(subscription.get(settings.LIVE_KEEPALIVE_SECONDS))
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                if receiver.result()["type"] == "websocket.disconnect":
+                    return
+                # Clients have nothing to say; ignore anything they send.
+                receiver = asyncio.create_task(websocket.receive())
+                continue
+            event = getter.result()
+            if event is None:
+                await websocket.send_json({"type": "keepalive"})
+            elif event is RESYNC:
+                async with db_helper.session_factory() as db:
+                    await websocket.send_json(await zone_snapshot(db, zone_id))
+            else:
+                await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        live_broadcaster.unsubscribe(subscription)
@@ -0,0 +1,40 @@
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from core.api.deps import get_current_user
+from core.database.db_helper import db_helper
+from core.database.models.models import RoleEnum
+from core.services.location_cache import location_cache
+from core.services.live import live_broadcaster
+from core.services.place_lock import place_lock
+from core.services.user_cache import user_cache
+from core.services.idempotency import idempotency_store
+from core.services.sms import sms_client
+from core.tasks.runner import runner
+from core.tasks.cleanup import cleanup_stats
+from core.tasks.bookings import expiry_stats
+from core.tasks.waitlist import waitlist_stats
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("")
+async def read_metrics(current=Depends(get_current_user)):
+    """
+    Internal counters of the in-process caches and the DB pool (admin/owner only).
+    """
+    if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return {
+        "location_cache": asdict(location_cache.stats),
+        "live": asdict(live_broadcaster.stats),
+        "user_cache": user_cache.users.stats(),
+        "token_cache": user_cache.claims.stats(),
+        "db_pool": db_helper.pool_stats(),
+        "idempotency": asdict(idempotency_store.stats),
+        "sms": asdict(sms_client.stats),
+        "jobs": asdict(runner.stats),
+        "cleanup": asdict(cleanup_stats),
+        "booking_expiry": asdict(expiry_stats),
+        "waitlist": asdict(waitlist_stats),
+        "place_lock": asdict(place_lock.stats),
+    }
@@ -1,18 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from core.api.deps import get_current_user
 from core.database.db_helper import db_helper
 from core.schemas.balance_transactions import BalanceTransactionRead
+from core.schemas.pagination import CursorPage
 from sqlalchemy.ext.asyncio import AsyncSession
 from core.database.models import User
 from core.crud.balance_transaction import transactions_history
-from typing import List
 
 router = APIRouter(tags=['Transactions'], prefix='/transactions')
 
-@router.get('/', response_model=List[BalanceTransactionRead])
+@router.get('/', response_model=CursorPage[BalanceTransactionRead])
 async def get_transactions_history(
-    db: AsyncSession = Depends(db_helper.scoped_session_dependency),
+    cursor: str | None = Query(None, description="`next_cursor` of the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(db_helper.read_session_dependency),
     current: User = Depends(get_current_user)
 ):
     user_id = current.id
-    return await transactions_history(user_id=user_id, db=db)
\ No newline at end of file
+    transactions, next_cursor = await transactions_history(user_id=user_id, db=db, cursor=cursor, limit=limit)
+    return {"items": transactions, "next_cursor": next_cursor}
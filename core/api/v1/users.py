@@ -1,19 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.schemas.user import UserRead, UserUpdate
+from core.schemas.pagination import CursorPage
 from core.crud.users import get_user_by_id, list_users, update_user
 from core.api.deps import get_current_user
 from core.database.db_helper import db_helper
 from core.database.models.models import RoleEnum
+from core.tasks.cleanup import cleanup_unverified
 get_db = db_helper.scoped_session_dependency
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.get("/", response_model=List[UserRead])
+@router.get("/", response_model=CursorPage[UserRead])
 async def users_list(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    cursor: str | None = Query(None, description="`next_cursor` of the previous page"),
     limit: int = Query(10, ge=1, le=100, description="Max number of records to return"),
     db: AsyncSession = Depends(get_db),
     current=Depends(get_current_user),
@@ -21,7 +22,23 @@ async def users_list(
   
     if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
-    return await list_users(db, skip=skip, limit=limit)
+    users, next_cursor = await list_users(db, cursor=cursor, limit=limit)
+    return {"items": users, "next_cursor": next_cursor}
+
+@router.post("/cleanup")
+async def cleanup_users(
+    dry_run: bool = Query(True, description="Only report what would be deleted"),
+    current=Depends(get_current_user),
+):
+    """
+    Counts of expired unverified users and their rows, or queue the cleanup job.
+    """
+    if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    if dry_run:
+        return {"dry_run": True, "counts": await cleanup_unverified(dry_run=True)}
+    await cleanup_unverified.apply_async(kwargs={"dry_run": False})
+    return {"dry_run": False, "queued": True}
 
 @router.get("/{user_id}", response_model=UserRead)
 async def get_user(
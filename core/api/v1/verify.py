@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.schemas.otp import OTPRequest, OTPVerify, OTPOut
-from core.crud.otp import create_otp, verify_otp
-from core.services.otp import send_otp_via_eskiz
+from core.crud.otp import mark_phone_verified, phone_registered
+from core.config import settings
+from core.services.otp_store import otp_store, OTPCooldown
+from core.services.rate_limit import client_ip, otp_rate_limiter, RateLimited
 from core.database.db_helper import db_helper
 from core.tasks.cleanup import send_otp
 
@@ -13,17 +15,42 @@ get_db = db_helper.scoped_session_dependency
 @router.post("/otp", status_code=status.HTTP_204_NO_CONTENT)
 async def request_otp(
     data: OTPRequest,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
-
+    """
+    Send a one-time code to a registered number. Sends are capped per
+    client IP and per phone number.
+    """
+    # Every store: an SMS to an unknown number is never sent.
+    if not await phone_registered(db, data.phone_number):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
     try:
-        code = await create_otp(db, data.phone_number)
+        await otp_rate_limiter.hit(f"ip:{client_ip(request)}", settings.OTP_MAX_PER_IP)
+        await otp_rate_limiter.hit(f"phone:{data.phone_number}", settings.OTP_MAX_PER_PHONE)
+    except RateLimited as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many OTP requests, try again later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    try:
+        code = await otp_store.issue(data.phone_number)
+    except OTPCooldown as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="OTP was sent recently, try again later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    send_otp.delay(data.phone_number, code)
+    await send_otp.delay(data.phone_number, code)
     return {"message": "OTP sent successfully"}
 
 @router.post("/verify", response_model=OTPOut)
@@ -32,10 +59,10 @@ async def verify(
     db: AsyncSession = Depends(get_db),
 ):
 
-    valid = await verify_otp(db, data.phone_number, data.code)
-    if not valid:
+    valid = await otp_store.verify(data.phone_number, data.code)
+    if not valid or not await mark_phone_verified(db, data.phone_number):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired OTP"
         )
-    return OTPOut(phone_number=data.phone_number, verified=True).model_dump()
\ No newline at end of file
+    return OTPOut(phone_number=data.phone_number, verified=True).model_dump()
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.api.deps import get_current_user
+from core.crud.waitlist import create_entry, delete_entry, list_entries
+from core.database.db_helper import db_helper
+from core.database.models.models import RoleEnum
+from core.schemas.pagination import CursorPage
+from core.schemas.waitlist import WaitlistCreate, WaitlistRead
+get_db = db_helper.scoped_session_dependency
+
+router = APIRouter(prefix="/waitlist", tags=["waitlist"])
+
+@router.post(
+    "/",
+    response_model=WaitlistRead,
+    status_code=status.HTTP_201_CREATED
+)
+async def join_waitlist(
+    data: WaitlistCreate,
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Wait for any seat of a zone. When a matching interval is cancelled the
+    seat is booked (PENDING) for you and you get an SMS.
+    """
+    return await create_entry(db, current.id, data)
+
+@router.get(
+    "/",
+    response_model=CursorPage[WaitlistRead]
+)
+async def my_waitlist(
+    cursor: str | None = Query(None, description="`next_cursor` of the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Own waitlist entries, newest first.
+    """
+    entries, next_cursor = await list_entries(db, current.id, cursor=cursor, limit=limit)
+    return {"items": entries, "next_cursor": next_cursor}
+
+@router.delete(
+    "/{entry_id}",
+    status_code=status.HTTP_204_NO_CONTENT
+)
+async def leave_waitlist(
+    entry_id: int,
+    db: AsyncSession = Depends(get_db),
+    current = Depends(get_current_user)
+):
+    """
+    Drop a waiting entry. Admin/owner can drop anyone's.
+    """
+    user_id = None
+    if current.role not in (RoleEnum.ADMIN, RoleEnum.OWNER):
+        user_id = current.id
+    if not await delete_entry(db, entry_id, user_id=user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Waiting entry not found")
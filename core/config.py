@@ -15,10 +15,45 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
 
-    # Redis / Celery
+    # Read replicas for read-only endpoints (JSON list of URLs)
+    DATABASE_REPLICA_URLS: list[str] = Field([], env="DATABASE_REPLICA_URLS")
+    REPLICA_RETRY_SECONDS: int = Field(30, env="REPLICA_RETRY_SECONDS")
+    REPLICA_CONNECT_TIMEOUT_SECONDS: float = Field(2, env="REPLICA_CONNECT_TIMEOUT_SECONDS")
+    READ_YOUR_WRITES_SECONDS: int = Field(5, env="READ_YOUR_WRITES_SECONDS")
+
+    # Engine / connection pool. Unset values follow the ENV profile
+    # (see core/database/db_helper.py::engine_options).
+    DB_ECHO: bool | None = Field(None, env="DB_ECHO")
+    DB_POOL_SIZE: int | None = Field(None, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int | None = Field(None, env="DB_MAX_OVERFLOW")
+    DB_POOL_PRE_PING: bool | None = Field(None, env="DB_POOL_PRE_PING")
+    DB_POOL_RECYCLE: int = Field(1800, env="DB_POOL_RECYCLE")
+    DB_POOL_TIMEOUT: float = Field(30, env="DB_POOL_TIMEOUT")
+    DB_STATEMENT_CACHE_SIZE: int = Field(100, env="DB_STATEMENT_CACHE_SIZE")  # 0 behind pgbouncer
+    DB_MAX_CONNECTIONS: int = Field(100, env="DB_MAX_CONNECTIONS")  # shared by all workers
+    WEB_CONCURRENCY: int = Field(1, env="WEB_CONCURRENCY")
+
+    # Redis
     REDIS_URL: AnyUrl = Field(..., env="REDIS_URL")
-    CELERY_BROKER_URL: AnyUrl = Field(..., env="CELERY_BROKER_URL")
-    CELERY_RESULT_BACKEND: AnyUrl = Field(..., env="CELERY_RESULT_BACKEND")
+    # No longer used (background jobs run in-process); kept so existing .env files load.
+    CELERY_BROKER_URL: AnyUrl | None = Field(None, env="CELERY_BROKER_URL")
+    CELERY_RESULT_BACKEND: AnyUrl | None = Field(None, env="CELERY_RESULT_BACKEND")
+
+    # Background jobs (core/tasks/runner.py)
+    JOB_QUEUE: str = Field("database", env="JOB_QUEUE")  # database | memory
+    JOB_WORKERS: int = Field(4, env="JOB_WORKERS")
+    JOB_MAX_RETRIES: int = Field(5, env="JOB_MAX_RETRIES")
+    JOB_RETRY_BACKOFF_SECONDS: float = Field(2, env="JOB_RETRY_BACKOFF_SECONDS")
+    JOB_POLL_INTERVAL_SECONDS: float = Field(1, env="JOB_POLL_INTERVAL_SECONDS")
+    JOB_LEASE_SECONDS: int = Field(300, env="JOB_LEASE_SECONDS")
+    JOB_SHUTDOWN_TIMEOUT_SECONDS: float = Field(10, env="JOB_SHUTDOWN_TIMEOUT_SECONDS")
+
+    # Unverified-user cleanup (core/tasks/cleanup.py)
+    CLEANUP_UNVERIFIED_AFTER_HOURS: int = Field(48, env="CLEANUP_UNVERIFIED_AFTER_HOURS")
+    CLEANUP_BATCH_SIZE: int = Field(500, env="CLEANUP_BATCH_SIZE")
+    CLEANUP_BATCH_PAUSE_SECONDS: float = Field(0.5, env="CLEANUP_BATCH_PAUSE_SECONDS")
+    CLEANUP_MAX_BATCHES_PER_RUN: int = Field(100, env="CLEANUP_MAX_BATCHES_PER_RUN")
+    CLEANUP_DRY_RUN: bool = Field(False, env="CLEANUP_DRY_RUN")
 
     # JWT
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
@@ -26,8 +61,35 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(60 * 24 * 7, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(120* 24 * 7, env="REFRESH_TOKEN_EXPIRE_DAYS")
 
+    # Authenticated-user cache (get_current_user)
+    USER_CACHE_TTL_SECONDS: int = Field(30, env="USER_CACHE_TTL_SECONDS")
+    USER_CACHE_SIZE: int = Field(10000, env="USER_CACHE_SIZE")
+    TOKEN_CACHE_SIZE: int = Field(10000, env="TOKEN_CACHE_SIZE")
+
+    # Password hashing pool (bcrypt runs off the event loop)
+    PASSWORD_HASH_EXECUTOR: str = Field("thread", env="PASSWORD_HASH_EXECUTOR")  # thread | process
+    PASSWORD_HASH_WORKERS: int = Field(2, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_QUEUE_SIZE: int = Field(32, env="PASSWORD_HASH_QUEUE_SIZE")
+
+    # Idempotency-Key replay (POST /bookings, /balance/topup)
+    IDEMPOTENCY_TTL_HOURS: int = Field(24, env="IDEMPOTENCY_TTL_HOURS")
+    IDEMPOTENCY_CACHE: str = Field("memory", env="IDEMPOTENCY_CACHE")  # memory | redis
+    IDEMPOTENCY_CACHE_SIZE: int = Field(10000, env="IDEMPOTENCY_CACHE_SIZE")
+    IDEMPOTENCY_WAIT_SECONDS: float = Field(10, env="IDEMPOTENCY_WAIT_SECONDS")
+    IDEMPOTENCY_LEASE_SECONDS: int = Field(60, env="IDEMPOTENCY_LEASE_SECONDS")  # claim of a dead worker
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = Field(3600, env="IDEMPOTENCY_PURGE_INTERVAL_SECONDS")
+
     # OTP
     OTP_EXPIRE_MINUTES: int = Field(5, env="OTP_EXPIRE_MINUTES")
+    OTP_STORE: str = Field("redis", env="OTP_STORE")  # redis | memory | database
+    OTP_MAX_ATTEMPTS: int = Field(5, env="OTP_MAX_ATTEMPTS")
+    OTP_RESEND_SECONDS: int = Field(60, env="OTP_RESEND_SECONDS")
+    # Sends allowed per window, against SMS pumping (core/services/rate_limit.py)
+    OTP_RATE_WINDOW_SECONDS: int = Field(3600, env="OTP_RATE_WINDOW_SECONDS")
+    OTP_MAX_PER_PHONE: int = Field(5, env="OTP_MAX_PER_PHONE")
+    OTP_MAX_PER_IP: int = Field(20, env="OTP_MAX_PER_IP")
+    # Reverse proxies (JSON list of IPs/CIDRs) whose X-Forwarded-For names the real client
+    TRUSTED_PROXIES: list[str] = Field(["127.0.0.1", "::1"], env="TRUSTED_PROXIES")
 
     # iCafe integration
     ICAFE_API_URL: AnyUrl = Field(..., env="ICAFE_API_URL")
@@ -43,6 +105,39 @@ class Settings(BaseSettings):
     SMS_USERNAME: str = Field(..., env="SMS_USERNAME")
     SMS_PASSWORD: str = Field(..., env="SMS_PASSWORD")
     SMS_SENDER: str = Field(..., env="SMS_SENDER")
+    SMS_BATCH_URL: AnyUrl = Field("https://notify.eskiz.uz/api/message/sms/send-batch", env="SMS_BATCH_URL")
+    SMS_MAX_CONCURRENCY: int = Field(10, env="SMS_MAX_CONCURRENCY")
+    SMS_BATCH_SIZE: int = Field(200, env="SMS_BATCH_SIZE")
+    SMS_TIMEOUT_SECONDS: float = Field(10, env="SMS_TIMEOUT_SECONDS")
+
+    # Booking overlap index
+    BOOKING_INDEX_MAX_AGE_SECONDS: int = Field(60, env="BOOKING_INDEX_MAX_AGE_SECONDS")
+
+    # Per-place lock around the booking overlap check and insert (core/services/place_lock.py)
+    PLACE_LOCK: str = Field("postgres", env="PLACE_LOCK")  # postgres | redis | memory
+    PLACE_LOCK_TIMEOUT_SECONDS: float = Field(5, env="PLACE_LOCK_TIMEOUT_SECONDS")
+    PLACE_LOCK_TTL_SECONDS: float = Field(10, env="PLACE_LOCK_TTL_SECONDS")  # redis only
+    PLACE_LOCK_PREFIX: str = Field("place-lock", env="PLACE_LOCK_PREFIX")
+
+    # Expiry of unconfirmed bookings (core/tasks/bookings.py). 0 = off; enable once
+    # clients call /bookings/{id}/confirm, or the first sweep cancels every older PENDING booking.
+    BOOKING_PENDING_HOLD_MINUTES: int = Field(0, env="BOOKING_PENDING_HOLD_MINUTES")
+    BOOKING_EXPIRY_INTERVAL_SECONDS: int = Field(60, env="BOOKING_EXPIRY_INTERVAL_SECONDS")
+    BOOKING_EXPIRY_BATCH_SIZE: int = Field(500, env="BOOKING_EXPIRY_BATCH_SIZE")
+
+    # Waitlist: entries tried per freed interval
+    WAITLIST_MATCH_LIMIT: int = Field(20, env="WAITLIST_MATCH_LIMIT")
+
+    # Live zone streams (/zones/{id}/live); Redis pub/sub shares events between workers
+    LIVE_PUBSUB: bool = Field(False, env="LIVE_PUBSUB")
+    LIVE_CHANNEL: str = Field("live:zones", env="LIVE_CHANNEL")
+    LIVE_BUFFER_SIZE: int = Field(100, env="LIVE_BUFFER_SIZE")
+    LIVE_KEEPALIVE_SECONDS: float = Field(15, env="LIVE_KEEPALIVE_SECONDS")
+    LIVE_SNAPSHOT_HOURS: int = Field(24, env="LIVE_SNAPSHOT_HOURS")
+
+    # Location hierarchy cache (Redis pub/sub keeps uvicorn workers in sync)
+    LOCATION_CACHE_PUBSUB: bool = Field(False, env="LOCATION_CACHE_PUBSUB")
+    LOCATION_CACHE_CHANNEL: str = Field("location-cache:invalidate", env="LOCATION_CACHE_CHANNEL")
 
 
     class Config:
@@ -0,0 +1,77 @@
+from datetime import datetime
+from sqlalchemy import and_
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database.models.models import Booking, BookingStatus, Place, Zone
+
+
+def seat_bookings_stmt(start: datetime, end: datetime, zone_id: int | None = None, branch_id: int | None = None):
+    """
+    One range query: every place of the zone/branch outer-joined with its
+    active bookings that intersect [start, end).
+    """
+    stmt = (
+        select(
+            Place.id,
+            Place.zone_id,
+            Place.name,
+            Booking.start_datetime,
+            Booking.end_datetime,
+        )
+        .select_from(Place)
+        .outerjoin(
+            Booking,
+            and_(
+                Booking.place_id == Place.id,
+                Booking.status != BookingStatus.CANCELLED,
+                Booking.start_datetime < end,
+                Booking.end_datetime > start,
+            ),
+        )
+        .order_by(Place.id)
+    )
+    if zone_id is not None:
+        stmt = stmt.where(Place.zone_id == zone_id)
+    if branch_id is not None:
+        stmt = stmt.join(Zone, Zone.id == Place.zone_id).where(Zone.branch_id == branch_id)
+    return stmt
+
+
+async def seat_bookings(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    zone_id: int | None = None,
+    branch_id: int | None = None,
+):
+    result = await db.execute(seat_bookings_stmt(start, end, zone_id=zone_id, branch_id=branch_id))
+    return result.all()
+
+
+def zone_bookings_stmt(zone_id: int, start: datetime, end: datetime):
+    """
+    Active bookings of a zone's places intersecting [start, end).
+    """
+    return (
+        select(
+            Booking.id,
+            Booking.place_id,
+            Booking.start_datetime,
+            Booking.end_datetime,
+            Booking.status,
+        )
+        .join(Place, Place.id == Booking.place_id)
+        .where(
+            Place.zone_id == zone_id,
+            Booking.status != BookingStatus.CANCELLED,
+            Booking.start_datetime < end,
+            Booking.end_datetime > start,
+        )
+        .order_by(Booking.place_id, Booking.start_datetime)
+    )
+
+
+async def zone_bookings(db: AsyncSession, zone_id: int, start: datetime, end: datetime):
+    result = await db.execute(zone_bookings_stmt(zone_id, start, end))
+    return result.all()
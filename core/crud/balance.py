@@ -1,8 +1,11 @@
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from decimal import Decimal
 
-from core.database.models.models import User, BalanceTransaction, TransactionType
+from core.database.models.models import User, BalanceTransaction
+from core.services.balance import credit, UserNotFound
+from core.services.user_cache import user_cache
 
 async def get_user(db: AsyncSession, user_id: int) -> User | None:
 
@@ -20,33 +23,16 @@ async def topup_balance(
     amount: Decimal,
     idempotency_key: str
 ) -> User | None:
-    # 1. Idempotency: oldin bunday key bilan transaction bormi?
-    res = await db.execute(
-        select(BalanceTransaction)
-        .where(BalanceTransaction.idempotency_key == idempotency_key)
-    )
-    existing = res.scalar_one_or_none()
-    user = await db.get(User, user_id)
-
-    if not user:
+    # Balans va tranzaksiya bitta tranzaksiyada, atomik UPDATE bilan yoziladi
+    try:
+        user = await credit(db, user_id, amount, f"topup:{user_id}:{idempotency_key}")
+        await db.commit()
+    except UserNotFound:
+        await db.rollback()
         return None
-    if existing:
-        await db.refresh(user)
-        return user
-
-    # 2. Balansni oshirish
-    user.balance = (user.balance or Decimal("0.00")) + amount
-
-    # 3. Yozib qo‘yish
-    txn = BalanceTransaction(
-        user_id=user_id,
-        booking_id=None,
-        type=TransactionType.TOPUP,
-        amount=amount,
-        idempotency_key=idempotency_key
-    )
-    db.add(txn)
-
-    await db.commit()
-    await db.refresh(user)
-    return user
\ No newline at end of file
+    except IntegrityError:
+        # Idempotency: bu key bilan tranzaksiya allaqachon yozilgan
+        await db.rollback()
+        return await db.get(User, user_id)
+    user_cache.invalidate(user_id)
+    return user
@@ -2,9 +2,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from core.database.models import BalanceTransaction, Booking
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from sqlalchemy import Result
+from core.crud.pagination import keyset, page
 
-async def transactions_history(db: AsyncSession, user_id: int):
+def transactions_page_stmt(user_id: int, cursor: str | None, limit: int):
     stmt = (
         select(BalanceTransaction)
         .options(
@@ -12,7 +12,14 @@ async def transactions_history(db: AsyncSession, user_id: int):
             .selectinload(Booking.place)
         )
         .where(BalanceTransaction.user_id == user_id)
-        .order_by(BalanceTransaction.created_at.desc())
     )
-    result = await db.execute(stmt)
-    return result.scalars().all()
\ No newline at end of file
+    return keyset(stmt, BalanceTransaction, cursor, limit)
+
+async def transactions_history(
+    db: AsyncSession,
+    user_id: int,
+    cursor: str | None = None,
+    limit: int = 20
+) -> tuple[list[BalanceTransaction], str | None]:
+    result = await db.execute(transactions_page_stmt(user_id, cursor, limit))
+    return page(result.scalars().all(), limit)
@@ -1,30 +1,131 @@
+from contextlib import asynccontextmanager
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import delete
+from sqlalchemy import and_, delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
-from core.database.models.models import Booking, BalanceTransaction, BookingStatus, User, TransactionType
-from core.schemas.booking import BookingCreate, BookingUpdate
+from core.database.models.models import Booking, BookingStatus, TransactionType
+from core.schemas.booking import BookingCreate, BookingRecurringCreate, BookingUpdate
+from core.crud.pagination import keyset, page
+from core.services.availability import match_conflicts
+from core.services.booking_index import as_utc, booking_index
+from core.services.live import live_broadcaster
+from core.services.place_lock import PlaceLockTimeout, place_lock
+from core.services.balance import capture, credit, credit_many, debit, debit_many, InsufficientFunds, UserNotFound
+from core.services.user_cache import user_cache
 from fastapi.exceptions import HTTPException
 from fastapi import status
 
+OVERLAP_CONSTRAINTS = (
+    "excl_bookings_place_time",
+    "uix_place_time",
+    "bookings.place_id, bookings.start_datetime",
+)
+
+# action -> (status the booking must be in, status it moves to)
+TRANSITIONS = {
+    "confirm": (BookingStatus.PENDING, BookingStatus.CONFIRMED),
+    "cancel": (BookingStatus.PENDING, BookingStatus.CANCELLED),
+    "complete": (BookingStatus.CONFIRMED, BookingStatus.COMPLETED),
+}
+
+async def report_change(db: AsyncSession, booking: Booking) -> None:
+    await live_broadcaster.booking_changed(
+        db, booking.id, booking.place_id, booking.start_datetime, booking.end_datetime, booking.status
+    )
+
+def booking_conflict() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Place is already booked for this time")
+
+@asynccontextmanager
+async def locked_places(db: AsyncSession, place_ids):
+    """
+    Hold the per-place booking lock for `place_ids` (see services/place_lock.py).
+    """
+    try:
+        async with place_lock.hold(db, place_ids):
+            yield
+    except PlaceLockTimeout:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Place is busy, try again")
+
+def violated_constraint(exc: IntegrityError) -> str:
+    orig = getattr(exc, "orig", None)
+    name = getattr(getattr(orig, "__cause__", None), "constraint_name", None)
+    return name or str(orig)
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    constraint = violated_constraint(exc)
+    return any(name in constraint for name in OVERLAP_CONSTRAINTS)
+
+def overlap_stmt(place_id: int, start: datetime, end: datetime, exclude_id: int | None = None):
+    stmt = (
+        select(Booking.id)
+        .where(
+            Booking.place_id == place_id,
+            Booking.status != BookingStatus.CANCELLED,
+            Booking.start_datetime < end,
+            Booking.end_datetime > start,
+        )
+        .limit(1)
+    )
+    if exclude_id is not None:
+        stmt = stmt.where(Booking.id != exclude_id)
+    return stmt
+
+def batch_overlap_stmt(items: list[BookingCreate]):
+    """
+    `overlap_stmt` for several seats at once: one query, one OR branch per seat.
+    """
+    return (
+        select(Booking.id)
+        .where(or_(*(
+            # status inside every branch so each one can use the partial index
+            and_(
+                Booking.place_id == item.place_id,
+                Booking.status != BookingStatus.CANCELLED,
+                Booking.start_datetime < item.end_datetime,
+                Booking.end_datetime > item.start_datetime,
+            )
+            for item in items
+        )))
+        .limit(1)
+    )
+
+def place_bookings_stmt(place_id: int, start: datetime, end: datetime):
+    """
+    Active bookings of one place intersecting [start, end), by start time.
+    """
+    return (
+        select(Booking.start_datetime, Booking.end_datetime, Booking.id)
+        .where(
+            Booking.place_id == place_id,
+            Booking.status != BookingStatus.CANCELLED,
+            Booking.start_datetime < end,
+            Booking.end_datetime > start,
+        )
+        .order_by(Booking.start_datetime)
+    )
+
 async def get_booking(db: AsyncSession, booking_id: int) -> Booking | None:
     result = await db.execute(select(Booking).options(selectinload(Booking.place)).where(Booking.id == booking_id))
     return result.scalar_one_or_none()
 
+def bookings_page_stmt(user_id: int | None, cursor: str | None, limit: int):
+    stmt = select(Booking).options(selectinload(Booking.place))
+    if user_id is not None:
+        stmt = stmt.where(Booking.user_id == user_id)
+    return keyset(stmt, Booking, cursor, limit)
+
 async def list_bookings(
     db: AsyncSession,
     user_id: int | None = None,
-    skip: int = 0,
+    cursor: str | None = None,
     limit: int = 10
-) -> list[Booking]:
-    stmt = select(Booking).options(selectinload(Booking.place))
-    if user_id is not None:
-        stmt = stmt.where(Booking.user_id == user_id)
-    stmt = stmt.offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    return result.scalars().all()
+) -> tuple[list[Booking], str | None]:
+    result = await db.execute(bookings_page_stmt(user_id, cursor, limit))
+    return page(result.scalars().all(), limit)
 
 async def create_booking(
     db: AsyncSession,
@@ -41,75 +142,350 @@ async def create_booking(
     if existing:
         return existing
 
-     
-        
-    user = await db.get(User, user_id)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    if user.balance < data.amount:
-        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Insufficient balance")
+    # Fast reject from the in-process index, before waiting for the lock.
+    if not await booking_index.is_free(db, data.place_id, data.start_datetime, data.end_datetime):
+        raise booking_conflict()
 
+    async with locked_places(db, [data.place_id]):
+        # Exact under the place lock, on every dialect.
+        if (await db.execute(overlap_stmt(data.place_id, data.start_datetime, data.end_datetime))).first():
+            raise booking_conflict()
 
-    overlap_stmt = (
-        select(Booking)
-        .where(
-            Booking.place_id == data.place_id,
-            Booking.status != TransactionType.CANCELLED,
-            Booking.start_datetime <= data.end_datetime,
-            Booking.end_datetime >= data.start_datetime
+        booking = Booking(
+            user_id=user_id,
+            place_id=data.place_id,
+            start_datetime=data.start_datetime,
+            end_datetime=data.end_datetime,
+            amount=data.amount,
+            status=BookingStatus.PENDING,
+            idempotency_key=idempotency_key,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
         )
-    )
-    overlap = (await db.execute(overlap_stmt)).scalars().all()
-    if overlap:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Place is already booked for this time")
-
-    user.balance -= data.amount
-    freeze_txn = BalanceTransaction(
-        user_id=user_id,
-        booking_id=None,  
-        type=TransactionType.FREEZE,
-        amount=data.amount,
-        idempotency_key=idempotency_key,
-    )
-    db.add(freeze_txn)
-
-    booking = Booking(
-        user_id=user_id,
-        place_id=data.place_id,
-        start_datetime=data.start_datetime,
-        end_datetime=data.end_datetime,
-        amount=data.amount,
-        status=BookingStatus.PENDING,
-        idempotency_key=idempotency_key,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
-    )
-    db.add(booking)
-
-    freeze_txn.booking_id = booking.id
-    await db.commit()  
+        db.add(booking)
+        try:
+            # The exclusion constraint still has the final say.
+            await db.flush()
+            await debit(db, user_id, data.amount, f"freeze:{booking.id}", booking_id=booking.id)
+            await db.commit()
+        except UserNotFound:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        except InsufficientFunds:
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Insufficient balance")
+        except IntegrityError as e:
+            await db.rollback()
+            if is_overlap_violation(e):
+                raise booking_conflict()
+            # A concurrent retry with the same key won the race.
+            res = await db.execute(
+                select(Booking)
+                .where(Booking.user_id == user_id, Booking.idempotency_key == idempotency_key)
+            )
+            existing = res.scalar_one_or_none()
+            if existing:
+                return existing
+            raise
+    booking_index.track(booking)
+    await report_change(db, booking)
+    user_cache.invalidate(user_id)
 
     await db.refresh(booking, attribute_names=["place"])
     return await get_booking(db, booking_id=booking.id)
 
+async def bookings_by_keys(db: AsyncSession, user_id: int, keys: list[str]) -> list[Booking]:
+    res = await db.execute(
+        select(Booking)
+        .where(Booking.user_id == user_id, Booking.idempotency_key.in_(keys))
+        .order_by(Booking.id)
+    )
+    return list(res.scalars().all())
+
+async def insert_bookings(
+    db: AsyncSession,
+    user_id: int,
+    items: list[BookingCreate],
+    keys: list[str]
+) -> list[Booking]:
+    """
+    Write already checked bookings: one INSERT for the bookings and one
+    aggregated debit with its freeze entries, committed together.
+    """
+    now = datetime.utcnow()
+    try:
+        result = await db.execute(
+            insert(Booking).returning(Booking),
+            [
+                {
+                    "user_id": user_id,
+                    "place_id": item.place_id,
+                    "start_datetime": item.start_datetime,
+                    "end_datetime": item.end_datetime,
+                    "amount": item.amount,
+                    "status": BookingStatus.PENDING,
+                    "idempotency_key": key,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for item, key in zip(items, keys)
+            ],
+        )
+        # Without a sort sentinel SQLite would fall back to one INSERT per row;
+        # put the rows back in request order by their keys instead.
+        by_key = {booking.idempotency_key: booking for booking in result.scalars().all()}
+        bookings = [by_key[key] for key in keys]
+        await debit_many(db, user_id, [
+            {"amount": booking.amount, "idempotency_key": f"freeze:{booking.id}", "booking_id": booking.id}
+            for booking in bookings
+        ])
+        await db.commit()
+    except UserNotFound:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    except InsufficientFunds:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="Insufficient balance")
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise booking_conflict()
+        existing = await bookings_by_keys(db, user_id, keys)
+        if existing:
+            return existing
+        raise
+    for booking in bookings:
+        booking_index.track(booking)
+        await report_change(db, booking)
+    user_cache.invalidate(user_id)
+    return bookings
+
+async def create_bookings(
+    db: AsyncSession,
+    user_id: int,
+    items: list[BookingCreate],
+    idempotency_key: str
+) -> list[Booking]:
+    """
+    Book several seats at once, all or nothing: one overlap query for every
+    seat, one INSERT for the bookings, one debit of the total and one INSERT
+    for the freeze entries, in a single transaction.
+    """
+    keys = [f"{idempotency_key}:{i}" for i in range(len(items))]
+    existing = await bookings_by_keys(db, user_id, keys)
+    if existing:
+        return existing
+
+    # Only places already in the index; loading cold ones would cost a query per seat.
+    if any(booking_index.is_taken(item.place_id, item.start_datetime, item.end_datetime) for item in items):
+        raise booking_conflict()
+
+    async with locked_places(db, [item.place_id for item in items]):
+        if (await db.execute(batch_overlap_stmt(items))).first():
+            raise booking_conflict()
+        return await insert_bookings(db, user_id, items, keys)
+
+async def create_recurring_bookings(
+    db: AsyncSession,
+    user_id: int,
+    data: BookingRecurringCreate,
+    idempotency_key: str
+) -> tuple[list[Booking], list[dict]]:
+    """
+    Expand a recurring booking, check every occurrence against the place's
+    bookings with one range query and book the free ones via
+    `insert_bookings`. Returns the created bookings and the conflicting
+    occurrences.
+    """
+    occurrences = data.occurrences()
+    keys = [f"{idempotency_key}:{i}" for i in range(len(occurrences))]
+    existing = await bookings_by_keys(db, user_id, keys)
+    if existing:
+        return existing, []
+
+    async with locked_places(db, [data.place_id]):
+        busy = (await db.execute(
+            place_bookings_stmt(data.place_id, occurrences[0][0], occurrences[-1][1])
+        )).all()
+        conflicts = match_conflicts(occurrences, busy)
+        items, item_keys = [], []
+        for i, (start, end) in enumerate(occurrences):
+            if i not in conflicts:
+                items.append(BookingCreate(place_id=data.place_id, start_datetime=start, end_datetime=end, amount=data.amount))
+                item_keys.append(keys[i])
+        bookings = await insert_bookings(db, user_id, items, item_keys) if items else []
+    return bookings, [
+        {"start_datetime": occurrences[i][0], "end_datetime": occurrences[i][1], "booking_id": booking_id}
+        for i, booking_id in sorted(conflicts.items())
+    ]
+
 async def update_booking(
     db: AsyncSession,
     booking_id: int,
     data: BookingUpdate
 ) -> Booking | None:
+    changes = data.model_dump(exclude_unset=True)
+    if changes.pop("status", None) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Use /confirm, /cancel or /complete to change the status",
+        )
+    if changes.pop("amount", None) is not None:
+        # The frozen ledger entry was written for the original amount.
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="The amount of a booking cannot be changed; cancel it and book again",
+        )
     booking = await get_booking(db, booking_id)
     if not booking:
         return None
-    for field, value in data.model_dump(exclude_unset=True).items():
-        setattr(booking, field, value)
-    booking.updated_at = datetime.utcnow()
-    await db.commit()
+    if not changes:
+        return booking
+    start = as_utc(changes.get("start_datetime") or booking.start_datetime)
+    end = as_utc(changes.get("end_datetime") or booking.end_datetime)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="end_datetime must be after start_datetime",
+        )
+    if not await booking_index.is_free(db, booking.place_id, start, end, exclude_id=booking.id):
+        raise booking_conflict()
+    async with locked_places(db, [booking.place_id]):
+        if (await db.execute(overlap_stmt(booking.place_id, start, end, exclude_id=booking.id))).first():
+            raise booking_conflict()
+        booking.start_datetime, booking.end_datetime = start, end
+        booking.updated_at = datetime.utcnow()
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if is_overlap_violation(e):
+                raise booking_conflict()
+            raise
     await db.refresh(booking)
+    booking_index.track(booking)
+    await report_change(db, booking)
+    user_cache.invalidate(booking.user_id)
     return booking
 
-async def delete_booking(db: AsyncSession, booking_id: int) -> None:
-    await db.execute(delete(Booking).where(Booking.id == booking_id))
+async def transition_booking(
+    db: AsyncSession,
+    booking_id: int,
+    action: str,
+    user_id: int | None = None
+) -> Booking:
+    """
+    Move a booking along TRANSITIONS with one conditional
+    `UPDATE ... WHERE status = :expected RETURNING` and write the matching
+    ledger entry in the same transaction: confirm captures the frozen amount
+    (PAYMENT), cancel gives it back (RELEASE). With `user_id` only that
+    user's booking is matched. Raises 404 or 409.
+    """
+    expected, target = TRANSITIONS[action]
+    stmt = update(Booking).where(Booking.id == booking_id, Booking.status == expected)
+    if user_id is not None:
+        stmt = stmt.where(Booking.user_id == user_id)
+    result = await db.execute(
+        stmt.values(status=target, updated_at=datetime.utcnow())
+        .returning(Booking)
+        .execution_options(populate_existing=True)
+    )
+    booking = result.scalar_one_or_none()
+    if booking is None:
+        # Only the failure path pays for telling "missing" from "wrong state".
+        current = select(Booking.status).where(Booking.id == booking_id)
+        if user_id is not None:
+            current = current.where(Booking.user_id == user_id)
+        current = (await db.execute(current)).scalar_one_or_none()
+        await db.rollback()
+        if current is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Cannot {action} a {current.value} booking",
+        )
+
+    if action == "confirm":
+        await capture(db, booking.user_id, booking.amount, f"payment:{booking.id}", booking_id=booking.id)
+    elif action == "cancel":
+        await credit(
+            db, booking.user_id, booking.amount, f"release:{booking.id}",
+            type=TransactionType.RELEASE, booking_id=booking.id,
+        )
     await db.commit()
+    booking_index.track(booking)
+    await report_change(db, booking)
+    user_cache.invalidate(booking.user_id)
+    return booking
+
+def stale_pending_stmt(cutoff: datetime, limit: int):
+    return (
+        select(Booking.id)
+        .where(Booking.status == BookingStatus.PENDING, Booking.created_at < cutoff)
+        .order_by(Booking.created_at, Booking.id)
+        .limit(limit)
+    )
+
+async def expire_pending_bookings(db: AsyncSession, cutoff: datetime, limit: int) -> list:
+    """
+    Cancel up to `limit` PENDING bookings created before `cutoff` and give
+    their frozen amounts back, all in one transaction. Returns the
+    (id, user_id, place_id, amount, start_datetime, end_datetime) rows of
+    the expired bookings; the caller syncs the in-process caches.
+    """
+    stmt = stale_pending_stmt(cutoff, limit)
+    if db.bind.dialect.name == "postgresql":
+        # Leave bookings being confirmed right now to the next sweep.
+        stmt = stmt.with_for_update(skip_locked=True)
+    ids = (await db.execute(stmt)).scalars().all()
+    if not ids:
+        return []
+    expired = (await db.execute(
+        update(Booking)
+        .where(Booking.id.in_(ids), Booking.status == BookingStatus.PENDING)
+        .values(status=BookingStatus.CANCELLED, updated_at=datetime.utcnow())
+        .returning(
+            Booking.id, Booking.user_id, Booking.place_id, Booking.amount,
+            Booking.start_datetime, Booking.end_datetime,
+        )
+        .execution_options(synchronize_session=False)
+    )).all()
+    await credit_many(db, [
+        {"user_id": user_id, "amount": amount, "idempotency_key": f"release:{booking_id}", "booking_id": booking_id}
+        for booking_id, user_id, _, amount, *_ in expired
+    ])
+    await db.commit()
+    return expired
+
+async def delete_booking(db: AsyncSession, booking_id: int):
+    """
+    Delete a booking. A PENDING one gets its frozen amount back (RELEASE)
+    in the same transaction, as on cancel. Returns its (user_id, place_id,
+    start_datetime, end_datetime, status, amount) row, or None if there was
+    none.
+    """
+    result = await db.execute(
+        delete(Booking)
+        .where(Booking.id == booking_id)
+        .returning(
+            Booking.user_id, Booking.place_id, Booking.start_datetime, Booking.end_datetime,
+            Booking.status, Booking.amount,
+        )
+    )
+    deleted = result.first()
+    if deleted is not None and deleted.status == BookingStatus.PENDING:
+        # The ledger's booking_id would be nulled by the delete anyway.
+        await credit(
+            db, deleted.user_id, deleted.amount, f"release:{booking_id}", type=TransactionType.RELEASE,
+        )
+    await db.commit()
+    booking_index.discard(booking_id)
+    if deleted is not None:
+        user_cache.invalidate(deleted.user_id)
+        await live_broadcaster.booking_changed(
+            db, booking_id, deleted.place_id, deleted.start_datetime, deleted.end_datetime, None
+        )
+    return deleted
 
 # async def booking_list_for_admin(
 #         db: AsyncSession
@@ -2,101 +2,140 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from core.database.models.models import Branch, Zone, Place
+from core.crud.pagination import count_rows
+from core.services.location_cache import location_cache, BranchNode, ZoneNode, PlaceNode
 from core.schemas.location import (
     BranchCreate, BranchUpdate,
     ZoneCreate, ZoneUpdate,
     PlaceCreate, PlaceUpdate
 )
 
-async def list_branches(db: AsyncSession) -> list[Branch]:
-    result = await db.execute(select(Branch))
-    return result.scalars().all()
-
-async def get_branch(db: AsyncSession, branch_id: int) -> Branch | None:
-    result = await db.execute(select(Branch).where(Branch.id == branch_id))
-    return result.scalar_one_or_none()
+async def _offset_page(
+    db: AsyncSession,
+    stmt,
+    model,
+    skip: int,
+    limit: int,
+    name: str | None,
+    with_total: bool,
+) -> tuple[list, int | None]:
+    if name:
+        stmt = stmt.where(model.name.icontains(name, autoescape=True))
+    total = await count_rows(db, stmt) if with_total else None
+    result = await db.execute(stmt.order_by(model.id).offset(skip).limit(limit))
+    return result.scalars().all(), total
+
+async def list_branches(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 10,
+    name: str | None = None,
+    with_total: bool = True
+) -> tuple[list[Branch], int | None]:
+    return await _offset_page(db, select(Branch), Branch, skip, limit, name, with_total)
+
+async def get_branch(db: AsyncSession, branch_id: int) -> BranchNode | None:
+    snapshot = await location_cache.snapshot(db)
+    return snapshot.branches.get(branch_id)
 
 async def create_branch(db: AsyncSession, data: BranchCreate) -> Branch:
     branch = Branch(**data.model_dump())
     db.add(branch)
     await db.commit()
-    await db.refresh(branch)
+    await location_cache.invalidate()
     return branch
 
 async def update_branch(db: AsyncSession, branch_id: int, data: BranchUpdate) -> Branch | None:
-    branch = await get_branch(db, branch_id)
+    branch = await db.get(Branch, branch_id)
     if not branch:
         return None
     for field, value in data.dict(exclude_unset=True).items():
         setattr(branch, field, value)
     await db.commit()
-    await db.refresh(branch)
+    await location_cache.invalidate()
     return branch
 
 async def delete_branch(db: AsyncSession, branch_id: int) -> None:
-    branch = await get_branch(db, branch_id)
+    branch = await db.get(Branch, branch_id)
     if branch:
         await db.delete(branch)
         await db.commit()
-
-async def list_zones(db: AsyncSession, branch_id: int) -> list[Zone]:
-    result = await db.execute(select(Zone).where(Zone.branch_id == branch_id))
-    return result.scalars().all()
-
-async def get_zone(db: AsyncSession, zone_id: int) -> Zone | None:
-    result = await db.execute(select(Zone).where(Zone.id == zone_id))
-    return result.scalar_one_or_none()
+        await location_cache.invalidate()
+
+async def list_zones(
+    db: AsyncSession,
+    branch_id: int,
+    skip: int = 0,
+    limit: int = 10,
+    name: str | None = None,
+    with_total: bool = True
+) -> tuple[list[Zone], int | None]:
+    stmt = select(Zone).where(Zone.branch_id == branch_id)
+    return await _offset_page(db, stmt, Zone, skip, limit, name, with_total)
+
+async def get_zone(db: AsyncSession, zone_id: int) -> ZoneNode | None:
+    snapshot = await location_cache.snapshot(db)
+    return snapshot.zones.get(zone_id)
 
 async def create_zone(db: AsyncSession, data: ZoneCreate) -> Zone:
     zone = Zone(**data.model_dump())
     db.add(zone)
     await db.commit()
-    await db.refresh(zone)
+    await location_cache.invalidate()
     return zone
 
 async def update_zone(db: AsyncSession, zone_id: int, data: ZoneUpdate) -> Zone | None:
-    zone = await get_zone(db, zone_id)
+    zone = await db.get(Zone, zone_id)
     if not zone:
         return None
     for field, value in data.dict(exclude_unset=True).items():
         setattr(zone, field, value)
     await db.commit()
-    await db.refresh(zone)
+    await location_cache.invalidate()
     return zone
 
 async def delete_zone(db: AsyncSession, zone_id: int) -> None:
-    zone = await get_zone(db, zone_id)
+    zone = await db.get(Zone, zone_id)
     if zone:
         await db.delete(zone)
         await db.commit()
-
-async def list_places(db: AsyncSession, zone_id: int) -> list[Place]:
-    result = await db.execute(select(Place).where(Place.zone_id == zone_id))
-    return result.scalars().all()
-
-async def get_place(db: AsyncSession, place_id: int) -> Place | None:
-    result = await db.execute(select(Place).where(Place.id == place_id))
-    return result.scalar_one_or_none()
+        await location_cache.invalidate()
+
+async def list_places(
+    db: AsyncSession,
+    zone_id: int,
+    skip: int = 0,
+    limit: int = 10,
+    name: str | None = None,
+    with_total: bool = True
+) -> tuple[list[Place], int | None]:
+    stmt = select(Place).where(Place.zone_id == zone_id)
+    return await _offset_page(db, stmt, Place, skip, limit, name, with_total)
+
+async def get_place(db: AsyncSession, place_id: int) -> PlaceNode | None:
+    snapshot = await location_cache.snapshot(db)
+    return snapshot.places.get(place_id)
 
 async def create_place(db: AsyncSession, data: PlaceCreate) -> Place:
     place = Place(**data.model_dump())
     db.add(place)
     await db.commit()
-    await db.refresh(place)
+    await location_cache.invalidate()
     return place
 
 async def update_place(db: AsyncSession, place_id: int, data: PlaceUpdate) -> Place | None:
-    place = await get_place(db, place_id)
+    place = await db.get(Place, place_id)
     if not place:
         return None
     for field, value in data.dict(exclude_unset=True).items():
         setattr(place, field, value)
     await db.commit()
-    await db.refresh(place)
+    await location_cache.invalidate()
     return place
 
 async def delete_place(db: AsyncSession, place_id: int) -> None:
-    place = await get_place(db, place_id)
+    place = await db.get(Place, place_id)
     if place:
         await db.delete(place)
-        await db.commit()
\ No newline at end of file
+        await db.commit()
+        await location_cache.invalidate()
\ No newline at end of file
@@ -1,6 +1,7 @@
 import random
 import string
 from datetime import datetime, timedelta
+from sqlalchemy import update
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -16,36 +17,56 @@ async def create_otp(db: AsyncSession, phone_number: str) -> str:
     
     code = ''.join(random.choices(string.digits, k=6))
     now = datetime.utcnow()
+    await db.execute(
+        OTP.__table__.delete().where(OTP.user_id == user.id, OTP.expires_at <= now)
+    )
     expires_at = now + timedelta(minutes=settings.OTP_EXPIRE_MINUTES)
     otp = OTP(user_id=user.id, code=code, created_at=now, expires_at=expires_at)
     db.add(otp)
     await db.commit()
     return code
 
-async def verify_otp(db: AsyncSession, phone_number: str, code: str) -> bool:
-  
-    result = await db.execute(select(User).where(User.phone_number == phone_number))
-    user = result.scalar_one_or_none()
-    if not user:
-        return False
-   
-    q = await db.execute(
+def valid_otp_stmt(user_id: int, code: str, now: datetime):
+    return (
         select(OTP)
         .where(
-            OTP.user_id == user.id,
+            OTP.user_id == user_id,
             OTP.code == code,
-            OTP.expires_at > datetime.utcnow()
+            OTP.expires_at > now
         )
         .order_by(OTP.created_at.desc())
     )
-    otp = q.scalar_one_or_none()
+
+async def consume_otp(db: AsyncSession, phone_number: str, code: str) -> bool:
+  
+    result = await db.execute(select(User).where(User.phone_number == phone_number))
+    user = result.scalar_one_or_none()
+    if not user:
+        return False
+   
+    q = await db.execute(valid_otp_stmt(user.id, code, datetime.utcnow()))
+    otp = q.scalars().first()
     if not otp:
         return False
- 
-    user.is_verified = True
-  
+
+    # Every code of the user goes, along with any expired leftovers.
     await db.execute(
         OTP.__table__.delete().where(OTP.user_id == user.id)
     )
     await db.commit()
-    return True
\ No newline at end of file
+    return True
+
+async def phone_registered(db: AsyncSession, phone_number: str) -> bool:
+    result = await db.execute(select(User.id).where(User.phone_number == phone_number))
+    return result.first() is not None
+
+async def mark_phone_verified(db: AsyncSession, phone_number: str) -> bool:
+    result = await db.execute(
+        update(User)
+        .where(User.phone_number == phone_number)
+        .values(is_verified=True)
+        .returning(User.id)
+    )
+    user_id = result.scalar_one_or_none()
+    await db.commit()
+    return user_id is not None
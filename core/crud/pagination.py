@@ -0,0 +1,49 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.exceptions import HTTPException
+from fastapi import status
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset(stmt, model, cursor: str | None, limit: int):
+    """
+    Newest-first keyset pagination on (created_at, id). Fetches one extra
+    row so `page` can tell whether another page follows.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < (created_at, row_id))
+    return stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def page(rows, limit: int) -> tuple[list, str | None]:
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.id)
+
+
+async def count_rows(db: AsyncSession, stmt) -> int:
+    """
+    Total number of rows `stmt` would return, ignoring ordering and paging.
+    """
+    subquery = stmt.order_by(None).limit(None).offset(None).subquery()
+    result = await db.execute(select(func.count()).select_from(subquery))
+    return result.scalar_one()
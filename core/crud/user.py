@@ -1,18 +1,16 @@
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from passlib.context import CryptContext
 from core.database.models import User
 from core.schemas.user import UserCreate
 from core.database.models.models import RoleEnum
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from core.services.auth import get_password_hash_async
 
 async def get_user_by_phone(db: AsyncSession, phone: str) -> User | None:
     result = await db.execute(select(User).where(User.phone_number == phone))
     return result.scalar_one_or_none()
 
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
-    hashed_pwd = pwd_context.hash(user_in.password)
+    hashed_pwd = await get_password_hash_async(user_in.password)
     db_user = User(
         first_name=user_in.first_name,
         last_name=user_in.last_name,
@@ -5,7 +5,9 @@ from datetime import datetime
 
 from core.database.models.models import User
 from core.schemas.user import UserCreate, UserUpdate
-from core.services.auth import get_password_hash
+from core.crud.pagination import keyset, page
+from core.services.auth import get_password_hash_async
+from core.services.user_cache import user_cache
 
 async def get_user_by_phone(db: AsyncSession, phone: str) -> User | None:
     result = await db.execute(select(User).where(User.phone_number == phone))
@@ -17,19 +19,15 @@ async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
 
 async def list_users(
     db: AsyncSession,
-    skip: int = 0,
+    cursor: str | None = None,
     limit: int = 10
-) -> list[User]:
+) -> tuple[list[User], str | None]:
 
-    result = await db.execute(
-        select(User)
-        .offset(skip)
-        .limit(limit)
-    )
-    return result.scalars().all()
+    result = await db.execute(keyset(select(User), User, cursor, limit))
+    return page(result.scalars().all(), limit)
 
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
-    hashed_pwd = get_password_hash(user_in.password)
+    hashed_pwd = await get_password_hash_async(user_in.password)
     db_user = User(
         first_name=user_in.first_name,
         last_name=user_in.last_name,
@@ -44,7 +42,7 @@ async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
 async def update_user(db: AsyncSession, user_id: int, user_in: UserUpdate) -> User | None:
     values = user_in.dict(exclude_unset=True)
     if "password" in values:
-        values["password_hash"] = get_password_hash(values.pop("password"))
+        values["password_hash"] = await get_password_hash_async(values.pop("password"))
     values["updated_at"] = datetime.utcnow()
     stmt = (
         update(User)
@@ -54,4 +52,5 @@ async def update_user(db: AsyncSession, user_id: int, user_in: UserUpdate) -> Us
     )
     await db.execute(stmt)
     await db.commit()
+    user_cache.invalidate(user_id)
     return await get_user_by_id(db, user_id)
\ No newline at end of file
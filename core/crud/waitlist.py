@@ -0,0 +1,176 @@
+import time
+from datetime import datetime
+from sqlalchemy import delete, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.exceptions import HTTPException
+from fastapi import status
+
+from core.config import settings
+from core.crud.booking import create_booking
+from core.crud.pagination import keyset, page
+from core.database.models.models import User, WaitlistEntry, Zone
+from core.schemas.booking import BookingCreate
+from core.schemas.waitlist import WaitlistCreate
+from core.services.location_cache import location_cache
+from core.tasks.waitlist import notify_waitlist, retry_fill, waitlist_stats
+
+# Outcomes of create_booking that only rule out this entry: the slot went to
+# an earlier entry, the user cannot pay or no longer exists.
+SKIPPED_STATUSES = {status.HTTP_402_PAYMENT_REQUIRED, status.HTTP_404_NOT_FOUND, status.HTTP_409_CONFLICT}
+
+# Failures of the database or the network rather than of one entry; the whole
+# fill is retried for these.
+INFRASTRUCTURE_ERRORS = (SQLAlchemyError, OSError)
+
+
+def is_infrastructure_error(exc: Exception) -> bool:
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500
+    return isinstance(exc, INFRASTRUCTURE_ERRORS)
+
+
+async def create_entry(db: AsyncSession, user_id: int, data: WaitlistCreate) -> WaitlistEntry:
+    if await db.get(Zone, data.zone_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Zone not found")
+    entry = WaitlistEntry(
+        user_id=user_id,
+        zone_id=data.zone_id,
+        start_datetime=data.start_datetime,
+        end_datetime=data.end_datetime,
+        amount=data.amount,
+        created_at=datetime.utcnow(),
+    )
+    db.add(entry)
+    await db.commit()
+    return entry
+
+async def list_entries(
+    db: AsyncSession,
+    user_id: int,
+    cursor: str | None = None,
+    limit: int = 20
+) -> tuple[list[WaitlistEntry], str | None]:
+    stmt = keyset(select(WaitlistEntry).where(WaitlistEntry.user_id == user_id), WaitlistEntry, cursor, limit)
+    result = await db.execute(stmt)
+    return page(result.scalars().all(), limit)
+
+async def delete_entry(db: AsyncSession, entry_id: int, user_id: int | None = None) -> bool:
+    stmt = delete(WaitlistEntry).where(WaitlistEntry.id == entry_id, WaitlistEntry.fulfilled_at.is_(None))
+    if user_id is not None:
+        stmt = stmt.where(WaitlistEntry.user_id == user_id)
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount > 0
+
+async def close_entry(db: AsyncSession, entry_id: int) -> None:
+    """
+    Take an entry that can never be booked out of the queue, with no booking.
+    """
+    await db.rollback()
+    await db.execute(
+        update(WaitlistEntry)
+        .where(WaitlistEntry.id == entry_id, WaitlistEntry.fulfilled_at.is_(None))
+        .values(fulfilled_at=datetime.utcnow())
+    )
+    await db.commit()
+
+def waiting_stmt(zone_id: int, start: datetime, end: datetime, limit: int):
+    """
+    Waiting entries of a zone that fit inside [start, end), oldest first.
+    """
+    return (
+        select(
+            WaitlistEntry.id,
+            WaitlistEntry.user_id,
+            WaitlistEntry.start_datetime,
+            WaitlistEntry.end_datetime,
+            WaitlistEntry.amount,
+            User.phone_number,
+        )
+        .join(User, User.id == WaitlistEntry.user_id)
+        .where(
+            WaitlistEntry.zone_id == zone_id,
+            WaitlistEntry.fulfilled_at.is_(None),
+            WaitlistEntry.start_datetime >= start,
+            WaitlistEntry.start_datetime < end,
+            WaitlistEntry.end_datetime <= end,
+        )
+        .order_by(WaitlistEntry.created_at, WaitlistEntry.id)
+        .limit(limit)
+    )
+
+async def fill_from_waitlist(
+    db: AsyncSession,
+    place_id: int,
+    start: datetime,
+    end: datetime,
+    raise_errors: bool = False
+) -> list[int]:
+    """
+    Offer a freed [start, end) on `place_id` to the waiting entries of its
+    zone in the order they were made. Each match gets a PENDING booking
+    (keyed by the entry, so a repeated match cannot book twice) and an SMS.
+    Entries that no longer fit or cannot pay are left waiting; an entry that
+    fails for any other reason is closed without a booking so it cannot
+    block the ones behind it. Returns the ids of the new bookings.
+
+    Database and connection failures are logged and the fill is retried by
+    a background job (which passes `raise_errors` so the runner sees it);
+    the cancellation that freed the seat is already committed and must not
+    fail.
+    """
+    started = time.perf_counter()
+    booked = []
+    taken: list[tuple[datetime, datetime]] = []
+    try:
+        zone_id = (await location_cache.snapshot(db)).zone_of(place_id)
+        if zone_id is None:
+            return []
+        rows = (await db.execute(waiting_stmt(zone_id, start, end, settings.WAITLIST_MATCH_LIMIT))).all()
+        waitlist_stats.last_lookup_ms = round((time.perf_counter() - started) * 1000, 3)
+        for entry_id, user_id, entry_start, entry_end, amount, phone_number in rows:
+            # Already booked by an earlier entry in this run: skip the round trips.
+            if any(entry_start < t_end and entry_end > t_start for t_start, t_end in taken):
+                continue
+            try:
+                if amount <= 0:
+                    # Left from before WaitlistCreate checked it; a debit of it would pay the user.
+                    raise ValueError(f"amount {amount} is not positive")
+                data = BookingCreate(place_id=place_id, start_datetime=entry_start, end_datetime=entry_end, amount=amount)
+                booking = await create_booking(db, user_id, data, f"waitlist:{entry_id}")
+            except Exception as e:
+                if is_infrastructure_error(e):
+                    raise
+                if isinstance(e, HTTPException) and e.status_code in SKIPPED_STATUSES:
+                    continue
+                await close_entry(db, entry_id)
+                waitlist_stats.closed += 1
+                print(f"[waitlist] Closed entry {entry_id}, it cannot be booked: {e!r}")
+                continue
+            booking_id = booking.id
+            await db.execute(
+                update(WaitlistEntry)
+                .where(WaitlistEntry.id == entry_id, WaitlistEntry.fulfilled_at.is_(None))
+                .values(booking_id=booking_id, fulfilled_at=datetime.utcnow())
+            )
+            await db.commit()
+            booked.append(booking_id)
+            taken.append((entry_start, entry_end))
+            await notify_waitlist.delay(phone_number, booking_id)
+    except Exception as e:
+        await db.rollback()
+        waitlist_stats.failures += 1
+        if raise_errors:
+            raise
+        print(f"[waitlist] Matching place {place_id} failed, retrying in the background: {e!r}")
+        try:
+            await retry_fill.delay(place_id, start.isoformat(), end.isoformat())
+        except Exception as e:
+            print(f"[waitlist] Could not schedule the retry for place {place_id}: {e!r}")
+    finally:
+        waitlist_stats.matches += 1
+        waitlist_stats.booked += len(booked)
+        waitlist_stats.last_match_ms = round((time.perf_counter() - started) * 1000, 3)
+    return booked
@@ -1,16 +1,137 @@
+from fastapi import Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker, async_scoped_session
-from core.config import settings
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from core.config import settings, Settings
 import asyncio
-from typing import AsyncGenerator
+import hashlib
+import itertools
+import time
+from typing import AsyncGenerator, Callable, Sequence
+
+PIN_COOKIE = "db_primary_until"
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long checkouts take (waiting for a free
+    connection plus connecting) and how many of them timed out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+def engine_options(config: Settings, database_url: str, connect_timeout: float | None = None) -> dict:
+    """
+    `create_async_engine` keyword arguments for the configured profile.
+    Production turns off SQL echo and splits DB_MAX_CONNECTIONS between the
+    WEB_CONCURRENCY workers with no overflow; explicit DB_* values win.
+    `connect_timeout` bounds how long opening a connection may take.
+    """
+    production = config.ENV == "production"
+    options = {"echo": config.DB_ECHO if config.DB_ECHO is not None else not production}
+    if database_url.startswith("sqlite"):
+        return options
+
+    per_worker = max(2, config.DB_MAX_CONNECTIONS // max(1, config.WEB_CONCURRENCY))
+    pool_size, max_overflow = (per_worker, 0) if production else (5, 10)
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=config.DB_POOL_SIZE if config.DB_POOL_SIZE is not None else pool_size,
+        max_overflow=config.DB_MAX_OVERFLOW if config.DB_MAX_OVERFLOW is not None else max_overflow,
+        pool_pre_ping=config.DB_POOL_PRE_PING if config.DB_POOL_PRE_PING is not None else production,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+    )
+    if "+asyncpg" in database_url:
+        options["connect_args"] = {
+            # SQLAlchemy's prepared statement cache and asyncpg's own one.
+            "prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": config.DB_STATEMENT_CACHE_SIZE,
+        }
+        if connect_timeout is not None:
+            options["connect_args"]["timeout"] = connect_timeout
+    elif connect_timeout is not None and "+psycopg" in database_url:
+        options["connect_args"] = {"connect_timeout": max(1, round(connect_timeout))}
+    return options
+
 
 class DatabaseHelper:
-    def __init__(self, database_url: str):
-        self.engine = create_async_engine(database_url, echo=True)
+    def __init__(
+        self,
+        database_url: str,
+        replica_urls: Sequence[str] = (),
+        replica_retry_seconds: float = 30,
+        pin_seconds: float = 5,
+        replica_options: Callable[[str], dict] | None = None,
+        **engine_kwargs,
+    ):
+        """
+        `replica_options(url)` builds the engine options of each replica;
+        without it replicas share the primary's `engine_kwargs`.
+        """
+        self.engine = create_async_engine(database_url, **engine_kwargs)
         self.session_factory = async_sessionmaker(
             bind=self.engine,
             expire_on_commit=False,
             class_=AsyncSession
         )
+        self.replicas = [
+            async_sessionmaker(
+                bind=create_async_engine(url, **(replica_options(url) if replica_options else engine_kwargs)),
+                expire_on_commit=False,
+                class_=AsyncSession
+            )
+            for url in replica_urls
+        ]
+        self.replica_retry_seconds = replica_retry_seconds
+        self.pin_seconds = pin_seconds
+        self._next_replica = itertools.count()
+        self._replica_down_until: dict[int, float] = {}
+        # Clients that wrote recently, by credential hash (see `pin_primary`).
+        self._pinned: dict[str, float] = {}
+
+    def pool_stats(self) -> dict:
+        pool = self.engine.pool
+        stats = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+            )
+        if isinstance(pool, TimedQueuePool):
+            stats.update(
+                checkouts=pool.checkouts,
+                timeouts=pool.timeouts,
+                wait_seconds_total=round(pool.wait_total, 6),
+                wait_seconds_max=round(pool.wait_max, 6),
+            )
+        return stats
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+        for factory in self.replicas:
+            await factory.kw["bind"].dispose()
 
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
         try:
@@ -36,4 +157,81 @@ class DatabaseHelper:
         yield session
         await session.close()
 
-db_helper = DatabaseHelper(settings.DATABASE_URL)
+    @staticmethod
+    def _client_key(request: Request) -> str | None:
+        credentials = request.headers.get("authorization")
+        if not credentials:
+            return None
+        return hashlib.sha256(credentials.encode()).hexdigest()
+
+    def is_pinned(self, request: Request) -> bool:
+        now = time.time()
+        try:
+            if float(request.cookies.get(PIN_COOKIE, 0)) > now:
+                return True
+        except ValueError:
+            pass
+        key = self._client_key(request)
+        return key is not None and self._pinned.get(key, 0) > now
+
+    def pin_primary(self, request: Request, response: Response) -> None:
+        """
+        Route this client's reads to the primary for `pin_seconds` after a
+        write, so it sees its own changes despite replica lag. The cookie
+        covers other workers, the in-process map covers cookie-less clients.
+        """
+        if not self.replicas:
+            return
+        until = time.time() + self.pin_seconds
+        response.set_cookie(PIN_COOKIE, f"{until:.3f}", max_age=int(self.pin_seconds) + 1, httponly=True)
+        key = self._client_key(request)
+        if key is not None:
+            self._pinned[key] = until
+            if len(self._pinned) > 10000:
+                now = time.time()
+                self._pinned = {k: v for k, v in self._pinned.items() if v > now}
+
+    async def _replica_session(self) -> AsyncSession | None:
+        """
+        Session on the next healthy replica, or None if all are down.
+        A replica that fails to connect is skipped for `replica_retry_seconds`.
+        """
+        for _ in range(len(self.replicas)):
+            index = next(self._next_replica) % len(self.replicas)
+            if self._replica_down_until.get(index, 0) > time.monotonic():
+                continue
+            session = self.replicas[index]()
+            try:
+                await session.connection()
+                return session
+            except (OSError, DBAPIError, asyncio.TimeoutError) as e:
+                print(f"[db] Replica {index} unavailable, using the next one: {e}")
+                self._replica_down_until[index] = time.monotonic() + self.replica_retry_seconds
+                await session.close()
+        return None
+
+    async def read_session_dependency(self, request: Request):
+        """
+        Session for read-only endpoints: round-robin over the replicas,
+        falling back to the primary when none is configured or reachable,
+        or when the client has just written.
+        """
+        session = None
+        if self.replicas and not self.is_pinned(request):
+            session = await self._replica_session()
+        if session is None:
+            session = self.get_scoped_session()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+db_helper = DatabaseHelper(
+    settings.DATABASE_URL,
+    replica_urls=settings.DATABASE_REPLICA_URLS,
+    replica_retry_seconds=settings.REPLICA_RETRY_SECONDS,
+    pin_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    # Per URL: a replica may use another driver; fail over fast when it is unreachable.
+    replica_options=lambda url: engine_options(settings, url, connect_timeout=settings.REPLICA_CONNECT_TIMEOUT_SECONDS),
+    **engine_options(settings, settings.DATABASE_URL),
+)
@@ -8,7 +8,10 @@ __all__ = (
     'Booking',
     'BalanceTransaction',
     'ICafeAccount',
-    'ICafeBooking'
+    'ICafeBooking',
+    'IdempotencyKey',
+    'Job',
+    'WaitlistEntry'
 )
 
 from .base import Base
@@ -21,5 +24,8 @@ from .models import (
     Booking,
     BalanceTransaction,
     ICafeAccount,
-    ICafeBooking
+    ICafeBooking,
+    IdempotencyKey,
+    Job,
+    WaitlistEntry
 )
\ No newline at end of file
@@ -8,10 +8,15 @@ from sqlalchemy import (
     Boolean,
     ForeignKey,
     Numeric,
+    LargeBinary,
+    JSON,
     Enum as SAEnum,
-    UniqueConstraint,
+    Index,
     func,
+    literal_column,
+    text,
 )
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship, declarative_base
 from core.database.models.base import Base
 
@@ -46,6 +51,12 @@ class User(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # cleanup of unverified accounts walks this in (created_at, id) order
+        Index("ix_users_is_verified_created_at_id", "is_verified", "created_at", "id"),
+    )
+
 
 class OTP(Base):
     __tablename__ = "otps"
@@ -55,6 +66,10 @@ class OTP(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     expires_at = Column(DateTime, default=lambda: now_plus(5))  # 5 minutes validity
 
+    __table_args__ = (
+        Index("ix_otps_user_id_code_expires_at", "user_id", "code", "expires_at"),
+    )
+
     user = relationship("User", back_populates="otps")
 
 
@@ -73,6 +88,10 @@ class Zone(Base):
     branch_id = Column(Integer, ForeignKey("branches.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(100), nullable=False)
 
+    __table_args__ = (
+        Index("ix_zones_branch_id_id", "branch_id", "id"),
+    )
+
     branch = relationship("Branch", back_populates="zones")
     places = relationship("Place", back_populates="zone")
 
@@ -83,6 +102,10 @@ class Place(Base):
     zone_id = Column(Integer, ForeignKey("zones.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(50), nullable=False)
 
+    __table_args__ = (
+        Index("ix_places_zone_id_id", "zone_id", "id"),
+    )
+
     zone = relationship("Zone", back_populates="places")
     bookings = relationship("Booking", back_populates="place")
 
@@ -91,6 +114,7 @@ class BookingStatus(str, Enum):
     PENDING = "pending"
     CONFIRMED = "confirmed"
     CANCELLED = "cancelled"
+    COMPLETED = "completed"
 
 
 class Booking(Base):
@@ -107,9 +131,42 @@ class Booking(Base):
     # created_at = Column(DateTime, default=func.now())
     # updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
-    # business rule: ensure no overlapping bookings at application level
+    # business rule: no overlapping active bookings per place. PostgreSQL
+    # enforces it with an exclusion constraint; other dialects (SQLite in
+    # tests) fall back to the application-level check in crud/booking.py.
     __table_args__ = (
-        UniqueConstraint('place_id', 'start_datetime', 'end_datetime', name='uix_place_time'),
+        # cancelled bookings must not block the same slot from being booked again
+        Index(
+            "uix_place_time",
+            "place_id", "start_datetime", "end_datetime",
+            unique=True,
+            postgresql_where=text("status <> 'CANCELLED'"),
+            sqlite_where=text("status <> 'CANCELLED'"),
+        ),
+        ExcludeConstraint(
+            (place_id, "="),
+            (func.tstzrange(start_datetime, end_datetime, literal_column("'[)'")), "&&"),
+            name="excl_bookings_place_time",
+            using="gist",
+            where=text("status <> 'CANCELLED'"),
+        ).ddl_if(dialect="postgresql"),
+        # overlap / availability lookups only ever look at active bookings
+        Index(
+            "ix_bookings_active_place_time",
+            "place_id", "start_datetime", "end_datetime",
+            postgresql_where=text("status <> 'CANCELLED'"),
+            sqlite_where=text("status <> 'CANCELLED'"),
+        ),
+        # expiry sweeper: oldest unconfirmed bookings first
+        Index(
+            "ix_bookings_pending_created_at_id",
+            "created_at", "id",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+        # keyset pagination on (created_at, id)
+        Index("ix_bookings_created_at_id", "created_at", "id"),
+        Index("ix_bookings_user_id_created_at_id", "user_id", "created_at", "id"),
     )
 
     user = relationship("User", back_populates="bookings")
@@ -137,6 +194,10 @@ class BalanceTransaction(Base):
     created_at = Column(DateTime, default=datetime.now, server_default=func.now())
     idempotency_key = Column(String(100), nullable=False, unique=True)
 
+    __table_args__ = (
+        Index("ix_balance_transactions_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
     user = relationship("User", back_populates="balance_transactions")
     booking = relationship("Booking", back_populates="balance_transactions")
 
@@ -160,4 +221,80 @@ class ICafeBooking(Base):
 
     booking = relationship("Booking", back_populates="icafe_booking")
 
-# Note: Cleanup of unverified users older than 48 hours should be implemented via a scheduled Celery task.
+
+class IdempotencyKey(Base):
+    """
+    Stored outcome of an idempotent request. `status_code` is NULL while the
+    first request is still running; past `locked_until` such a claim is
+    considered abandoned.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), nullable=False, unique=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_headers = Column(JSON, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    locked_until = Column(DateTime, nullable=True)
+
+
+class Job(Base):
+    """
+    Persistent queue of the background job runner (core/tasks/runner.py).
+    A job is claimed by setting `locked_until`; rows are deleted on success
+    (periodic runs are kept with `done_until` until their slot has passed)
+    and kept with `failed_at` once retries are exhausted.
+    """
+    __tablename__ = "jobs"
+
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True)
+    failed_at = Column(DateTime, nullable=True)
+    done_until = Column(DateTime, nullable=True)
+    last_error = Column(String(500), nullable=True)
+    # Periodic runs use "<name>:<slot>" so only one worker process enqueues a slot.
+    unique_key = Column(String(200), nullable=True, unique=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_jobs_pending_run_at", "run_at",
+            postgresql_where=text("failed_at IS NULL"),
+            sqlite_where=text("failed_at IS NULL"),
+        ),
+    )
+
+
+class WaitlistEntry(Base):
+    """
+    A user waiting for any seat of a zone for [start_datetime, end_datetime).
+    Filled entries keep the booking they got; entries that could not be
+    booked at all are closed without one.
+    """
+    __tablename__ = "waitlist_entries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    zone_id = Column(Integer, ForeignKey("zones.id", ondelete="CASCADE"), nullable=False)
+    start_datetime = Column(DateTime(timezone=True), nullable=False)
+    end_datetime = Column(DateTime(timezone=True), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True)
+    fulfilled_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Waiting entries of a zone in FIFO order; the interval columns let
+        # the fill filter them inside the index and stop after LIMIT matches.
+        Index(
+            "ix_waitlist_entries_waiting_zone_created",
+            "zone_id", "created_at", "id", "start_datetime", "end_datetime",
+            postgresql_where=text("fulfilled_at IS NULL"),
+            sqlite_where=text("fulfilled_at IS NULL"),
+        ),
+        Index("ix_waitlist_entries_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
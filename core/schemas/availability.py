@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class SeatAvailability(BaseModel):
+    place_id: int
+    zone_id: int
+    name: str
+    busy: str = Field(..., example="0011110000", description="One character per slot, '1' = busy")
+
+
+class AvailabilityGrid(BaseModel):
+    zone_id: int | None = None
+    branch_id: int | None = None
+    start: datetime = Field(..., serialization_alias="from")
+    end: datetime = Field(..., serialization_alias="to")
+    slot_minutes: int
+    slot_count: int
+    seats: list[SeatAvailability]
+
+
+class FreeSlot(BaseModel):
+    place_id: int
+    zone_id: int
+    name: str
+    start: datetime
+    end: datetime
+
+
+class NextSlots(BaseModel):
+    zone_id: int | None = None
+    branch_id: int | None = None
+    duration_minutes: int
+    slots: list[FreeSlot]
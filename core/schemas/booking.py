@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field, ConfigDict
-from datetime import datetime
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from datetime import datetime, timedelta
+from typing import Literal
 from enum import Enum
 from decimal import Decimal
 from core.schemas.location import PlaceRead
@@ -8,6 +9,7 @@ class BookingStatus(str, Enum):
     pending = "pending"
     confirmed = "confirmed"
     cancelled = "cancelled"
+    completed = "completed"
 
 class BookingBase(BaseModel):
     place_id: int = Field(..., ge=1)
@@ -16,7 +18,74 @@ class BookingBase(BaseModel):
     amount: Decimal = Field(..., example="10.00")
 
 class BookingCreate(BookingBase):
-    pass
+
+    @model_validator(mode="after")
+    def check_interval(self):
+        if self.end_datetime <= self.start_datetime:
+            raise ValueError("end_datetime must be after start_datetime")
+        return self
+
+class BookingBatchCreate(BaseModel):
+    items: list[BookingCreate] = Field(..., min_length=1, max_length=20)
+
+    @model_validator(mode="after")
+    def check_no_self_overlap(self):
+        seen: dict[int, list[BookingCreate]] = {}
+        for item in self.items:
+            for other in seen.get(item.place_id, []):
+                if item.start_datetime < other.end_datetime and item.end_datetime > other.start_datetime:
+                    raise ValueError(f"items overlap on place {item.place_id}")
+            seen.setdefault(item.place_id, []).append(item)
+        return self
+
+MAX_OCCURRENCES = 104
+
+class Recurrence(BaseModel):
+    freq: Literal["daily", "weekly"]
+    interval: int = Field(1, ge=1, le=52)
+    count: int | None = Field(None, ge=1, le=MAX_OCCURRENCES)
+    until: datetime | None = None
+
+    @model_validator(mode="after")
+    def check_end(self):
+        if (self.count is None) == (self.until is None):
+            raise ValueError("recurrence needs exactly one of count or until")
+        return self
+
+    @property
+    def step(self) -> timedelta:
+        return timedelta(days=self.interval * (7 if self.freq == "weekly" else 1))
+
+class BookingRecurringCreate(BookingCreate):
+    recurrence: Recurrence
+
+    def occurrences(self) -> list[tuple[datetime, datetime]]:
+        """
+        Expand the rule into (start, end) pairs, first one included.
+        """
+        rule = self.recurrence
+        step = rule.step
+        length = self.end_datetime - self.start_datetime
+        result, start = [], self.start_datetime
+        while len(result) < (rule.count or MAX_OCCURRENCES + 1) and (rule.until is None or start <= rule.until):
+            result.append((start, start + length))
+            start += step
+        if not result:
+            raise ValueError("recurrence.until is before start_datetime")
+        if len(result) > MAX_OCCURRENCES:
+            raise ValueError(f"recurrence expands to more than {MAX_OCCURRENCES} occurrences")
+        return result
+
+    @model_validator(mode="after")
+    def check_occurrences(self):
+        until = self.recurrence.until
+        if until is not None and (until.tzinfo is None) != (self.start_datetime.tzinfo is None):
+            raise ValueError("recurrence.until and start_datetime must both have a timezone or both lack one")
+        # Longer occurrences would overlap each other, which match_conflicts does not expect.
+        if self.end_datetime - self.start_datetime > self.recurrence.step:
+            raise ValueError("a booking cannot be longer than its recurrence interval")
+        self.occurrences()
+        return self
 
 class BookingRead(BookingBase):
     id: int
@@ -32,4 +101,26 @@ class BookingUpdate(BaseModel):
     status: BookingStatus | None = None
     start_datetime: datetime | None = None
     end_datetime: datetime | None = None
-    amount: Decimal | None = None
\ No newline at end of file
+    amount: Decimal | None = None
+
+class BookingIndexDrift(BaseModel):
+    place_id: int
+    missing: list[int]
+    stale: list[int]
+    moved: list[int]
+
+    model_config = ConfigDict(from_attributes=True)
+
+class BookingIndexReport(BaseModel):
+    places: int
+    bookings: int | None = None
+    drift: list[BookingIndexDrift] = []
+
+class OccurrenceConflict(BaseModel):
+    start_datetime: datetime
+    end_datetime: datetime
+    booking_id: int
+
+class RecurringBookingResult(BaseModel):
+    bookings: list[BookingRead]
+    conflicts: list[OccurrenceConflict]
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from datetime import datetime
+from decimal import Decimal
+
+
+class WaitlistCreate(BaseModel):
+    zone_id: int = Field(..., ge=1)
+    start_datetime: datetime = Field(...)
+    end_datetime: datetime = Field(...)
+    amount: Decimal = Field(..., gt=0, max_digits=10, decimal_places=2, example="10.00")
+
+    @model_validator(mode="after")
+    def check_interval(self):
+        if self.end_datetime <= self.start_datetime:
+            raise ValueError("end_datetime must be after start_datetime")
+        return self
+
+
+class WaitlistRead(WaitlistCreate):
+    amount: Decimal  # rows written before the check above must still list
+    id: int
+    user_id: int
+    created_at: datetime
+    booking_id: int | None = None
+    fulfilled_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
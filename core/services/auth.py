@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from jose import jwt, JWTError
@@ -23,6 +25,66 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+_hash_executor: Executor | None = None
+_hash_pending = 0
+
+
+def _get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="bcrypt",
+            )
+    return _hash_executor
+
+
+async def _run_hashing(func, *args):
+    """
+    Run a bcrypt call on the bounded hashing pool. At most
+    PASSWORD_HASH_WORKERS calls run and PASSWORD_HASH_QUEUE_SIZE wait;
+    anything beyond that is rejected with 503 so a login storm cannot
+    monopolize the worker.
+    """
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    `get_password_hash` off the event loop.
+    """
+    return await _run_hashing(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    `verify_password` off the event loop.
+    """
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+def shutdown_hashing() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
 def create_access_token(
     sub: str,
     expires_delta: Optional[timedelta] = None
@@ -0,0 +1,143 @@
+import heapq
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from core.services.booking_index import as_utc
+
+MAX_SLOTS = 2880
+
+_SLOT_RE = re.compile(r"^\s*(\d+)\s*([mh]?)\s*$", re.IGNORECASE)
+
+
+def parse_slot(value: str) -> timedelta:
+    """
+    Parse a slot width such as "15m", "1h" or "30" (minutes).
+    """
+    match = _SLOT_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid slot width: {value!r}")
+    amount, unit = int(match.group(1)), match.group(2).lower()
+    slot = timedelta(hours=amount) if unit == "h" else timedelta(minutes=amount)
+    if slot <= timedelta(0):
+        raise ValueError("Slot width must be positive")
+    return slot
+
+
+@dataclass
+class SlotGrid:
+    """
+    Fixed-width time slots over [start, end); each seat's occupancy is an int
+    bitset where bit i is set when slot i is busy.
+    """
+    start: datetime
+    end: datetime
+    slot: timedelta
+
+    def __post_init__(self):
+        self.start, self.end = as_utc(self.start), as_utc(self.end)
+        if self.end <= self.start:
+            raise ValueError("'to' must be after 'from'")
+        if self.slot_count > MAX_SLOTS:
+            raise ValueError(f"Requested range spans more than {MAX_SLOTS} slots")
+
+    @property
+    def slot_count(self) -> int:
+        return -(-(self.end - self.start) // self.slot)
+
+    def mask(self, start: datetime, end: datetime) -> int:
+        """
+        Bitset of the slots touched by [start, end), clipped to the grid.
+        """
+        start, end = max(as_utc(start), self.start), min(as_utc(end), self.end)
+        if end <= start:
+            return 0
+        first = (start - self.start) // self.slot
+        last = -(-(end - self.start) // self.slot)
+        return ((1 << (last - first)) - 1) << first
+
+    def render(self, bits: int) -> str:
+        """
+        Render a bitset as a '0'/'1' string, one character per slot.
+        """
+        return format(bits, "b").zfill(self.slot_count)[::-1]
+
+
+def build_bitmaps(
+    grid: SlotGrid,
+    rows,
+) -> dict[int, int]:
+    """
+    Fold (place_id, start, end) rows into one bitset per place. Places without
+    bookings come through the outer join with `start` set to None.
+    """
+    bitmaps: dict[int, int] = {}
+    for place_id, start, end in rows:
+        bits = bitmaps.get(place_id, 0)
+        if start is not None:
+            bits |= grid.mask(start, end)
+        bitmaps[place_id] = bits
+    return bitmaps
+
+
+def next_free_windows(
+    rows,
+    after: datetime,
+    until: datetime,
+    duration: timedelta,
+    limit: int,
+    near: int | None = None,
+) -> list[tuple[int, datetime]]:
+    """
+    Earliest `limit` (place_id, start) pairs where a place stays free for
+    `duration` inside [after, until). `rows` are (place_id, start, end) as
+    for `build_bitmaps`. One sweep over the bookings sorted by start tracks
+    when each place frees up; every gap long enough is a candidate. Equal
+    starts go to the places closest to `near` in seat order.
+    """
+    after, until = as_utc(after), as_utc(until)
+    free_from: dict[int, datetime] = {}
+    events = []
+    for place_id, start, end in rows:
+        free_from.setdefault(place_id, after)
+        if start is not None:
+            events.append((as_utc(start), as_utc(end), place_id))
+    events.sort()
+
+    candidates = []
+    for start, end, place_id in events:
+        if start - free_from[place_id] >= duration:
+            candidates.append((free_from[place_id], place_id))
+        free_from[place_id] = max(free_from[place_id], end)
+    for place_id, start in free_from.items():
+        if start + duration <= until:
+            candidates.append((start, place_id))
+
+    position = {place_id: i for i, place_id in enumerate(sorted(free_from))}
+    anchor = position.get(near)
+
+    def rank(candidate):
+        start, place_id = candidate
+        distance = abs(position[place_id] - anchor) if anchor is not None else 0
+        return start, distance, place_id
+
+    return [(place_id, start) for start, place_id in heapq.nsmallest(limit, candidates, key=rank)]
+
+
+def match_conflicts(occurrences, busy) -> dict[int, int]:
+    """
+    Map the index of every (start, end) occurrence that overlaps one of the
+    `busy` (start, end, booking_id) intervals to that booking's id. Both
+    lists are sorted by start and the busy ones do not overlap each other,
+    so one merge pass is enough.
+    """
+    busy = [(as_utc(start), as_utc(end), booking_id) for start, end, booking_id in busy]
+    conflicts: dict[int, int] = {}
+    j = 0
+    for i, (start, end) in enumerate(occurrences):
+        start, end = as_utc(start), as_utc(end)
+        while j < len(busy) and busy[j][1] <= start:
+            j += 1
+        if j < len(busy) and busy[j][0] < end:
+            conflicts[i] = busy[j][2]
+    return conflicts
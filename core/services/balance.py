@@ -0,0 +1,193 @@
+from decimal import Decimal
+from sqlalchemy import bindparam, func, insert, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from core.database.models.models import User, BalanceTransaction, TransactionType
+
+
+class BalanceError(Exception):
+    pass
+
+
+class UserNotFound(BalanceError):
+    pass
+
+
+class InsufficientFunds(BalanceError):
+    pass
+
+
+def _sync_loaded_user(db: AsyncSession, user_id: int, balance: Decimal) -> None:
+    """
+    Keep an already loaded User in the session in step with a Core UPDATE.
+    """
+    user = db.sync_session.identity_map.get(db.identity_key(User, user_id))
+    if user is not None:
+        set_committed_value(user, "balance", balance)
+
+
+async def _record(
+    db: AsyncSession,
+    user_id: int,
+    amount: Decimal,
+    type: TransactionType,
+    idempotency_key: str,
+    booking_id: int | None,
+) -> None:
+    await db.execute(
+        insert(BalanceTransaction).values(
+            user_id=user_id,
+            booking_id=booking_id,
+            type=type,
+            amount=amount,
+            idempotency_key=idempotency_key,
+        )
+    )
+
+
+async def _conditional_debit(db: AsyncSession, user_id: int, amount: Decimal) -> Decimal:
+    users = User.__table__
+    if db.bind.dialect.name == "postgresql":
+        # One statement: the CTE tells "user missing" (no target row) apart
+        # from "insufficient funds" (target row, nothing debited).
+        target = select(users.c.balance).where(users.c.id == user_id).cte("target")
+        debited = (
+            update(users)
+            .where(users.c.id == user_id, users.c.balance >= amount)
+            .values(balance=users.c.balance - amount)
+            .returning(users.c.balance)
+            .cte("debited")
+        )
+        row = (await db.execute(
+            select(target.c.balance.label("current"), debited.c.balance.label("remaining"))
+            .select_from(target.outerjoin(debited, true()))
+        )).first()
+        if row is None:
+            raise UserNotFound(user_id)
+        if row.remaining is None:
+            raise InsufficientFunds(user_id)
+        _sync_loaded_user(db, user_id, row.remaining)
+        return row.remaining
+
+    # Writers are serialized on SQLite; a miss is told apart afterwards.
+    remaining = (await db.execute(
+        update(User)
+        .where(User.id == user_id, User.balance >= amount)
+        .values(balance=User.balance - amount)
+        .returning(User.balance)
+    )).scalar_one_or_none()
+    if remaining is None:
+        if (await db.execute(select(User.id).where(User.id == user_id))).first() is None:
+            raise UserNotFound(user_id)
+        raise InsufficientFunds(user_id)
+    return remaining
+
+
+async def debit(
+    db: AsyncSession,
+    user_id: int,
+    amount: Decimal,
+    idempotency_key: str,
+    type: TransactionType = TransactionType.FREEZE,
+    booking_id: int | None = None,
+) -> Decimal:
+    """
+    Atomically take `amount` from the user's balance if it covers it and
+    record the ledger entry in the same transaction. Returns the new
+    balance; raises UserNotFound or InsufficientFunds. The caller commits.
+    """
+    remaining = await _conditional_debit(db, user_id, amount)
+    await _record(db, user_id, amount, type, idempotency_key, booking_id)
+    return remaining
+
+
+async def debit_many(
+    db: AsyncSession,
+    user_id: int,
+    entries: list[dict],
+    type: TransactionType = TransactionType.FREEZE,
+) -> Decimal:
+    """
+    `debit` for several ledger entries of one user (dicts with amount,
+    idempotency_key and booking_id): the total is taken with a single
+    conditional UPDATE and the entries are written with one executemany
+    INSERT. Returns the new balance; raises like `debit`. The caller commits.
+    """
+    total = sum((entry["amount"] for entry in entries), Decimal(0))
+    remaining = await _conditional_debit(db, user_id, total)
+    await db.execute(
+        insert(BalanceTransaction),
+        [{**entry, "user_id": user_id, "type": type} for entry in entries],
+    )
+    return remaining
+
+
+async def credit(
+    db: AsyncSession,
+    user_id: int,
+    amount: Decimal,
+    idempotency_key: str,
+    type: TransactionType = TransactionType.TOPUP,
+    booking_id: int | None = None,
+) -> User:
+    """
+    Atomically add `amount` to the user's balance and record the ledger
+    entry. Returns the updated User row; raises UserNotFound. The caller
+    commits.
+    """
+    user = (await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(balance=func.coalesce(User.balance, 0) + amount)
+        .returning(User)
+    )).scalar_one_or_none()
+    if user is None:
+        raise UserNotFound(user_id)
+    await _record(db, user_id, amount, type, idempotency_key, booking_id)
+    return user
+
+
+async def capture(
+    db: AsyncSession,
+    user_id: int,
+    amount: Decimal,
+    idempotency_key: str,
+    booking_id: int | None = None,
+) -> None:
+    """
+    Record that an amount frozen earlier has been paid. The balance already
+    went down with the freeze, so only the ledger entry is written. The
+    caller commits.
+    """
+    await _record(db, user_id, amount, TransactionType.PAYMENT, idempotency_key, booking_id)
+
+
+async def credit_many(
+    db: AsyncSession,
+    entries: list[dict],
+    type: TransactionType = TransactionType.RELEASE,
+) -> None:
+    """
+    Set-based `credit` for many ledger entries (dicts with user_id, amount,
+    idempotency_key and booking_id): one executemany INSERT for the ledger
+    and one executemany UPDATE with a single row per user. The caller
+    commits.
+    """
+    if not entries:
+        return
+    await db.execute(insert(BalanceTransaction), [{**entry, "type": type} for entry in entries])
+    totals: dict[int, Decimal] = {}
+    for entry in entries:
+        totals[entry["user_id"]] = totals.get(entry["user_id"], 0) + entry["amount"]
+    users = User.__table__
+    await db.execute(
+        update(users)
+        .where(users.c.id == bindparam("target_id"))
+        .values(balance=func.coalesce(users.c.balance, 0) + bindparam("delta")),
+        [{"target_id": user_id, "delta": total} for user_id, total in totals.items()],
+    )
+    for user_id in totals:
+        user = db.sync_session.identity_map.get(db.identity_key(User, user_id))
+        if user is not None:
+            db.expire(user, ["balance"])
@@ -0,0 +1,281 @@
+import asyncio
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database.models.models import Booking, BookingStatus
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Normalize a datetime to aware UTC (SQLite hands back naive values).
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class PlaceIntervals:
+    """
+    Sorted half-open [start, end) intervals of the active bookings of one place.
+
+    `_max_ends[i]` holds the largest end among the first i+1 intervals, so a
+    lookup walks back only while an earlier booking can still reach `start`.
+    Active bookings of a place do not overlap, which keeps that walk to the
+    matches plus one step, after an O(log n) bisect. A single booking
+    spanning many later ones would make it O(n). `add` and `remove` shift the
+    lists, so they are O(n).
+    """
+
+    def __init__(self) -> None:
+        self._starts: list[datetime] = []
+        self._ends: list[datetime] = []
+        self._ids: list[int] = []
+        self._max_ends: list[datetime] = []
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, booking_id: int) -> bool:
+        return booking_id in self._ids
+
+    def items(self) -> list[tuple[int, datetime, datetime]]:
+        return list(zip(self._ids, self._starts, self._ends))
+
+    def conflicts(self, start: datetime, end: datetime) -> list[int]:
+        """
+        Return ids of the bookings overlapping [start, end).
+        """
+        start, end = as_utc(start), as_utc(end)
+        found = []
+        i = bisect_left(self._starts, end) - 1
+        while i >= 0 and self._max_ends[i] > start:
+            if self._ends[i] > start:
+                found.append(self._ids[i])
+            i -= 1
+        return found
+
+    def is_free(self, start: datetime, end: datetime, exclude_id: int | None = None) -> bool:
+        return all(b_id == exclude_id for b_id in self.conflicts(start, end))
+
+    def add(self, booking_id: int, start: datetime, end: datetime) -> None:
+        if booking_id in self._ids:
+            self.remove(booking_id)
+        start, end = as_utc(start), as_utc(end)
+        i = bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._ids.insert(i, booking_id)
+        self._max_ends.insert(i, max(self._max_ends[i - 1], end) if i else end)
+        self._propagate(i + 1)
+
+    def remove(self, booking_id: int) -> bool:
+        try:
+            i = self._ids.index(booking_id)
+        except ValueError:
+            return False
+        del self._starts[i], self._ends[i], self._ids[i], self._max_ends[i]
+        self._propagate(i)
+        return True
+
+    def _propagate(self, i: int) -> None:
+        while i < len(self._ends):
+            value = max(self._max_ends[i - 1], self._ends[i]) if i else self._ends[i]
+            if value == self._max_ends[i]:
+                break
+            self._max_ends[i] = value
+            i += 1
+
+
+@dataclass
+class IndexDrift:
+    place_id: int
+    missing: list[int] = field(default_factory=list)
+    stale: list[int] = field(default_factory=list)
+    moved: list[int] = field(default_factory=list)
+
+
+class BookingIndex:
+    """
+    Process-local per-place interval index used to reject overlapping
+    bookings without a database round trip. Places are loaded lazily on
+    first use and reloaded once they are older than `max_age` seconds, so
+    writes made by other workers are picked up. It only ever rejects: a free
+    answer is confirmed by the overlap query under the place lock, and the
+    database stays the source of truth. A seat freed by another worker can
+    look taken here for up to `max_age` seconds.
+    """
+
+    def __init__(self, max_age: float | None = None):
+        self.max_age = max_age
+        self._places: dict[int, PlaceIntervals] = {}
+        self._place_of: dict[int, int] = {}
+        self._generations: dict[int, int] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    @staticmethod
+    def _active_stmt(place_id: int | None = None):
+        stmt = select(
+            Booking.id, Booking.place_id, Booking.start_datetime, Booking.end_datetime
+        ).where(Booking.status != BookingStatus.CANCELLED)
+        if place_id is not None:
+            stmt = stmt.where(Booking.place_id == place_id)
+        return stmt
+
+    def _is_fresh(self, intervals: PlaceIntervals) -> bool:
+        return not self.max_age or time.monotonic() - intervals.loaded_at < self.max_age
+
+    def _bump(self, place_id: int) -> None:
+        self._generations[place_id] = self._generations.get(place_id, 0) + 1
+
+    async def get(self, db: AsyncSession, place_id: int) -> PlaceIntervals:
+        intervals = self._places.get(place_id)
+        if intervals is not None and self._is_fresh(intervals):
+            return intervals
+        lock = self._locks.setdefault(place_id, asyncio.Lock())
+        async with lock:
+            intervals = self._places.get(place_id)
+            if intervals is not None and self._is_fresh(intervals):
+                return intervals
+            return await self._load(db, place_id)
+
+    async def _load(self, db: AsyncSession, place_id: int) -> PlaceIntervals:
+        generation = self._generations.get(place_id, 0)
+        rows = (await db.execute(self._active_stmt(place_id))).all()
+        intervals = PlaceIntervals()
+        for booking_id, _, start, end in rows:
+            intervals.add(booking_id, start, end)
+        # A write landed while we were reading; keep the result for this
+        # caller only and let the next access reload.
+        if self._generations.get(place_id, 0) == generation:
+            self._forget_place(place_id)
+            self._places[place_id] = intervals
+            for booking_id, *_ in rows:
+                self._place_of[booking_id] = place_id
+        return intervals
+
+    def _forget_place(self, place_id: int) -> None:
+        old = self._places.pop(place_id, None)
+        if old is not None:
+            for booking_id, *_ in old.items():
+                self._place_of.pop(booking_id, None)
+
+    async def is_free(
+        self,
+        db: AsyncSession,
+        place_id: int,
+        start: datetime,
+        end: datetime,
+        exclude_id: int | None = None,
+    ) -> bool:
+        intervals = await self.get(db, place_id)
+        return intervals.is_free(start, end, exclude_id=exclude_id)
+
+    def is_taken(self, place_id: int, start: datetime, end: datetime) -> bool:
+        """
+        True if the place is loaded, still fresh and has a booking
+        overlapping [start, end). Never queries: a cold place is not taken.
+        """
+        intervals = self._places.get(place_id)
+        if intervals is None or not self._is_fresh(intervals):
+            return False
+        return not intervals.is_free(start, end)
+
+    def add(self, booking_id: int, place_id: int, start: datetime, end: datetime) -> None:
+        previous = self._place_of.get(booking_id)
+        if previous is not None and previous != place_id:
+            self.discard(booking_id)
+        self._bump(place_id)
+        intervals = self._places.get(place_id)
+        if intervals is not None:
+            intervals.add(booking_id, start, end)
+            self._place_of[booking_id] = place_id
+
+    def discard(self, booking_id: int, place_id: int | None = None) -> None:
+        place_id = self._place_of.pop(booking_id, place_id)
+        if place_id is None:
+            return
+        self._bump(place_id)
+        intervals = self._places.get(place_id)
+        if intervals is not None:
+            intervals.remove(booking_id)
+
+    def track(self, booking: Booking) -> None:
+        """
+        Mirror the current state of a committed booking into the index.
+        """
+        if booking.status == BookingStatus.CANCELLED:
+            self.discard(booking.id, booking.place_id)
+        else:
+            self.add(booking.id, booking.place_id, booking.start_datetime, booking.end_datetime)
+
+    def invalidate(self, place_id: int | None = None) -> None:
+        if place_id is None:
+            for pid in list(self._places):
+                self._bump(pid)
+            self._places.clear()
+            self._place_of.clear()
+            return
+        self._bump(place_id)
+        self._forget_place(place_id)
+
+    async def rebuild(self, db: AsyncSession, place_id: int | None = None) -> int:
+        """
+        Drop the cached intervals and reload them from the database.
+        Without `place_id` every place is reloaded with a single query.
+        Returns the number of indexed bookings.
+        """
+        if place_id is not None:
+            self.invalidate(place_id)
+            return len(await self.get(db, place_id))
+
+        self.invalidate()
+        generations = dict(self._generations)
+        rows = (await db.execute(self._active_stmt())).all()
+        places: dict[int, PlaceIntervals] = {}
+        for booking_id, pid, start, end in rows:
+            places.setdefault(pid, PlaceIntervals()).add(booking_id, start, end)
+        for pid, intervals in places.items():
+            if self._generations.get(pid, 0) != generations.get(pid, 0):
+                continue
+            self._places[pid] = intervals
+            for booking_id, *_ in intervals.items():
+                self._place_of[booking_id] = pid
+        return len(rows)
+
+    async def check(self, db: AsyncSession, place_id: int | None = None) -> list[IndexDrift]:
+        """
+        Compare the loaded places with the database and report differences:
+        bookings the index is `missing`, `stale` ones it should have dropped
+        and ones whose interval has `moved`.
+        """
+        place_ids = [place_id] if place_id is not None else list(self._places)
+        drifts = []
+        for pid in place_ids:
+            intervals = self._places.get(pid)
+            if intervals is None:
+                continue
+            rows = (await db.execute(self._active_stmt(pid))).all()
+            actual = {b_id: (as_utc(s), as_utc(e)) for b_id, _, s, e in rows}
+            indexed = {b_id: (s, e) for b_id, s, e in intervals.items()}
+            drift = IndexDrift(place_id=pid)
+            drift.missing = sorted(actual.keys() - indexed.keys())
+            drift.stale = sorted(indexed.keys() - actual.keys())
+            drift.moved = sorted(
+                b_id for b_id in actual.keys() & indexed.keys() if actual[b_id] != indexed[b_id]
+            )
+            if drift.missing or drift.stale or drift.moved:
+                drifts.append(drift)
+        return drifts
+
+    def loaded_places(self) -> int:
+        return len(self._places)
+
+
+booking_index = BookingIndex(max_age=settings.BOOKING_INDEX_MAX_AGE_SECONDS)
@@ -0,0 +1,415 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from jose import JWTError
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from core.config import settings
+from core.database.db_helper import db_helper
+from core.database.models.models import IdempotencyKey
+from core.services.redis import get_redis
+from core.services.user_cache import TTLCache, user_cache
+
+IDEMPOTENT_ROUTES = {
+    ("POST", "/bookings"),
+    ("POST", "/bookings/batch"),
+    ("POST", "/bookings/recurring"),
+    ("POST", "/balance/topup"),
+}
+# Outcomes that say nothing about the operation itself; a retry must run it.
+RETRYABLE_STATUSES = {401, 403, 408, 429}
+# Per-request headers that must not be replayed.
+SKIP_HEADERS = {b"date", b"server", b"set-cookie"}
+
+
+class IdempotencyInProgress(Exception):
+    pass
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "fingerprint": self.fingerprint,
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "body": base64.b64encode(self.body).decode(),
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "StoredResponse":
+        data = json.loads(raw)
+        return cls(
+            fingerprint=data["fingerprint"],
+            status_code=data["status_code"],
+            headers=[tuple(h) for h in data["headers"]],
+            body=base64.b64decode(data["body"]),
+        )
+
+    @classmethod
+    def from_row(cls, row: IdempotencyKey) -> "StoredResponse":
+        return cls(
+            fingerprint=row.fingerprint,
+            status_code=row.status_code,
+            headers=[tuple(h) for h in row.response_headers or []],
+            body=row.response_body or b"",
+        )
+
+
+class MemoryReplayCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, stored: StoredResponse) -> None:
+        self._cache.set(key, stored)
+
+
+class RedisReplayCache:
+    """
+    Replay cache shared by all workers. Redis errors degrade to a miss;
+    the idempotency_keys table stays the source of truth.
+    """
+
+    def __init__(self, ttl: float, prefix: str = "idempotency:"):
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> StoredResponse | None:
+        try:
+            raw = await get_redis().get(self.prefix + key)
+        except Exception as e:
+            print(f"[idempotency] Redis get failed: {e}")
+            return None
+        return StoredResponse.from_json(raw) if raw else None
+
+    async def set(self, key: str, stored: StoredResponse) -> None:
+        try:
+            await get_redis().set(self.prefix + key, stored.to_json(), ex=self.ttl)
+        except Exception as e:
+            print(f"[idempotency] Redis set failed: {e}")
+
+
+@dataclass
+class IdempotencyStats:
+    claims: int = 0
+    replays: int = 0
+    waits: int = 0
+    in_progress: int = 0
+    released: int = 0
+    purged: int = 0
+
+
+@dataclass
+class IdempotencyStore:
+    """
+    Claims keys in the idempotency_keys table and stores the response of
+    the request that claimed them. Duplicates in this worker wait on a
+    future; duplicates in other workers poll the row. A claim whose request
+    did not finish within `lease` (its worker died) can be taken over.
+    """
+    session_factory: object
+    cache: object
+    ttl: timedelta
+    wait_seconds: float
+    lease: timedelta = timedelta(seconds=60)
+    stats: IdempotencyStats = field(default_factory=IdempotencyStats)
+
+    def __post_init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._purger: asyncio.Task | None = None
+
+    async def claim(self, key: str, fingerprint: str) -> StoredResponse | None:
+        """
+        None means the caller owns the key and must `complete` or `release`
+        it. Otherwise the stored response of the first request is returned.
+        Raises IdempotencyInProgress if the first request does not finish
+        within `wait_seconds`.
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        poll = 0.05
+        while True:
+            stored = await self.cache.get(key)
+            if stored is not None:
+                self.stats.replays += 1
+                return stored
+
+            pending = self._inflight.get(key)
+            if pending is not None:
+                self.stats.waits += 1
+                try:
+                    await asyncio.wait_for(asyncio.shield(pending), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    self.stats.in_progress += 1
+                    raise IdempotencyInProgress(key)
+                continue
+
+            if await self._insert(key, fingerprint):
+                self.stats.claims += 1
+                return None
+
+            row = await self._load(key)
+            if row is None:
+                continue
+            if row.status_code is not None:
+                stored = StoredResponse.from_row(row)
+                await self.cache.set(key, stored)
+                self.stats.replays += 1
+                return stored
+            # Claimed by another worker and still running.
+            if time.monotonic() >= deadline:
+                self.stats.in_progress += 1
+                raise IdempotencyInProgress(key)
+            self.stats.waits += 1
+            await asyncio.sleep(min(poll, max(deadline - time.monotonic(), 0)))
+            poll = min(poll * 2, 0.5)
+
+    async def _insert(self, key: str, fingerprint: str) -> bool:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        claimed = False
+        now = datetime.utcnow()
+        try:
+            async with self.session_factory() as db:
+                # Expired keys and abandoned claims no longer protect anything.
+                await db.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.key == key,
+                        or_(
+                            IdempotencyKey.expires_at <= now,
+                            and_(
+                                IdempotencyKey.status_code.is_(None),
+                                or_(IdempotencyKey.locked_until.is_(None), IdempotencyKey.locked_until <= now),
+                            ),
+                        ),
+                    )
+                )
+                db.add(IdempotencyKey(
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                    expires_at=now + self.ttl,
+                    locked_until=now + self.lease,
+                ))
+                try:
+                    await db.commit()
+                    claimed = True
+                except IntegrityError:
+                    await db.rollback()
+        finally:
+            # Unless this request owns the key now, nobody will finish it.
+            if not claimed:
+                self._finish(key)
+        return claimed
+
+    async def _load(self, key: str) -> IdempotencyKey | None:
+        async with self.session_factory() as db:
+            result = await db.execute(select(IdempotencyKey).where(IdempotencyKey.key == key))
+            return result.scalar_one_or_none()
+
+    def _finish(self, key: str) -> None:
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    async def complete(self, key: str, stored: StoredResponse) -> None:
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.key == key)
+                    .values(
+                        status_code=stored.status_code,
+                        response_headers=[list(h) for h in stored.headers],
+                        response_body=stored.body,
+                    )
+                )
+                await db.commit()
+            await self.cache.set(key, stored)
+        finally:
+            self._finish(key)
+
+    async def release(self, key: str) -> None:
+        try:
+            async with self.session_factory() as db:
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+                await db.commit()
+            self.stats.released += 1
+        finally:
+            self._finish(key)
+
+    async def purge(self, batch_size: int = 1000) -> int:
+        """
+        Delete expired keys in batches so the table lock stays short.
+        """
+        total = 0
+        while True:
+            async with self.session_factory() as db:
+                ids = select(IdempotencyKey.id).where(
+                    IdempotencyKey.expires_at <= datetime.utcnow()
+                ).limit(batch_size)
+                result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+                await db.commit()
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                break
+        self.stats.purged += total
+        return total
+
+    async def _purge_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await self.purge()
+            except Exception as e:
+                print(f"[idempotency] Purge failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float) -> None:
+        if self._purger is None:
+            self._purger = asyncio.create_task(self._purge_forever(interval))
+
+    async def stop(self) -> None:
+        if self._purger is not None:
+            self._purger.cancel()
+            try:
+                await self._purger
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._purger = None
+
+
+def _request_subject(headers: Headers) -> str:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return "anonymous"
+    try:
+        return str(user_cache.decode_token(token).get("sub") or "anonymous")
+    except JWTError:
+        return "anonymous"
+
+
+class IdempotencyMiddleware:
+    """
+    Answers retries of idempotent routes (same Idempotency-Key, same user)
+    from the stored response without running the endpoint. A key reused
+    with a different body is rejected with 422; a duplicate that arrives
+    while the first request runs waits for it, then gets its response.
+    """
+
+    def __init__(self, app, store: IdempotencyStore | None = None, routes=IDEMPOTENT_ROUTES):
+        self.app = app
+        self.store = store
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"].rstrip("/")) not in self.routes:
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        client_key = headers.get("idempotency-key")
+        if not client_key:
+            return await self.app(scope, receive, send)
+        store = self.store or idempotency_store
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        route = f"{scope['method']} {scope['path'].rstrip('/')}"
+        key = hashlib.sha256(f"{_request_subject(headers)}\n{route}\n{client_key}".encode()).hexdigest()
+        fingerprint = hashlib.sha256(route.encode() + b"\n" + body).hexdigest()
+
+        try:
+            stored = await store.claim(key, fingerprint)
+        except IdempotencyInProgress:
+            response = JSONResponse(
+                {"detail": "A request with this Idempotency-Key is still in progress"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+            return await response(scope, receive, send)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                response = JSONResponse(
+                    {"detail": "Idempotency-Key was already used with a different request"},
+                    status_code=422,
+                )
+                return await response(scope, receive, send)
+            return await self._replay(stored, send)
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        start: dict = {}
+        chunks: list[bytes] = []
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            await store.release(key)
+            raise
+        status_code = start.get("status", 500)
+        if status_code >= 500 or status_code in RETRYABLE_STATUSES:
+            await store.release(key)
+            return
+        await store.complete(key, StoredResponse(
+            fingerprint=fingerprint,
+            status_code=status_code,
+            headers=[
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in start.get("headers", [])
+                if name.lower() not in SKIP_HEADERS
+            ],
+            body=b"".join(chunks),
+        ))
+
+    @staticmethod
+    async def _replay(stored: StoredResponse, send) -> None:
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+_ttl = timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+idempotency_store = IdempotencyStore(
+    session_factory=db_helper.session_factory,
+    cache=(
+        RedisReplayCache(ttl=_ttl.total_seconds())
+        if settings.IDEMPOTENCY_CACHE == "redis"
+        else MemoryReplayCache(maxsize=settings.IDEMPOTENCY_CACHE_SIZE, ttl=_ttl.total_seconds())
+    ),
+    ttl=_ttl,
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+    lease=timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+)
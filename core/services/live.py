@@ -0,0 +1,170 @@
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.services.location_cache import location_cache
+from core.services.redis import get_redis
+
+RESYNC = {"type": "resync"}
+
+
+@dataclass
+class LiveStats:
+    subscribers: int = 0
+    published: int = 0
+    delivered: int = 0
+    resyncs: int = 0
+    remote: int = 0
+
+
+class Subscription:
+    """
+    One connection's bounded buffer of zone events. When the consumer falls
+    `maxsize` events behind, the buffer is replaced by a single resync
+    marker and the consumer is expected to send a fresh snapshot.
+    """
+
+    def __init__(self, zone_id: int, maxsize: int):
+        self.zone_id = zone_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize)
+
+    def offer(self, event: dict) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+    async def get(self, timeout: float) -> dict | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveBroadcaster:
+    """
+    Fans booking changes out to the live subscribers of their zone. With a
+    Redis channel configured every event is also published there, so
+    subscribers connected to other workers see it too.
+    """
+
+    def __init__(self, channel: str | None = None, buffer_size: int = 100):
+        self.channel = channel
+        self.buffer_size = buffer_size
+        self.stats = LiveStats()
+        self._zones: dict[int, set[Subscription]] = {}
+        self._worker_id = uuid.uuid4().hex
+        self._listener: asyncio.Task | None = None
+
+    def subscribe(self, zone_id: int) -> Subscription:
+        subscription = Subscription(zone_id, self.buffer_size)
+        self._zones.setdefault(zone_id, set()).add(subscription)
+        self.stats.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._zones.get(subscription.zone_id)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._zones[subscription.zone_id]
+        self.stats.subscribers -= 1
+
+    def deliver(self, zone_id: int, event: dict) -> None:
+        for subscription in list(self._zones.get(zone_id, ())):
+            if subscription.offer(event):
+                self.stats.delivered += 1
+            else:
+                self.stats.resyncs += 1
+
+    async def publish(self, zone_id: int, event: dict) -> None:
+        self.stats.published += 1
+        self.deliver(zone_id, event)
+        if not self.channel:
+            return
+        try:
+            message = json.dumps({"worker": self._worker_id, "zone_id": zone_id, "event": event})
+            await get_redis().publish(self.channel, message)
+        except Exception as e:
+            print(f"[live] Failed to publish event: {e}")
+
+    async def booking_changed(
+        self,
+        db: AsyncSession,
+        booking_id: int,
+        place_id: int,
+        start: datetime,
+        end: datetime,
+        status: str | None,
+    ) -> None:
+        """
+        Publish the new state of a booking; `status` None means it is gone.
+        Never raises: the write it reports is already committed.
+        """
+        try:
+            zone_id = (await location_cache.snapshot(db)).zone_of(place_id)
+            if zone_id is None:
+                return
+            await self.publish(zone_id, {
+                "type": "booking",
+                "booking_id": booking_id,
+                "place_id": place_id,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "status": getattr(status, "value", status),
+            })
+        except Exception as e:
+            print(f"[live] Failed to report booking {booking_id}: {e}")
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    if data.get("worker") == self._worker_id:
+                        continue
+                    self.stats.remote += 1
+                    self.deliver(data["zone_id"], data["event"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[live] Listener failed, retrying: {e}")
+                # Events may have been missed while disconnected.
+                for zone_id in list(self._zones):
+                    self.deliver(zone_id, RESYNC)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if self.channel and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+live_broadcaster = LiveBroadcaster(
+    channel=settings.LIVE_CHANNEL if settings.LIVE_PUBSUB else None,
+    buffer_size=settings.LIVE_BUFFER_SIZE,
+)
@@ -0,0 +1,177 @@
+import asyncio
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database.models.models import Branch, Zone, Place
+from core.services.redis import get_redis
+
+
+@dataclass(frozen=True)
+class BranchNode:
+    id: int
+    name: str
+    address: str | None
+
+
+@dataclass(frozen=True)
+class ZoneNode:
+    id: int
+    branch_id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class PlaceNode:
+    id: int
+    zone_id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class LocationSnapshot:
+    """
+    Immutable Branch → Zone → Place hierarchy with id and parent indexes.
+    """
+    branches: Mapping[int, BranchNode]
+    zones: Mapping[int, ZoneNode]
+    places: Mapping[int, PlaceNode]
+    zones_by_branch: Mapping[int, tuple[int, ...]]
+    places_by_zone: Mapping[int, tuple[int, ...]]
+
+    @classmethod
+    def build(cls, branches, zones, places) -> "LocationSnapshot":
+        zones_by_branch: dict[int, list[int]] = {}
+        for z in zones:
+            zones_by_branch.setdefault(z.branch_id, []).append(z.id)
+        places_by_zone: dict[int, list[int]] = {}
+        for p in places:
+            places_by_zone.setdefault(p.zone_id, []).append(p.id)
+        return cls(
+            branches=MappingProxyType({b.id: b for b in branches}),
+            zones=MappingProxyType({z.id: z for z in zones}),
+            places=MappingProxyType({p.id: p for p in places}),
+            zones_by_branch=MappingProxyType({k: tuple(v) for k, v in zones_by_branch.items()}),
+            places_by_zone=MappingProxyType({k: tuple(v) for k, v in places_by_zone.items()}),
+        )
+
+    def zone_of(self, place_id: int) -> int | None:
+        place = self.places.get(place_id)
+        return place.zone_id if place else None
+
+    def places_in_branch(self, branch_id: int) -> tuple[int, ...]:
+        return tuple(
+            place_id
+            for zone_id in self.zones_by_branch.get(branch_id, ())
+            for place_id in self.places_by_zone.get(zone_id, ())
+        )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    invalidations: int = 0
+    remote_invalidations: int = 0
+
+
+class LocationCache:
+    """
+    Process-local cache of the location hierarchy. Writers call
+    `invalidate()`; with a Redis channel configured the invalidation is
+    broadcast so every worker drops its copy.
+    """
+
+    def __init__(self, channel: str | None = None):
+        self.channel = channel
+        self.stats = CacheStats()
+        self._snapshot: LocationSnapshot | None = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._worker_id = uuid.uuid4().hex
+        self._listener: asyncio.Task | None = None
+
+    async def snapshot(self, db: AsyncSession) -> LocationSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            self.stats.hits += 1
+            return snapshot
+        self.stats.misses += 1
+        async with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            return await self._load(db)
+
+    async def _load(self, db: AsyncSession) -> LocationSnapshot:
+        generation = self._generation
+        branches = (await db.execute(select(Branch.id, Branch.name, Branch.address))).all()
+        zones = (await db.execute(select(Zone.id, Zone.branch_id, Zone.name))).all()
+        places = (await db.execute(select(Place.id, Place.zone_id, Place.name))).all()
+        snapshot = LocationSnapshot.build(
+            [BranchNode(*row) for row in branches],
+            [ZoneNode(*row) for row in zones],
+            [PlaceNode(*row) for row in places],
+        )
+        self.stats.loads += 1
+        # Only publish the snapshot if no write invalidated it meanwhile.
+        if generation == self._generation:
+            self._snapshot = snapshot
+        return snapshot
+
+    def drop(self) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+    async def invalidate(self) -> None:
+        self.drop()
+        self.stats.invalidations += 1
+        if not self.channel:
+            return
+        try:
+            await get_redis().publish(self.channel, self._worker_id)
+        except Exception as e:
+            print(f"[location-cache] Failed to publish invalidation: {e}")
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message" or message.get("data") == self._worker_id:
+                        continue
+                    self.drop()
+                    self.stats.remote_invalidations += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[location-cache] Invalidation listener failed, retrying: {e}")
+                # Messages may have been missed while disconnected.
+                self.drop()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def start(self) -> None:
+        if self.channel and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+location_cache = LocationCache(
+    channel=settings.LOCATION_CACHE_CHANNEL if settings.LOCATION_CACHE_PUBSUB else None
+)
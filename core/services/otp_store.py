@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import secrets
+import time
+from dataclasses import dataclass
+
+from core.config import settings
+from core.crud.otp import create_otp, consume_otp
+from core.database.db_helper import db_helper
+from core.services.redis import get_redis
+
+OTP_LENGTH = 6
+
+
+class OTPCooldown(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"OTP was sent recently, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def generate_code() -> str:
+    return "".join(secrets.choice("0123456789") for _ in range(OTP_LENGTH))
+
+
+def hash_code(phone_number: str, code: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), f"{phone_number}:{code}".encode(), hashlib.sha256).hexdigest()
+
+
+@dataclass
+class _Entry:
+    code_hash: str
+    expires_at: float
+    attempts: int = 0
+
+
+class MemoryOTPStore:
+    """
+    Single-process store (development, tests). Codes are kept hashed and
+    expire after `ttl` seconds; `max_attempts` wrong guesses burn the code.
+    """
+
+    def __init__(self, ttl: int, max_attempts: int, resend_seconds: int):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.resend_seconds = resend_seconds
+        self._codes: dict[str, _Entry] = {}
+        self._sent_at: dict[str, float] = {}
+
+    def _prune(self, now: float) -> None:
+        self._codes = {p: e for p, e in self._codes.items() if e.expires_at > now}
+        self._sent_at = {p: t for p, t in self._sent_at.items() if t + self.resend_seconds > now}
+
+    async def issue(self, phone_number: str) -> str:
+        now = time.monotonic()
+        sent_at = self._sent_at.get(phone_number)
+        if sent_at is not None and now - sent_at < self.resend_seconds:
+            raise OTPCooldown(int(self.resend_seconds - (now - sent_at)) + 1)
+        if len(self._codes) > 10000:
+            self._prune(now)
+        code = generate_code()
+        self._codes[phone_number] = _Entry(hash_code(phone_number, code), now + self.ttl)
+        self._sent_at[phone_number] = now
+        return code
+
+    async def verify(self, phone_number: str, code: str) -> bool:
+        entry = self._codes.get(phone_number)
+        if entry is None or entry.expires_at <= time.monotonic() or entry.attempts >= self.max_attempts:
+            return False
+        if hmac.compare_digest(entry.code_hash, hash_code(phone_number, code)):
+            del self._codes[phone_number]
+            return True
+        entry.attempts += 1
+        return False
+
+
+# KEYS[1] = otp hash; ARGV = code hash, max attempts.
+# 1 = match (code consumed), 0 = wrong/missing, -1 = too many attempts.
+_VERIFY_SCRIPT = """
+local stored = redis.call('HGET', KEYS[1], 'hash')
+if not stored then return 0 end
+local attempts = tonumber(redis.call('HGET', KEYS[1], 'attempts') or '0')
+if attempts >= tonumber(ARGV[2]) then return -1 end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+return 0
+"""
+
+
+class RedisOTPStore:
+    """
+    Shared store for all workers: one hash per phone expiring with the code,
+    plus a SET NX key for the resend cooldown.
+    """
+
+    def __init__(self, ttl: int, max_attempts: int, resend_seconds: int, prefix: str = "otp:"):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.resend_seconds = resend_seconds
+        self.prefix = prefix
+
+    async def issue(self, phone_number: str) -> str:
+        redis = get_redis()
+        cooldown_key = f"{self.prefix}cooldown:{phone_number}"
+        if not await redis.set(cooldown_key, 1, ex=self.resend_seconds, nx=True):
+            raise OTPCooldown(max(await redis.ttl(cooldown_key), 1))
+        code = generate_code()
+        key = f"{self.prefix}{phone_number}"
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={"hash": hash_code(phone_number, code), "attempts": 0})
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        return code
+
+    async def verify(self, phone_number: str, code: str) -> bool:
+        result = await get_redis().eval(
+            _VERIFY_SCRIPT, 1, f"{self.prefix}{phone_number}",
+            hash_code(phone_number, code), self.max_attempts,
+        )
+        return int(result) == 1
+
+
+class DatabaseOTPStore:
+    """
+    The original `otps` table backend, kept selectable with OTP_STORE=database.
+    Raises ValueError for unknown phone numbers.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    async def issue(self, phone_number: str) -> str:
+        async with self.session_factory() as db:
+            return await create_otp(db, phone_number)
+
+    async def verify(self, phone_number: str, code: str) -> bool:
+        async with self.session_factory() as db:
+            return await consume_otp(db, phone_number, code)
+
+
+def build_otp_store(backend: str):
+    options = dict(
+        ttl=settings.OTP_EXPIRE_MINUTES * 60,
+        max_attempts=settings.OTP_MAX_ATTEMPTS,
+        resend_seconds=settings.OTP_RESEND_SECONDS,
+    )
+    if backend == "redis":
+        return RedisOTPStore(**options)
+    if backend == "memory":
+        return MemoryOTPStore(**options)
+    if backend == "database":
+        return DatabaseOTPStore(db_helper.session_factory)
+    raise ValueError(f"Unknown OTP_STORE: {backend}")
+
+
+otp_store = build_otp_store(settings.OTP_STORE)
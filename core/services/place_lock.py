@@ -0,0 +1,201 @@
+import asyncio
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.services.redis import get_redis
+
+# First key of the two-int pg_advisory_xact_lock form, so place locks never
+# collide with advisory locks taken elsewhere on the same database.
+ADVISORY_LOCK_CLASS = 7301
+
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class PlaceLockTimeout(Exception):
+    pass
+
+
+@dataclass
+class LockStats:
+    backend: str = ""
+    acquired: int = 0
+    timeouts: int = 0
+    waiting: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+
+
+class MemoryPlaceLock:
+    """
+    One asyncio.Lock per place. Only serializes bookings within this process.
+    """
+    name = "memory"
+
+    def __init__(self):
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._users: dict[int, int] = {}
+
+    async def acquire(self, db: AsyncSession, place_id: int, timeout: float):
+        lock = self._locks.setdefault(place_id, asyncio.Lock())
+        self._users[place_id] = self._users.get(place_id, 0) + 1
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._forget(place_id)
+            raise PlaceLockTimeout(place_id)
+        except BaseException:
+            self._forget(place_id)
+            raise
+        return lock
+
+    async def release(self, db: AsyncSession, place_id: int, token) -> None:
+        token.release()
+        self._forget(place_id)
+
+    def _forget(self, place_id: int) -> None:
+        self._users[place_id] -= 1
+        if not self._users[place_id]:
+            del self._users[place_id]
+            del self._locks[place_id]
+
+
+class AdvisoryPlaceLock:
+    """
+    `pg_advisory_xact_lock` taken in the booking's own transaction, so it
+    is released by the commit or rollback that ends it. Other dialects
+    (SQLite in tests) fall back to the in-process lock.
+    """
+    name = "postgres"
+
+    def __init__(self):
+        self.fallback = MemoryPlaceLock()
+
+    async def acquire(self, db: AsyncSession, place_id: int, timeout: float):
+        if db.bind.dialect.name != "postgresql":
+            return await self.fallback.acquire(db, place_id, timeout)
+        previous = (await db.execute(
+            text("SELECT current_setting('lock_timeout'), set_config('lock_timeout', :timeout, true)"),
+            {"timeout": f"{int(timeout * 1000)}ms"},
+        )).scalar_one()
+        try:
+            await db.execute(
+                text("SELECT pg_advisory_xact_lock(:cls, :key)"),
+                {"cls": ADVISORY_LOCK_CLASS, "key": place_id},
+            )
+        except DBAPIError as e:
+            # lock_not_available; the transaction is aborted either way.
+            await db.rollback()
+            if getattr(e.orig, "sqlstate", None) == "55P03" or "lock timeout" in str(e.orig):
+                raise PlaceLockTimeout(place_id)
+            raise
+        await db.execute(text("SELECT set_config('lock_timeout', :previous, true)"), {"previous": previous})
+        return None
+
+    async def release(self, db: AsyncSession, place_id: int, token) -> None:
+        if db.bind.dialect.name != "postgresql":
+            await self.fallback.release(db, place_id, token)
+
+
+class RedisPlaceLock:
+    """
+    `SET key token NX PX ttl` per place, retried with jittered backoff until
+    the timeout; released only by the holder of the token. The TTL frees the
+    place if a worker dies while holding it.
+    """
+    name = "redis"
+
+    def __init__(self, prefix: str, ttl: float):
+        self.prefix = prefix
+        self.ttl_ms = int(ttl * 1000)
+
+    async def acquire(self, db: AsyncSession, place_id: int, timeout: float):
+        redis = get_redis()
+        key = f"{self.prefix}:{place_id}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        pause = 0.005
+        while not await redis.set(key, token, nx=True, px=self.ttl_ms):
+            if time.monotonic() >= deadline:
+                raise PlaceLockTimeout(place_id)
+            await asyncio.sleep(min(pause * random.uniform(0.5, 1.5), max(0.0, deadline - time.monotonic())))
+            pause = min(pause * 2, 0.1)
+        return token
+
+    async def release(self, db: AsyncSession, place_id: int, token) -> None:
+        try:
+            await get_redis().eval(RELEASE_SCRIPT, 1, f"{self.prefix}:{place_id}", token)
+        except Exception as e:
+            # The key expires on its own after the TTL.
+            print(f"[place-lock] Failed to release place {place_id}: {e}")
+
+
+class PlaceLock:
+    """
+    Serializes the overlap check and insert of bookings per place across
+    workers. Places are locked in id order so batch bookings cannot deadlock.
+    """
+
+    def __init__(self, backend, timeout: float):
+        self.backend = backend
+        self.timeout = timeout
+        self.stats = LockStats(backend=backend.name)
+
+    @asynccontextmanager
+    async def hold(self, db: AsyncSession, place_ids):
+        held = []
+        self.stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            deadline = time.monotonic() + self.timeout
+            for place_id in sorted(set(place_ids)):
+                remaining = max(0.0, deadline - time.monotonic())
+                held.append((place_id, await self.backend.acquire(db, place_id, remaining)))
+        except PlaceLockTimeout:
+            self.stats.timeouts += 1
+            await self._release(db, held)
+            raise
+        except BaseException:
+            await self._release(db, held)
+            raise
+        finally:
+            self.stats.waiting -= 1
+        waited = (time.perf_counter() - started) * 1000
+        self.stats.acquired += 1
+        self.stats.wait_ms_total += waited
+        self.stats.wait_ms_max = max(self.stats.wait_ms_max, waited)
+        try:
+            yield
+        except BaseException:
+            # Also ends the transaction, and with it a transaction-scoped lock.
+            await db.rollback()
+            raise
+        finally:
+            await self._release(db, held)
+
+    async def _release(self, db: AsyncSession, held) -> None:
+        for place_id, token in reversed(held):
+            await self.backend.release(db, place_id, token)
+
+
+def build_backend(name: str):
+    if name == "memory":
+        return MemoryPlaceLock()
+    if name == "redis":
+        return RedisPlaceLock(settings.PLACE_LOCK_PREFIX, settings.PLACE_LOCK_TTL_SECONDS)
+    return AdvisoryPlaceLock()
+
+
+place_lock = PlaceLock(build_backend(settings.PLACE_LOCK), timeout=settings.PLACE_LOCK_TIMEOUT_SECONDS)
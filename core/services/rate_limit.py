@@ -0,0 +1,87 @@
+import ipaddress
+import time
+
+from fastapi import Request
+
+from core.config import settings
+from core.services.redis import get_redis
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Rate limit reached, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class MemoryRateLimiter:
+    """
+    Fixed-window counters in this process (development, tests).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._counts: dict[str, tuple[float, int]] = {}
+
+    async def hit(self, key: str, limit: int) -> None:
+        now = time.monotonic()
+        started, count = self._counts.get(key, (now, 0))
+        if now - started >= self.window:
+            started, count = now, 0
+        if count >= limit:
+            raise RateLimited(int(self.window - (now - started)) + 1)
+        self._counts[key] = (started, count + 1)
+        if len(self._counts) > 10000:
+            self._counts = {k: v for k, v in self._counts.items() if now - v[0] < self.window}
+
+
+class RedisRateLimiter:
+    """
+    Fixed-window counters shared by all workers: the first hit of a window
+    creates the key with its expiry, every hit increments it.
+    """
+
+    def __init__(self, window: int, prefix: str = "ratelimit:"):
+        self.window = window
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: int) -> None:
+        redis = get_redis()
+        key = self.prefix + key
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, 0, ex=self.window, nx=True)
+            pipe.incr(key)
+            _, count = await pipe.execute()
+        if count > limit:
+            raise RateLimited(max(await redis.ttl(key), 1))
+
+
+def _is_trusted(address: str, proxies: list[str]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address.strip())
+    except ValueError:
+        return False
+    return any(ip in ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def client_ip(request: Request, proxies: list[str] | None = None) -> str:
+    """
+    The address a request came from. Behind a trusted proxy that is the
+    rightmost X-Forwarded-For hop not added by a trusted proxy; hops further
+    left are written by the client and can be forged.
+    """
+    proxies = settings.TRUSTED_PROXIES if proxies is None else proxies
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted(peer, proxies):
+        return peer
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, proxies):
+            return hop
+    return hops[0] if hops else peer
+
+
+otp_rate_limiter = (
+    RedisRateLimiter(settings.OTP_RATE_WINDOW_SECONDS, prefix="otp:rate:")
+    if settings.OTP_STORE == "redis"
+    else MemoryRateLimiter(settings.OTP_RATE_WINDOW_SECONDS)
+)
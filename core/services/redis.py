@@ -0,0 +1,27 @@
+from core.config import settings
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # optional: only needed for cross-worker features
+    aioredis = None
+
+_client = None
+
+
+def get_redis():
+    """
+    Shared asyncio Redis client, created on first use from REDIS_URL.
+    """
+    global _client
+    if aioredis is None:
+        raise RuntimeError("The 'redis' package is required for this feature")
+    if _client is None:
+        _client = aioredis.from_url(str(settings.REDIS_URL), decode_responses=True)
+    return _client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
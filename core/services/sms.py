@@ -0,0 +1,185 @@
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+
+import httpx
+from jose import jwt, JWTError
+
+from core.config import settings
+
+# Eskiz tokens live 30 days; used when the token carries no readable `exp`.
+DEFAULT_TOKEN_TTL = 29 * 24 * 3600
+# Log in again this long before the token expires.
+TOKEN_REFRESH_MARGIN = 60
+
+
+class SMSError(Exception):
+    pass
+
+
+@dataclass
+class SMSStats:
+    sent: int = 0
+    failed: int = 0
+    batches: int = 0
+    logins: int = 0
+    token_refreshes: int = 0
+
+
+class EskizClient:
+    """
+    Long-lived Eskiz client: one pooled httpx client, a cached bearer token
+    (refreshed before expiry and on 401) and a semaphore bounding the
+    number of requests in flight.
+    """
+
+    def __init__(
+        self,
+        auth_url: str,
+        send_url: str,
+        batch_url: str,
+        username: str,
+        password: str,
+        sender: str,
+        max_concurrency: int = 10,
+        batch_size: int = 200,
+        timeout: float = 10.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.auth_url = auth_url
+        self.send_url = send_url
+        self.batch_url = batch_url
+        self.username = username
+        self.password = password
+        self.sender = sender
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.stats = SMSStats()
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._token: str | None = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.auth_url and self.send_url and self.username and self.password)
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def _login(self) -> None:
+        resp = await self._http().post(
+            self.auth_url,
+            json={"username": self.username, "password": self.password},
+        )
+        resp.raise_for_status()
+        token = resp.json().get("data", {}).get("token")
+        if not token:
+            raise SMSError("No token in Eskiz response")
+        try:
+            expires_at = float(jwt.get_unverified_claims(token)["exp"]) - time.time()
+        except (JWTError, KeyError, TypeError, ValueError):
+            expires_at = DEFAULT_TOKEN_TTL
+        self._token = token
+        self._token_expires_at = time.monotonic() + expires_at - TOKEN_REFRESH_MARGIN
+        self.stats.logins += 1
+
+    async def _get_token(self, rejected: str | None = None) -> str:
+        """
+        Cached token, logging in when there is none, it is about to expire,
+        or it is the one Eskiz just `rejected`. Concurrent callers share one
+        login.
+        """
+        async with self._token_lock:
+            if (
+                self._token is None
+                or self._token == rejected
+                or time.monotonic() >= self._token_expires_at
+            ):
+                await self._login()
+            return self._token
+
+    async def _post(self, url: str, payload: dict) -> dict:
+        token = await self._get_token()
+        resp = await self._http().post(url, json=payload, headers={"Authorization": f"Bearer {token}"})
+        if resp.status_code == 401:
+            self.stats.token_refreshes += 1
+            token = await self._get_token(rejected=token)
+            resp = await self._http().post(url, json=payload, headers={"Authorization": f"Bearer {token}"})
+        resp.raise_for_status()
+        return resp.json()
+
+    async def send(self, phone_number: str, message: str) -> dict:
+        async with self._semaphore:
+            try:
+                result = await self._post(
+                    self.send_url,
+                    {"mobile_phone": phone_number, "message": message, "from": self.sender},
+                )
+            except Exception:
+                self.stats.failed += 1
+                raise
+        self.stats.sent += 1
+        return result
+
+    async def send_batch(self, messages: list[tuple[str, str]]) -> None:
+        """
+        Bulk notifications through Eskiz's send-batch endpoint,
+        `batch_size` messages per request.
+        """
+        async def send_chunk(chunk: list[tuple[str, str]]) -> None:
+            payload = {
+                "messages": [
+                    {"user_sms_id": uuid.uuid4().hex, "to": phone, "text": text}
+                    for phone, text in chunk
+                ],
+                "from": self.sender,
+                "dispatch_id": uuid.uuid4().hex,
+            }
+            async with self._semaphore:
+                try:
+                    await self._post(self.batch_url, payload)
+                except Exception:
+                    self.stats.failed += len(chunk)
+                    raise
+            self.stats.batches += 1
+            self.stats.sent += len(chunk)
+
+        chunks = [messages[i:i + self.batch_size] for i in range(0, len(messages), self.batch_size)]
+        await asyncio.gather(*(send_chunk(chunk) for chunk in chunks))
+
+    async def send_many(self, messages: list[tuple[str, str]], batch: bool = False) -> None:
+        if batch:
+            return await self.send_batch(messages)
+        await asyncio.gather(*(self.send(phone, text) for phone, text in messages))
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+sms_client = EskizClient(
+    auth_url=str(settings.SMS_AUTH_URL),
+    send_url=str(settings.SMS_SEND_URL),
+    batch_url=str(settings.SMS_BATCH_URL),
+    username=settings.SMS_USERNAME,
+    password=settings.SMS_PASSWORD,
+    sender=settings.SMS_SENDER,
+    max_concurrency=settings.SMS_MAX_CONCURRENCY,
+    batch_size=settings.SMS_BATCH_SIZE,
+    timeout=settings.SMS_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,144 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from jose import jwt
+
+from core.config import settings
+from core.database.models.models import RoleEnum
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    The part of a User that authorization needs on every request.
+    """
+    id: int
+    phone_number: str
+    role: RoleEnum
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            phone_number=user.phone_number,
+            role=user.role,
+            is_active=bool(user.is_active),
+        )
+
+
+class TTLCache:
+    """
+    Small LRU cache whose entries also expire after their own TTL.
+    `on_evict(key, value)` runs for every entry that leaves the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, on_evict: Callable[[Any, Any], None] | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self.pop(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._evicted(*self._data.popitem(last=False))
+
+    def pop(self, key) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._evicted(key, entry)
+
+    def _evicted(self, key, entry: tuple[float, Any]) -> None:
+        if self.on_evict is not None:
+            self.on_evict(key, entry[1])
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class UserCache:
+    """
+    Per-process caches for `get_current_user`: decoded JWT claims keyed by
+    token hash (kept until the token expires) and user snapshots keyed by
+    token subject (the phone number).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, claims_maxsize: int, claims_ttl: float):
+        self.users = TTLCache(maxsize, ttl, on_evict=self._forget_id)
+        self.claims = TTLCache(claims_maxsize, claims_ttl)
+        # Only for users in `users`, so it is bounded by the same size.
+        self._phone_by_id: dict[int, str] = {}
+
+    def _forget_id(self, phone_number: str, snapshot: UserSnapshot) -> None:
+        if self._phone_by_id.get(snapshot.id) == phone_number:
+            del self._phone_by_id[snapshot.id]
+
+    def decode_token(self, token: str) -> Dict[str, Any]:
+        """
+        `jwt.decode` that skips signature verification for tokens already
+        verified by this process. Raises JWTError like `jwt.decode`.
+        """
+        key = hashlib.sha256(token.encode()).hexdigest()
+        payload = self.claims.get(key)
+        if payload is not None:
+            return payload
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        exp = payload.get("exp")
+        if exp is not None:
+            self.claims.set(key, payload, ttl=exp - time.time())
+        return payload
+
+    def get(self, phone_number: str) -> UserSnapshot | None:
+        return self.users.get(phone_number)
+
+    def put(self, user) -> UserSnapshot:
+        snapshot = UserSnapshot.from_user(user)
+        self.users.set(snapshot.phone_number, snapshot)
+        self._phone_by_id[snapshot.id] = snapshot.phone_number
+        return snapshot
+
+    def invalidate(self, user_id: int | None = None, phone_number: str | None = None) -> None:
+        if user_id is not None:
+            phone_number = self._phone_by_id.pop(user_id, phone_number)
+        if phone_number is not None:
+            self.users.pop(phone_number)
+
+    def clear(self) -> None:
+        self.users.clear()
+        self.claims.clear()
+        self._phone_by_id.clear()
+
+
+user_cache = UserCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    claims_maxsize=settings.TOKEN_CACHE_SIZE,
+    claims_ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
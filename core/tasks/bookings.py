@@ -0,0 +1,58 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from core.config import settings
+from core.crud.booking import expire_pending_bookings
+from core.crud.waitlist import fill_from_waitlist
+from core.database.db_helper import db_helper
+from core.database.models.models import BookingStatus
+from core.services.booking_index import booking_index
+from core.services.live import live_broadcaster
+from core.services.user_cache import user_cache
+from core.tasks.runner import runner
+
+
+@dataclass
+class ExpiryStats:
+    runs: int = 0
+    batches: int = 0
+    expired: int = 0
+    released: Decimal = Decimal(0)
+    last_run_seconds: float = 0.0
+    last_run_at: datetime | None = None
+
+
+expiry_stats = ExpiryStats()
+
+
+@runner.periodic(settings.BOOKING_EXPIRY_INTERVAL_SECONDS)
+@runner.task(name="expire_bookings")
+async def expire_bookings(batch_size: int | None = None):
+    """
+    Cancel bookings left PENDING longer than BOOKING_PENDING_HOLD_MINUTES,
+    release their frozen funds, drop them from the overlap index and offer
+    the freed seats to the waitlist. Does nothing while the hold is 0.
+    """
+    if settings.BOOKING_PENDING_HOLD_MINUTES <= 0:
+        return
+    batch_size = batch_size or settings.BOOKING_EXPIRY_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(minutes=settings.BOOKING_PENDING_HOLD_MINUTES)
+    started = time.perf_counter()
+    expiry_stats.runs += 1
+    while True:
+        async with db_helper.session_factory() as db:
+            expired = await expire_pending_bookings(db, cutoff, batch_size)
+            expiry_stats.batches += 1
+            expiry_stats.expired += len(expired)
+            for booking_id, user_id, place_id, amount, start, end in expired:
+                booking_index.discard(booking_id, place_id)
+                user_cache.invalidate(user_id)
+                expiry_stats.released += amount
+            for booking_id, user_id, place_id, amount, start, end in expired:
+                await live_broadcaster.booking_changed(db, booking_id, place_id, start, end, BookingStatus.CANCELLED)
+                await fill_from_waitlist(db, place_id, start, end)
+        if len(expired) < batch_size:
+            break
+    expiry_stats.last_run_seconds = round(time.perf_counter() - started, 4)
+    expiry_stats.last_run_at = datetime.utcnow()
@@ -1,29 +1,145 @@
-from celery import Celery
+import asyncio
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from core.config import settings
 from core.database.db_helper import db_helper
-from core.database.models import User
-from sqlalchemy import delete
+from core.database.models import User, OTP, Booking, BalanceTransaction, WaitlistEntry
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.services.booking_index import booking_index
+from core.services.live import live_broadcaster
 from core.services.otp import send_otp_via_eskiz
+from core.services.user_cache import user_cache
+from core.tasks.runner import runner
 
-celery = Celery(__name__)
-celery.config_from_object('core.config', namespace='CELERY_')
 
-@celery.on_after_configure.connect
-async def setup_periodic_tasks(sender, **kwargs):
-    # запускаем раз в день
-    sender.add_periodic_task(24*3600, cleanup_unverified.s())
+@dataclass
+class CleanupStats:
+    runs: int = 0
+    batches: int = 0
+    users_deleted: int = 0
+    otps_deleted: int = 0
+    bookings_deleted: int = 0
+    transactions_deleted: int = 0
+    last_batch_seconds: float = 0.0
+    last_run_started: datetime | None = None
+    last_run_finished: datetime | None = None
+    last_dry_run: dict | None = None
 
-@celery.task
-async def cleanup_unverified():
-    async with db_helper.scoped_session_dependency() as db:
-        cutoff = datetime.utcnow() - timedelta(hours=48)
-        await db.execute(
-            delete(User).where(User.is_verified == False, User.created_at < cutoff)
-        )
-        await db.commit()
 
+cleanup_stats = CleanupStats()
 
-@celery.task
+
+def unverified_users_stmt(cutoff: datetime, limit: int):
+    return (
+        select(User.id)
+        .where(User.is_verified == False, User.created_at < cutoff)
+        .order_by(User.created_at, User.id)
+        .limit(limit)
+    )
+
+
+async def count_unverified(db: AsyncSession, cutoff: datetime) -> dict:
+    """
+    What a cleanup run would delete right now (dry run).
+    """
+    ids = select(User.id).where(User.is_verified == False, User.created_at < cutoff)
+
+    async def count(model, column) -> int:
+        result = await db.execute(select(func.count()).select_from(model).where(column.in_(ids)))
+        return result.scalar_one()
+
+    return {
+        "users": await count(User, User.id),
+        "otps": await count(OTP, OTP.user_id),
+        "bookings": await count(Booking, Booking.user_id),
+        "transactions": await count(BalanceTransaction, BalanceTransaction.user_id),
+    }
+
+
+async def delete_unverified_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> dict:
+    """
+    Delete up to `batch_size` expired unverified users and their rows in one
+    short transaction. Children are deleted explicitly so the counts are
+    known and SQLite (no FK cascades by default) behaves the same.
+    """
+    stmt = unverified_users_stmt(cutoff, batch_size)
+    if db.bind.dialect.name == "postgresql":
+        # Skip users another transaction is touching instead of waiting on them.
+        stmt = stmt.with_for_update(skip_locked=True)
+    ids = (await db.execute(stmt)).scalars().all()
+    if not ids:
+        return {"users": 0, "otps": 0, "bookings": [], "transactions": 0}
+    await db.execute(delete(WaitlistEntry).where(WaitlistEntry.user_id.in_(ids)))
+    bookings = await db.execute(
+        delete(Booking)
+        .where(Booking.user_id.in_(ids))
+        .returning(Booking.id, Booking.place_id, Booking.start_datetime, Booking.end_datetime)
+    )
+    bookings = bookings.all()
+    otps = await db.execute(delete(OTP).where(OTP.user_id.in_(ids)))
+    transactions = await db.execute(delete(BalanceTransaction).where(BalanceTransaction.user_id.in_(ids)))
+    users = await db.execute(delete(User).where(User.id.in_(ids)))
+    await db.commit()
+    for booking_id, place_id, start, end in bookings:
+        booking_index.discard(booking_id, place_id)
+        await live_broadcaster.booking_changed(db, booking_id, place_id, start, end, None)
+    for user_id in ids:
+        user_cache.invalidate(user_id)
+    return {
+        "users": users.rowcount,
+        "otps": otps.rowcount,
+        "bookings": bookings,
+        "transactions": transactions.rowcount,
+    }
+
+
+# запускаем раз в день
+@runner.periodic(24 * 3600)
+@runner.task(name="cleanup_unverified")
+async def cleanup_unverified(dry_run: bool | None = None, batch_size: int | None = None, max_batches: int | None = None):
+    """
+    Delete unverified users older than CLEANUP_UNVERIFIED_AFTER_HOURS in
+    batches, pausing between them so booking writes are not starved. A run
+    stops after `max_batches` and queues its own continuation.
+    """
+    dry_run = settings.CLEANUP_DRY_RUN if dry_run is None else dry_run
+    batch_size = batch_size or settings.CLEANUP_BATCH_SIZE
+    max_batches = max_batches or settings.CLEANUP_MAX_BATCHES_PER_RUN
+    cutoff = datetime.utcnow() - timedelta(hours=settings.CLEANUP_UNVERIFIED_AFTER_HOURS)
+
+    if dry_run:
+        async with db_helper.session_factory() as db:
+            counts = await count_unverified(db, cutoff)
+        cleanup_stats.last_dry_run = counts
+        print(f"[cleanup] Dry run, would delete: {counts}")
+        return counts
+
+    cleanup_stats.runs += 1
+    cleanup_stats.last_run_started = datetime.utcnow()
+    for batch in range(max_batches):
+        if batch:
+            await asyncio.sleep(settings.CLEANUP_BATCH_PAUSE_SECONDS)
+        started = time.perf_counter()
+        async with db_helper.session_factory() as db:
+            deleted = await delete_unverified_batch(db, cutoff, batch_size)
+        cleanup_stats.batches += 1
+        cleanup_stats.last_batch_seconds = round(time.perf_counter() - started, 4)
+        cleanup_stats.users_deleted += deleted["users"]
+        cleanup_stats.otps_deleted += deleted["otps"]
+        cleanup_stats.bookings_deleted += len(deleted["bookings"])
+        cleanup_stats.transactions_deleted += deleted["transactions"]
+        if deleted["users"] < batch_size:
+            cleanup_stats.last_run_finished = datetime.utcnow()
+            return
+    await cleanup_unverified.apply_async(
+        kwargs={"batch_size": batch_size, "max_batches": max_batches},
+        countdown=settings.CLEANUP_BATCH_PAUSE_SECONDS,
+    )
+
+
+# In-process: an OTP must not wait for a DB insert and the next poll.
+@runner.task(name="send_otp", durable=False)
 async def send_otp(phone_number:str, code:str):
     await send_otp_via_eskiz(code, phone_number)
-
@@ -0,0 +1,370 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from core.config import settings
+from core.database.db_helper import db_helper
+from core.database.models.models import Job
+
+MAX_BACKOFF_SECONDS = 3600
+
+
+@dataclass
+class QueuedJob:
+    name: str
+    args: list
+    kwargs: dict
+    attempts: int = 0
+    id: int | None = None
+    unique_key: str | None = None
+
+
+class MemoryJobQueue:
+    """
+    In-process queue ordered by run time. Jobs do not survive a restart.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, QueuedJob]] = []
+        self._counter = itertools.count()
+        self._unique: set[str] = set()
+        self._changed = asyncio.Event()
+        self.failed: list[tuple[QueuedJob, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    async def put(self, job: QueuedJob, delay: float = 0) -> bool:
+        if job.unique_key is not None:
+            if job.unique_key in self._unique:
+                return False
+            self._unique.add(job.unique_key)
+        heapq.heappush(self._heap, (time.time() + delay, next(self._counter), job))
+        self._changed.set()
+        return True
+
+    async def get(self, timeout: float) -> QueuedJob | None:
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.time()
+            if self._heap and self._heap[0][0] <= now:
+                job = heapq.heappop(self._heap)[2]
+                job.attempts += 1
+                return job
+            wait = deadline - time.monotonic()
+            if self._heap:
+                wait = min(wait, self._heap[0][0] - now)
+            if wait <= 0:
+                return None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def ack(self, job: QueuedJob, keep: float = 0) -> None:
+        # Nothing here survives a restart, so a finished slot needs no record.
+        self._unique.discard(job.unique_key)
+
+    async def retry(self, job: QueuedJob, delay: float, error: str) -> None:
+        heapq.heappush(self._heap, (time.time() + delay, next(self._counter), job))
+        self._changed.set()
+
+    async def fail(self, job: QueuedJob, error: str) -> None:
+        self._unique.discard(job.unique_key)
+        self.failed.append((job, error))
+
+
+class DatabaseJobQueue:
+    """
+    Queue in the `jobs` table. A worker claims a job by leasing it
+    (`locked_until`); a job whose worker died is picked up again once the
+    lease runs out. Finished periodic runs stay as `done_until` rows so
+    their slot cannot be enqueued again after a restart.
+    """
+
+    def __init__(self, session_factory, lease_seconds: float, poll_interval: float):
+        self.session_factory = session_factory
+        self.lease = timedelta(seconds=lease_seconds)
+        self.poll_interval = poll_interval
+
+    async def put(self, job: QueuedJob, delay: float = 0) -> bool:
+        async with self.session_factory() as db:
+            try:
+                await db.execute(
+                    insert(Job).values(
+                        name=job.name,
+                        payload={"args": job.args, "kwargs": job.kwargs},
+                        attempts=0,
+                        run_at=datetime.utcnow() + timedelta(seconds=delay),
+                        unique_key=job.unique_key,
+                        created_at=datetime.utcnow(),
+                    )
+                )
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                return False
+        return True
+
+    async def _claim(self) -> QueuedJob | None:
+        now = datetime.utcnow()
+        claimable = or_(Job.locked_until.is_(None), Job.locked_until < now)
+        async with self.session_factory() as db:
+            candidate = (
+                select(Job.id)
+                .where(Job.failed_at.is_(None), Job.done_until.is_(None), Job.run_at <= now, claimable)
+                .order_by(Job.run_at)
+                .limit(1)
+            )
+            if db.bind.dialect.name == "postgresql":
+                candidate = candidate.with_for_update(skip_locked=True)
+            job_id = (await db.execute(candidate)).scalar_one_or_none()
+            if job_id is None:
+                return None
+            # Re-checking the lease makes the claim safe without row locks.
+            result = await db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.done_until.is_(None), claimable)
+                .values(locked_until=now + self.lease, attempts=Job.attempts + 1)
+                .returning(Job.name, Job.payload, Job.attempts, Job.unique_key)
+            )
+            row = result.first()
+            await db.commit()
+        if row is None:
+            return None
+        return QueuedJob(
+            name=row.name,
+            args=row.payload.get("args", []),
+            kwargs=row.payload.get("kwargs", {}),
+            attempts=row.attempts,
+            id=job_id,
+            unique_key=row.unique_key,
+        )
+
+    async def get(self, timeout: float) -> QueuedJob | None:
+        job = await self._claim()
+        if job is None:
+            await asyncio.sleep(min(self.poll_interval, timeout))
+        return job
+
+    async def _update(self, stmt) -> None:
+        async with self.session_factory() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def ack(self, job: QueuedJob, keep: float = 0) -> None:
+        if job.unique_key is None or keep <= 0:
+            await self._update(delete(Job).where(Job.id == job.id))
+            return
+        now = datetime.utcnow()
+        async with self.session_factory() as db:
+            await db.execute(delete(Job).where(Job.done_until <= now))
+            await db.execute(
+                update(Job)
+                .where(Job.id == job.id)
+                .values(done_until=now + timedelta(seconds=keep), locked_until=None)
+            )
+            await db.commit()
+
+    async def retry(self, job: QueuedJob, delay: float, error: str) -> None:
+        await self._update(
+            update(Job)
+            .where(Job.id == job.id)
+            .values(
+                run_at=datetime.utcnow() + timedelta(seconds=delay),
+                locked_until=None,
+                last_error=error[:500],
+            )
+        )
+
+    async def fail(self, job: QueuedJob, error: str) -> None:
+        await self._update(
+            update(Job)
+            .where(Job.id == job.id)
+            .values(failed_at=datetime.utcnow(), locked_until=None, last_error=error[:500])
+        )
+
+
+class Task:
+    """
+    A registered job function. Call it to run inline, or `await task.delay(...)`
+    to run it on the runner's workers. Non-durable tasks always go through the
+    in-process queue: no DB write on enqueue, lost on restart.
+    """
+
+    def __init__(self, runner: "JobRunner", func: Callable[..., Awaitable[Any]], name: str, retries: int, durable: bool = True):
+        self.runner = runner
+        self.func = func
+        self.name = name
+        self.retries = retries
+        self.durable = durable
+
+    async def __call__(self, *args, **kwargs):
+        return await self.func(*args, **kwargs)
+
+    async def delay(self, *args, **kwargs) -> bool:
+        return await self.runner.enqueue(self.name, args, kwargs)
+
+    async def apply_async(self, args=(), kwargs=None, countdown: float = 0, unique_key: str | None = None) -> bool:
+        return await self.runner.enqueue(self.name, args, kwargs or {}, delay=countdown, unique_key=unique_key)
+
+
+@dataclass
+class JobStats:
+    enqueued: int = 0
+    succeeded: int = 0
+    retried: int = 0
+    failed: int = 0
+    running: int = 0
+
+
+@dataclass
+class JobRunner:
+    """
+    In-process asyncio job runner: `workers` coroutines pull jobs from the
+    queue, failures are retried with exponential backoff, periodic tasks
+    are enqueued once per interval, and `stop()` lets running jobs finish
+    for up to `shutdown_timeout` seconds.
+    """
+    queue: Any
+    workers: int = 4
+    max_retries: int = 5
+    backoff: float = 2.0
+    poll_interval: float = 1.0
+    shutdown_timeout: float = 10.0
+    stats: JobStats = field(default_factory=JobStats)
+
+    def __post_init__(self):
+        self.tasks: dict[str, Task] = {}
+        self.local = self.queue if isinstance(self.queue, MemoryJobQueue) else MemoryJobQueue()
+        self._periodic: list[tuple[Task, float]] = []
+        self._every: dict[str, float] = {}
+        self._workers: list[asyncio.Task] = []
+        self._schedulers: list[asyncio.Task] = []
+        self._stopping = False
+
+    def task(self, name: str | None = None, retries: int | None = None, durable: bool = True):
+        def decorator(func) -> Task:
+            task = Task(
+                self, func, name or f"{func.__module__}.{func.__name__}",
+                retries if retries is not None else self.max_retries, durable,
+            )
+            self.tasks[task.name] = task
+            return task
+        return decorator
+
+    def periodic(self, every: float):
+        def decorator(task: Task) -> Task:
+            self._periodic.append((task, every))
+            self._every[task.name] = every
+            return task
+        return decorator
+
+    async def enqueue(self, name: str, args=(), kwargs=None, delay: float = 0, unique_key: str | None = None) -> bool:
+        if name not in self.tasks:
+            raise KeyError(f"Unknown task: {name}")
+        # Round-trip through JSON so the memory queue rejects what the table would.
+        payload = json.loads(json.dumps({"args": list(args), "kwargs": kwargs or {}}))
+        job = QueuedJob(name=name, args=payload["args"], kwargs=payload["kwargs"], unique_key=unique_key)
+        queue = self.queue if self.tasks[name].durable else self.local
+        queued = await queue.put(job, delay)
+        if queued:
+            self.stats.enqueued += 1
+        return queued
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.backoff * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+
+    async def run_job(self, job: QueuedJob, queue=None) -> None:
+        queue = queue or self.queue
+        task = self.tasks.get(job.name)
+        if task is None:
+            await queue.fail(job, f"Unknown task: {job.name}")
+            self.stats.failed += 1
+            return
+        self.stats.running += 1
+        try:
+            await task.func(*job.args, **job.kwargs)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts > task.retries:
+                print(f"[jobs] {job.name} failed after {job.attempts} attempts: {error}")
+                await queue.fail(job, error)
+                self.stats.failed += 1
+            else:
+                await queue.retry(job, self._backoff(job.attempts), error)
+                self.stats.retried += 1
+        else:
+            # A periodic run keeps its slot taken for one interval.
+            await queue.ack(job, keep=self._every.get(job.name, 0))
+            self.stats.succeeded += 1
+        finally:
+            self.stats.running -= 1
+
+    async def _work(self, queue) -> None:
+        while not self._stopping:
+            try:
+                job = await queue.get(self.poll_interval)
+                if job is not None:
+                    await self.run_job(job, queue)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[jobs] Worker error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _schedule(self, task: Task, every: float) -> None:
+        while True:
+            slot = int(time.time() // every)
+            try:
+                await self.enqueue(task.name, unique_key=f"{task.name}:{slot}")
+            except Exception as e:
+                print(f"[jobs] Failed to schedule {task.name}: {e}")
+            await asyncio.sleep((slot + 1) * every - time.time())
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._stopping = False
+        queues = [self.queue] if self.local is self.queue else [self.queue, self.local]
+        self._workers = [asyncio.create_task(self._work(queue)) for queue in queues for _ in range(self.workers)]
+        self._schedulers = [asyncio.create_task(self._schedule(task, every)) for task, every in self._periodic]
+
+    async def stop(self) -> None:
+        self._stopping = True
+        for scheduler in self._schedulers:
+            scheduler.cancel()
+        if self._workers:
+            _, pending = await asyncio.wait(self._workers, timeout=self.shutdown_timeout)
+            for worker in pending:
+                worker.cancel()
+        await asyncio.gather(*self._schedulers, *self._workers, return_exceptions=True)
+        self._workers = []
+        self._schedulers = []
+
+
+runner = JobRunner(
+    queue=(
+        MemoryJobQueue()
+        if settings.JOB_QUEUE == "memory"
+        else DatabaseJobQueue(
+            db_helper.session_factory,
+            lease_seconds=settings.JOB_LEASE_SECONDS,
+            poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+        )
+    ),
+    workers=settings.JOB_WORKERS,
+    max_retries=settings.JOB_MAX_RETRIES,
+    backoff=settings.JOB_RETRY_BACKOFF_SECONDS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    shutdown_timeout=settings.JOB_SHUTDOWN_TIMEOUT_SECONDS,
+)
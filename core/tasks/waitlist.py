@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from datetime import datetime
+from core.database.db_helper import db_helper
+from core.services.sms import sms_client
+from core.tasks.runner import runner
+
+
+@dataclass
+class WaitlistStats:
+    matches: int = 0
+    booked: int = 0
+    last_lookup_ms: float = 0.0  # finding the candidates
+    last_match_ms: float = 0.0  # including the bookings made
+    failures: int = 0
+    closed: int = 0  # entries that could not be booked at all
+
+
+waitlist_stats = WaitlistStats()
+
+
+@runner.task(name="notify_waitlist")
+async def notify_waitlist(phone_number: str, booking_id: int):
+    message = f"Место освободилось: для вас создана бронь #{booking_id}. Подтвердите её в приложении."
+    if not sms_client.configured:
+        print(f"[waitlist] SMS not configured, message for {phone_number}: {message}")
+        return
+    await sms_client.send(phone_number, message)
+
+
+@runner.task(name="retry_waitlist_fill")
+async def retry_fill(place_id: int, start: str, end: str):
+    """
+    Re-run a fill that failed on an unexpected error; raising lets the
+    runner retry it with backoff.
+    """
+    from core.crud.waitlist import fill_from_waitlist  # the crud module imports this one
+
+    async with db_helper.session_factory() as db:
+        await fill_from_waitlist(
+            db, place_id, datetime.fromisoformat(start), datetime.fromisoformat(end), raise_errors=True
+        )
@@ -1,4 +1,5 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from core.api.v1 import (
     auth, 
     refresh, 
@@ -7,15 +8,59 @@ from core.api.v1 import (
     verify,
     balance,
     booking,
-    transactions
+    transactions,
+    availability,
+    waitlist,
+    live,
+    metrics
     )
 from core.config import settings
+from core.services.location_cache import location_cache
+from core.services.live import live_broadcaster
+from core.services.redis import close_redis
+from core.services.auth import shutdown_hashing
+from core.services.sms import sms_client
+from core.tasks.runner import runner
+import core.tasks.cleanup  # registers the jobs
+import core.tasks.bookings  # registers the jobs
+import core.tasks.waitlist  # registers the jobs
+from core.database.db_helper import db_helper
+from core.services.idempotency import IdempotencyMiddleware, idempotency_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    location_cache.start()
+    live_broadcaster.start()
+    idempotency_store.start(settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+    runner.start()
+    yield
+    await runner.stop()
+    await idempotency_store.stop()
+    await live_broadcaster.stop()
+    await location_cache.stop()
+    await close_redis()
+    await sms_client.aclose()
+    shutdown_hashing()
+    await db_helper.dispose()
+
 
 app = FastAPI(
     title="PC-Club Booking",
     docs_url="/docs",
     redoc_url=None,
+    lifespan=lifespan,
 )
+app.add_middleware(IdempotencyMiddleware)
+
+
+@app.middleware("http")
+async def pin_primary_after_write(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        db_helper.pin_primary(request, response)
+    return response
+
 
 app.include_router(auth.router)
 app.include_router(refresh.router)
@@ -25,6 +70,10 @@ app.include_router(verify.router)
 app.include_router(balance.router)
 app.include_router(booking.router)
 app.include_router(transactions.router)
+app.include_router(availability.router)
+app.include_router(waitlist.router)
+app.include_router(live.router)
+app.include_router(metrics.router)
 
 
 @app.get("/", tags=["root"])
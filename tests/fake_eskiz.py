@@ -0,0 +1,63 @@
+"""
+In-process stand-in for the Eskiz API (login, send, send-batch).
+
+Use it over httpx.ASGITransport in tests, or serve it with uvicorn:
+
+    uvicorn tests.fake_eskiz:app --port 8099
+"""
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Header, HTTPException
+
+
+@dataclass
+class FakeEskizState:
+    latency: float = 0.0
+    logins: int = 0
+    sent: list = field(default_factory=list)
+    batches: int = 0
+    valid_tokens: set = field(default_factory=set)
+
+    def revoke_tokens(self) -> None:
+        self.valid_tokens.clear()
+
+
+def create_fake_eskiz(latency: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    state = app.state.eskiz = FakeEskizState(latency=latency)
+
+    def check(authorization: str | None) -> None:
+        if not authorization or authorization.removeprefix("Bearer ") not in state.valid_tokens:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+
+    @app.post("/api/auth/login")
+    async def login(payload: dict):
+        await asyncio.sleep(state.latency)
+        if not payload.get("username") or not payload.get("password"):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        state.logins += 1
+        token = uuid.uuid4().hex
+        state.valid_tokens.add(token)
+        return {"message": "token_generated", "data": {"token": token}, "token_type": "bearer"}
+
+    @app.post("/api/message/sms/send")
+    async def send(payload: dict, authorization: str | None = Header(None)):
+        await asyncio.sleep(state.latency)
+        check(authorization)
+        state.sent.append((payload["mobile_phone"], payload["message"]))
+        return {"id": uuid.uuid4().hex, "status": "waiting", "message": "Waiting for SMS provider"}
+
+    @app.post("/api/message/sms/send-batch")
+    async def send_batch(payload: dict, authorization: str | None = Header(None)):
+        await asyncio.sleep(state.latency)
+        check(authorization)
+        state.batches += 1
+        state.sent.extend((m["to"], m["text"]) for m in payload["messages"])
+        return {"id": payload["dispatch_id"], "status": ["waiting"] * len(payload["messages"])}
+
+    return app
+
+
+app = create_fake_eskiz()
@@ -85,3 +85,17 @@ async def test_register_and_login(async_client):
     bad_login = {"username": "1234567890", "password": "wrong"}
     bad_resp = await async_client.post("/auth/login", data=bad_login)
     assert bad_resp.status_code == 401
+
+@pytest.mark.anyio
+async def test_password_hashing_admission_limit(monkeypatch):
+    from fastapi import HTTPException
+    from core.services import auth as auth_service
+
+    hashed = await auth_service.get_password_hash_async("secret")
+    assert await auth_service.verify_password_async("secret", hashed)
+
+    monkeypatch.setattr(auth_service.settings, "PASSWORD_HASH_QUEUE_SIZE", 0)
+    monkeypatch.setattr(auth_service, "_hash_pending", auth_service.settings.PASSWORD_HASH_WORKERS)
+    with pytest.raises(HTTPException) as exc:
+        await auth_service.verify_password_async("secret", hashed)
+    assert exc.value.status_code == 503
@@ -0,0 +1,49 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from core.services.availability import SlotGrid, build_bitmaps, next_free_windows, parse_slot
+
+T0 = datetime(2025, 6, 10, 18, 0, tzinfo=timezone.utc)
+
+
+def test_parse_slot():
+    assert parse_slot("15m") == timedelta(minutes=15)
+    assert parse_slot("1h") == timedelta(hours=1)
+    assert parse_slot("30") == timedelta(minutes=30)
+    with pytest.raises(ValueError):
+        parse_slot("0m")
+    with pytest.raises(ValueError):
+        parse_slot("soon")
+
+
+def test_bitmaps_clip_to_grid():
+    grid = SlotGrid(start=T0, end=T0 + timedelta(hours=2), slot=timedelta(minutes=30))
+    rows = [
+        (1, T0 - timedelta(hours=1), T0 + timedelta(minutes=10)),
+        (1, T0 + timedelta(minutes=75), T0 + timedelta(hours=5)),
+        (2, None, None),
+    ]
+    bitmaps = build_bitmaps(grid, rows)
+    assert grid.render(bitmaps[1]) == "1011"
+    assert grid.render(bitmaps[2]) == "0000"
+
+
+def test_next_free_windows_sweeps_gaps_and_prefers_neighbours():
+    hour = timedelta(hours=1)
+    rows = [
+        (1, T0, T0 + 3 * hour),
+        (1, T0 + 4 * hour, T0 + 6 * hour),
+        (2, T0 - hour, T0 + 2 * hour),
+        (2, T0 + 2 * hour, T0 + 5 * hour),
+        (3, T0 + hour, T0 + 2 * hour),
+        (4, None, None),
+    ]
+    windows = next_free_windows(rows, T0, T0 + 8 * hour, hour, limit=4)
+    assert windows == [(3, T0), (4, T0), (3, T0 + 2 * hour), (1, T0 + 3 * hour)]
+
+    # Place 3 is only free for an hour before its booking, so 2h windows skip it.
+    assert next_free_windows(rows, T0, T0 + 8 * hour, 2 * hour, limit=2) == [(4, T0), (3, T0 + 2 * hour)]
+
+    # With every seat free at the same time, the ones next to `near` come first.
+    free = [(p, None, None) for p in (1, 2, 3, 4, 5)]
+    assert next_free_windows(free, T0, T0 + hour, hour, limit=3, near=4) == [(4, T0), (3, T0), (5, T0)]
@@ -0,0 +1,46 @@
+import pytest
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.database.models.base import Base
+from core.database.models.models import User, BalanceTransaction, TransactionType
+from core.services.balance import credit, debit, InsufficientFunds, UserNotFound
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as sess:
+        sess.add(User(first_name="A", last_name="B", phone_number="1", password_hash="x", balance=Decimal("20.00")))
+        await sess.commit()
+        yield sess
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_debit_and_credit(session):
+    assert await debit(session, 1, Decimal("15.00"), "d1") == Decimal("5.00")
+    user = await credit(session, 1, Decimal("10.00"), "c1")
+    await session.commit()
+    assert user.balance == Decimal("15.00")
+
+    txns = (await session.execute(select(BalanceTransaction.type, BalanceTransaction.amount))).all()
+    assert txns == [(TransactionType.FREEZE, Decimal("15.00")), (TransactionType.TOPUP, Decimal("10.00"))]
+
+
+@pytest.mark.anyio
+async def test_debit_tells_missing_user_from_insufficient_funds(session):
+    with pytest.raises(InsufficientFunds):
+        await debit(session, 1, Decimal("20.01"), "d1")
+    with pytest.raises(UserNotFound):
+        await debit(session, 2, Decimal("1.00"), "d2")
+    with pytest.raises(UserNotFound):
+        await credit(session, 2, Decimal("1.00"), "c2")
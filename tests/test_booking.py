@@ -0,0 +1,272 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.database.models.base import Base
+from core.database.models.models import (
+    User, Branch, Zone, Place, Booking, BookingStatus, BalanceTransaction, TransactionType,
+)
+from core.crud.booking import (
+    create_booking, create_bookings, create_recurring_bookings, delete_booking, transition_booking, update_booking,
+)
+from core.schemas.booking import BookingBatchCreate, BookingCreate, BookingRecurringCreate, BookingUpdate
+from core.services.booking_index import booking_index
+
+T0 = datetime(2025, 6, 10, 18, 0, tzinfo=timezone.utc)
+
+
+def at(hours: float) -> datetime:
+    return T0 + timedelta(hours=hours)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    booking_index.invalidate()
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as sess:
+        branch = Branch(name="B")
+        zone = Zone(branch=branch, name="Z")
+        sess.add_all([
+            User(first_name="A", last_name="B", phone_number="1", password_hash="x", balance=Decimal("100.00")),
+            branch, zone, Place(zone=zone, name="P1"), Place(zone=zone, name="P2"),
+        ])
+        await sess.commit()
+        yield sess
+    booking_index.invalidate()
+    await engine.dispose()
+
+
+def booking_data(place_id=1, start=0, end=2, amount="10.00"):
+    return BookingCreate(place_id=place_id, start_datetime=at(start), end_datetime=at(end), amount=Decimal(amount))
+
+
+@pytest.mark.anyio
+async def test_create_booking_rejects_overlap_missed_by_index(session):
+    await create_booking(session, 1, booking_data(), "k1")
+    # Another worker books the seat; this process' index never hears of it.
+    session.add(Booking(
+        user_id=1, place_id=1, start_datetime=at(3), end_datetime=at(5),
+        amount=Decimal("1.00"), status=BookingStatus.PENDING, idempotency_key="other",
+    ))
+    await session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        await create_booking(session, 1, booking_data(start=4, end=6), "k2")
+    assert exc.value.status_code == 409
+
+
+@pytest.mark.anyio
+async def test_index_rejects_known_overlaps_before_the_lock(session):
+    await create_booking(session, 1, booking_data(), "k1")
+    statements = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        with pytest.raises(HTTPException) as exc:
+            await create_booking(session, 1, booking_data(start=1, end=3), "k2")
+        assert exc.value.status_code == 409
+        with pytest.raises(HTTPException) as exc:
+            await create_bookings(session, 1, [booking_data(place_id=2), booking_data(start=1, end=3)], "team")
+        assert exc.value.status_code == 409
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    # Only the idempotency key lookups; no overlap query, no lock.
+    assert len(statements) == 2
+
+
+@pytest.mark.anyio
+async def test_create_booking_is_idempotent(session):
+    first = await create_booking(session, 1, booking_data(), "k1")
+    again = await create_booking(session, 1, booking_data(), "k1")
+    assert again.id == first.id
+    user = await session.get(User, 1)
+    assert user.balance == Decimal("90.00")
+
+
+@pytest.mark.anyio
+async def test_state_machine_moves_funds_once(session):
+    confirmed = (await create_booking(session, 1, booking_data(), "k1")).id
+    cancelled = (await create_booking(session, 1, booking_data(start=3, end=5), "k2")).id
+
+    booking = await transition_booking(session, confirmed, "confirm", user_id=1)
+    assert booking.status == BookingStatus.CONFIRMED
+    booking = await transition_booking(session, cancelled, "cancel", user_id=1)
+    assert booking.status == BookingStatus.CANCELLED
+    # The released slot is free again.
+    assert await booking_index.is_free(session, 1, at(3), at(5))
+
+    with pytest.raises(HTTPException) as exc:
+        await transition_booking(session, cancelled, "confirm", user_id=1)
+    assert exc.value.status_code == 409
+    with pytest.raises(HTTPException) as exc:
+        await transition_booking(session, confirmed, "cancel", user_id=2)
+    assert exc.value.status_code == 404
+
+    booking = await transition_booking(session, confirmed, "complete")
+    assert booking.status == BookingStatus.COMPLETED
+
+    user = await session.get(User, 1)
+    await session.refresh(user)
+    assert user.balance == Decimal("90.00")
+    ledger = (await session.execute(
+        select(BalanceTransaction.idempotency_key, BalanceTransaction.type).order_by(BalanceTransaction.id)
+    )).all()
+    assert ledger == [
+        (f"freeze:{confirmed}", TransactionType.FREEZE),
+        (f"freeze:{cancelled}", TransactionType.FREEZE),
+        (f"payment:{confirmed}", TransactionType.PAYMENT),
+        (f"release:{cancelled}", TransactionType.RELEASE),
+    ]
+
+
+@pytest.mark.anyio
+async def test_deleting_a_pending_booking_releases_its_funds(session):
+    pending = (await create_booking(session, 1, booking_data(), "k1")).id
+    confirmed = (await create_booking(session, 1, booking_data(start=3, end=5), "k2")).id
+    await transition_booking(session, confirmed, "confirm")
+
+    assert (await delete_booking(session, pending)).status == BookingStatus.PENDING
+    assert (await delete_booking(session, confirmed)).status == BookingStatus.CONFIRMED
+    assert await delete_booking(session, pending) is None
+
+    user = await session.get(User, 1)
+    await session.refresh(user)
+    # Only the captured payment stays taken.
+    assert user.balance == Decimal("90.00")
+    ledger = (await session.execute(
+        select(BalanceTransaction.idempotency_key, BalanceTransaction.type).order_by(BalanceTransaction.id)
+    )).all()
+    assert ledger[-1] == (f"release:{pending}", TransactionType.RELEASE)
+    assert len(ledger) == 4
+
+
+@pytest.mark.anyio
+async def test_update_booking_refuses_status_changes(session):
+    booking = await create_booking(session, 1, booking_data(), "k1")
+    with pytest.raises(HTTPException) as exc:
+        await update_booking(session, booking.id, BookingUpdate(status="confirmed"))
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_update_booking_checks_the_new_interval(session):
+    first = (await create_booking(session, 1, booking_data(), "k1")).id
+    second = (await create_booking(session, 1, booking_data(start=3, end=4), "k2")).id
+    with pytest.raises(HTTPException) as exc:
+        await update_booking(session, second, BookingUpdate(start_datetime=at(1)))
+    assert exc.value.status_code == 409
+    with pytest.raises(HTTPException) as exc:
+        await update_booking(session, second, BookingUpdate(end_datetime=at(2)))
+    assert exc.value.status_code == 422
+    with pytest.raises(HTTPException) as exc:
+        await update_booking(session, second, BookingUpdate(amount=Decimal("1.00")))
+    assert exc.value.status_code == 422
+
+    moved = await update_booking(session, first, BookingUpdate(start_datetime=at(1), end_datetime=at(3)))
+    assert (moved.start_datetime.replace(tzinfo=timezone.utc), moved.end_datetime.replace(tzinfo=timezone.utc)) == (at(1), at(3))
+
+
+@pytest.mark.anyio
+async def test_create_bookings_is_all_or_nothing(session):
+    session.add(Place(zone_id=1, name="P3"))
+    await session.commit()
+    await create_booking(session, 1, booking_data(place_id=3, start=1, end=2), "taken")
+
+    items = [booking_data(place_id=p) for p in (1, 2, 3)]
+    with pytest.raises(HTTPException) as exc:
+        await create_bookings(session, 1, items, "team")
+    assert exc.value.status_code == 409
+
+    with pytest.raises(HTTPException) as exc:
+        await create_bookings(session, 1, [booking_data(place_id=p, start=4, end=6, amount="40.00") for p in (1, 2, 3)], "team")
+    assert exc.value.status_code == 402
+    assert (await session.execute(select(Booking.id))).all() == [(1,)]
+
+    booking_index.invalidate()
+    statements = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        bookings = await create_bookings(session, 1, [booking_data(place_id=p, start=4, end=6) for p in (1, 2, 3)], "team")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert [b.place_id for b in bookings] == [1, 2, 3]
+    # key lookup, one overlap query for all seats (none per cold place), INSERT bookings, debit, INSERT ledger
+    assert len(statements) == 5
+    again = await create_bookings(session, 1, [booking_data(place_id=p, start=4, end=6) for p in (1, 2, 3)], "team")
+    assert [b.id for b in again] == [b.id for b in bookings]
+
+    user = await session.get(User, 1)
+    await session.refresh(user)
+    assert user.balance == Decimal("60.00")
+    ledger = (await session.execute(
+        select(BalanceTransaction.booking_id).where(BalanceTransaction.type == TransactionType.FREEZE)
+    )).scalars().all()
+    assert sorted(ledger) == [1] + [b.id for b in bookings]
+    assert not await booking_index.is_free(session, 2, at(5), at(7))
+
+
+def test_batch_rejects_overlapping_items():
+    with pytest.raises(ValueError):
+        BookingBatchCreate(items=[booking_data(), booking_data(start=1, end=3)])
+
+
+def weekly(**rule):
+    return BookingRecurringCreate(
+        place_id=1, start_datetime=at(0), end_datetime=at(2), amount=Decimal("1.00"),
+        recurrence={"freq": "weekly", **(rule or {"count": 52})},
+    )
+
+
+@pytest.mark.anyio
+async def test_recurring_bookings_skip_conflicts_in_constant_queries(session):
+    await create_booking(session, 1, booking_data(start=24 * 7 * 3 + 1, end=24 * 7 * 3 + 5), "taken")
+    statements = []
+    engine = session.bind.sync_engine
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        bookings, conflicts = await create_recurring_bookings(session, 1, weekly(), "weekly")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(bookings) == 51
+    assert [(c["start_datetime"], c["booking_id"]) for c in conflicts] == [(at(24 * 7 * 3), 1)]
+    # key lookup, range query, INSERT bookings, debit, INSERT ledger
+    assert len(statements) == 5
+    user = await session.get(User, 1)
+    await session.refresh(user)
+    assert user.balance == Decimal("100.00") - Decimal("10.00") - 51
+
+    again, _ = await create_recurring_bookings(session, 1, weekly(), "weekly")
+    assert [b.id for b in again] == [b.id for b in bookings]
+
+
+def test_recurrence_expansion():
+    assert len(weekly(until=at(24 * 7 * 4)).occurrences()) == 5
+    with pytest.raises(ValueError):
+        weekly(count=3, until=at(24 * 7))
+    with pytest.raises(ValueError):
+        weekly(until=at(24 * 7 * 200))
+    with pytest.raises(ValueError):
+        weekly(until=at(-1))
+    # Naive `until` against an aware start is a validation error, not a TypeError.
+    with pytest.raises(ValueError):
+        weekly(until=at(24 * 7).replace(tzinfo=None))
+    # Back-to-back is fine; longer than the step would overlap the next occurrence.
+    daily = {"freq": "daily", "count": 3}
+    BookingRecurringCreate(place_id=1, start_datetime=at(0), end_datetime=at(24), amount=Decimal(1), recurrence=daily)
+    with pytest.raises(ValueError):
+        BookingRecurringCreate(place_id=1, start_datetime=at(0), end_datetime=at(25), amount=Decimal(1), recurrence=daily)
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.database.db_helper import db_helper
+from core.database.models.base import Base
+from core.database.models.models import (
+    BalanceTransaction, Booking, BookingStatus, Branch, Place, TransactionType, User, Zone,
+)
+from core.services.booking_index import booking_index
+from core.tasks import bookings
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def Session(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    old = datetime.utcnow() - timedelta(hours=1)
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"id": i, "first_name": "U", "last_name": "U", "phone_number": f"99890{i:07d}",
+             "password_hash": "x", "balance": 0}
+            for i in (1, 2)
+        ])
+        await conn.execute(insert(Branch).values(id=1, name="B"))
+        await conn.execute(insert(Zone).values(id=1, branch_id=1, name="Z"))
+        await conn.execute(insert(Place).values(id=1, zone_id=1, name="P"))
+        # 1-5 stale PENDING, 6 fresh PENDING, 7 stale CONFIRMED
+        await conn.execute(insert(Booking), [
+            {"id": i, "user_id": 1 + i % 2, "place_id": 1, "amount": 10,
+             "status": BookingStatus.CONFIRMED if i == 7 else BookingStatus.PENDING,
+             "start_datetime": start + timedelta(hours=i), "end_datetime": start + timedelta(hours=i, minutes=30),
+             "created_at": datetime.utcnow() if i == 6 else old + timedelta(minutes=i),
+             "idempotency_key": f"b{i}"}
+            for i in range(1, 8)
+        ])
+    Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(db_helper, "session_factory", Session)
+    monkeypatch.setattr(bookings, "expiry_stats", bookings.ExpiryStats())
+    monkeypatch.setattr(bookings.settings, "BOOKING_PENDING_HOLD_MINUTES", 15)
+    booking_index.invalidate()
+    yield Session
+    booking_index.invalidate()
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_no_hold_configured_expires_nothing(Session, monkeypatch):
+    monkeypatch.setattr(bookings.settings, "BOOKING_PENDING_HOLD_MINUTES", 0)
+    await bookings.expire_bookings()
+    assert bookings.expiry_stats.runs == 0
+    async with Session() as db:
+        assert (await db.execute(select(Booking.id).where(Booking.status == BookingStatus.CANCELLED))).all() == []
+
+
+@pytest.mark.anyio
+async def test_expires_stale_pending_and_releases_funds(Session):
+    async with Session() as db:
+        assert len(await booking_index.get(db, 1)) == 7
+
+    await bookings.expire_bookings(batch_size=2)
+
+    stats = bookings.expiry_stats
+    assert (stats.batches, stats.expired, stats.released) == (3, 5, Decimal(50))
+    async with Session() as db:
+        statuses = dict((await db.execute(select(Booking.id, Booking.status))).all())
+        balances = dict((await db.execute(select(User.id, User.balance))).all())
+        ledger = (await db.execute(
+            select(BalanceTransaction.booking_id, BalanceTransaction.type, BalanceTransaction.amount)
+            .order_by(BalanceTransaction.booking_id)
+        )).all()
+        assert sorted(b for b, s in statuses.items() if s == BookingStatus.CANCELLED) == [1, 2, 3, 4, 5]
+        # users 1 and 2 had bookings {2, 4} and {1, 3, 5}
+        assert balances == {1: Decimal(20), 2: Decimal(30)}
+        assert ledger == [(i, TransactionType.RELEASE, Decimal(10)) for i in range(1, 6)]
+        assert await booking_index.check(db) == []
+        assert len(await booking_index.get(db, 1)) == 2
+
+    # Nothing left to do: the next sweep is a no-op.
+    await bookings.expire_bookings()
+    assert bookings.expiry_stats.expired == 5
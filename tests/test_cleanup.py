@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.database.db_helper import db_helper
+from core.database.models.base import Base
+from core.database.models.models import (
+    BalanceTransaction, Booking, BookingStatus, Branch, OTP, Place, TransactionType, User, Zone,
+)
+from core.tasks import cleanup
+from core.tasks.runner import MemoryJobQueue, runner
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session_factory(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    old = datetime.utcnow() - timedelta(days=3)
+    start = datetime.now(timezone.utc) + timedelta(days=1)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # 1-7: stale unverified, 8: stale but verified, 9: fresh unverified
+        await conn.execute(insert(User), [
+            {"id": i, "first_name": "U", "last_name": "U", "phone_number": f"99890{i:07d}",
+             "password_hash": "x", "is_verified": i == 8,
+             "created_at": datetime.utcnow() if i == 9 else old + timedelta(minutes=i)}
+            for i in range(1, 10)
+        ])
+        await conn.execute(insert(Branch).values(id=1, name="B"))
+        await conn.execute(insert(Zone).values(id=1, branch_id=1, name="Z"))
+        await conn.execute(insert(Place).values(id=1, zone_id=1, name="P"))
+        await conn.execute(insert(OTP), [{"user_id": i, "code": "123456"} for i in range(1, 10)])
+        await conn.execute(insert(Booking), [
+            {"id": i, "user_id": i, "place_id": 1, "status": BookingStatus.PENDING, "amount": 10,
+             "start_datetime": start + timedelta(hours=i), "end_datetime": start + timedelta(hours=i, minutes=30),
+             "idempotency_key": f"b{i}"}
+            for i in (2, 8)
+        ])
+        await conn.execute(insert(BalanceTransaction), [
+            {"user_id": i, "booking_id": i, "type": TransactionType.FREEZE, "amount": 10, "idempotency_key": f"t{i}"}
+            for i in (2, 8)
+        ])
+    monkeypatch.setattr(db_helper, "session_factory", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(runner, "queue", MemoryJobQueue())
+    monkeypatch.setattr(cleanup, "cleanup_stats", cleanup.CleanupStats())
+    monkeypatch.setattr(cleanup.settings, "CLEANUP_BATCH_PAUSE_SECONDS", 0)
+    yield db_helper.session_factory
+    await engine.dispose()
+
+
+async def remaining(Session, model) -> int:
+    async with Session() as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.anyio
+async def test_dry_run_only_counts(session_factory):
+    counts = await cleanup.cleanup_unverified(dry_run=True)
+    assert counts == {"users": 7, "otps": 7, "bookings": 1, "transactions": 1}
+    assert cleanup.cleanup_stats.last_dry_run == counts
+    assert await remaining(session_factory, User) == 9
+
+
+@pytest.mark.anyio
+async def test_deletes_in_batches_and_resumes(session_factory):
+    await cleanup.cleanup_unverified(dry_run=False, batch_size=2, max_batches=2)
+    stats = cleanup.cleanup_stats
+    assert (stats.batches, stats.users_deleted) == (2, 4)
+    assert stats.last_run_finished is None
+    # The run stopped at its batch budget and queued its own continuation.
+    job = await runner.queue.get(0)
+    assert job.name == "cleanup_unverified"
+
+    await runner.run_job(job)
+    assert stats.users_deleted == 7
+    assert stats.bookings_deleted == 1 and stats.transactions_deleted == 1 and stats.otps_deleted == 7
+    assert stats.last_run_finished is not None
+    async with session_factory() as db:
+        users = (await db.execute(select(User.id).order_by(User.id))).scalars().all()
+    assert users == [8, 9]
+    assert await remaining(session_factory, OTP) == 2
+    assert await remaining(session_factory, Booking) == 1
+    assert len(runner.queue) == 0
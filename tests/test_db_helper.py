@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from core.config import settings
+from core.database.db_helper import DatabaseHelper, TimedQueuePool, engine_options
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_production_profile():
+    url = "postgresql+asyncpg://u:p@db/booking"
+    config = settings.model_copy(update={"ENV": "production", "DB_MAX_CONNECTIONS": 90, "WEB_CONCURRENCY": 3})
+    options = engine_options(config, url)
+    assert options["echo"] is False
+    assert (options["pool_size"], options["max_overflow"]) == (30, 0)
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"]["statement_cache_size"] == 100
+
+    config = config.model_copy(update={"DB_POOL_SIZE": 7, "DB_ECHO": True})
+    options = engine_options(config, url)
+    assert (options["pool_size"], options["echo"]) == (7, True)
+    assert engine_options(config, "sqlite+aiosqlite:///:memory:") == {"echo": True}
+
+
+def test_replica_options_follow_each_url(tmp_path):
+    assert engine_options(settings, "postgresql+asyncpg://u:p@replica/booking", connect_timeout=2)["connect_args"]["timeout"] == 2
+    assert engine_options(settings, "postgresql+psycopg://u:p@replica/booking", connect_timeout=2)["connect_args"] == {"connect_timeout": 2}
+
+    seen = []
+    helper = DatabaseHelper(
+        f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        replica_urls=[f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"],
+        replica_options=lambda url: seen.append(url) or {"echo": False},
+        echo=True,
+    )
+    assert seen == [f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"]
+    assert helper.engine.echo is True and helper.replicas[0].kw["bind"].echo is False
+
+
+@pytest.mark.anyio
+async def test_pool_stats_record_waits_and_timeouts(tmp_path):
+    helper = DatabaseHelper(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    async with helper.engine.connect():
+        assert helper.pool_stats()["checked_out"] == 1
+        with pytest.raises(PoolTimeoutError):
+            async with helper.engine.connect():
+                pass
+    stats = helper.pool_stats()
+    assert (stats["checked_out"], stats["checkouts"], stats["timeouts"]) == (0, 2, 1)
+    assert stats["wait_seconds_max"] >= 0.05
+    await helper.engine.dispose()
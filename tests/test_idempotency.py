@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.database.models.base import Base
+from core.database.models.models import IdempotencyKey
+from core.services.auth import create_access_token
+from core.services.idempotency import IdempotencyMiddleware, IdempotencyStore, MemoryReplayCache
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def store(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'idem.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield IdempotencyStore(
+        session_factory=async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+        cache=MemoryReplayCache(maxsize=100, ttl=60),
+        ttl=timedelta(hours=1),
+        wait_seconds=2,
+    )
+    await engine.dispose()
+
+
+def make_client(store: IdempotencyStore, calls: list) -> AsyncClient:
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=store, routes={("POST", "/bookings")})
+
+    @app.post("/bookings/", status_code=201)
+    async def create(payload: dict):
+        calls.append(payload)
+        await asyncio.sleep(0.05)
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+        return {"n": len(calls)}
+
+    return AsyncClient(transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://test")
+
+
+@pytest.mark.anyio
+async def test_retries_replay_without_running_the_endpoint(store):
+    calls = []
+    async with make_client(store, calls) as client:
+        headers = {"Idempotency-Key": "k1"}
+        first, second = await asyncio.gather(
+            client.post("/bookings/", json={"place": 1}, headers=headers),
+            client.post("/bookings/", json={"place": 1}, headers=headers),
+        )
+        third = await client.post("/bookings/", json={"place": 1}, headers=headers)
+        assert len(calls) == 1
+        assert first.status_code == second.status_code == third.status_code == 201
+        assert first.json() == second.json() == third.json() == {"n": 1}
+        assert third.headers["idempotent-replayed"] == "true"
+
+        mismatch = await client.post("/bookings/", json={"place": 2}, headers=headers)
+        assert mismatch.status_code == 422
+
+        other_user = await client.post(
+            "/bookings/", json={"place": 1}, headers={**headers, "Authorization": f"Bearer {create_access_token('900')}"}
+        )
+        assert other_user.status_code == 201 and len(calls) == 2
+
+
+@pytest.mark.anyio
+async def test_server_errors_release_the_key_and_expired_keys_are_purged(store):
+    calls = []
+    async with make_client(store, calls) as client:
+        headers = {"Idempotency-Key": "k2"}
+        assert (await client.post("/bookings/", json={"fail": True}, headers=headers)).status_code == 500
+        assert (await client.post("/bookings/", json={"fail": True}, headers=headers)).status_code == 500
+        assert len(calls) == 2
+
+    async with store.session_factory() as db:
+        db.add(IdempotencyKey(key="old", fingerprint="f", status_code=201, expires_at=datetime.utcnow()))
+        await db.commit()
+    assert await store.purge() == 1
+    async with store.session_factory() as db:
+        assert (await db.execute(select(func.count()).select_from(IdempotencyKey))).scalar_one() == 0
+
+
+@pytest.mark.anyio
+async def test_failed_claims_do_not_leave_a_future_behind(store, monkeypatch):
+    def broken_factory():
+        raise ConnectionError("database down")
+
+    monkeypatch.setattr(store, "session_factory", broken_factory)
+    with pytest.raises(ConnectionError):
+        await store.claim("k3", "f")
+    assert store._inflight == {}
+
+
+@pytest.mark.anyio
+async def test_abandoned_claims_are_taken_over_after_the_lease(store):
+    now = datetime.utcnow()
+    async with store.session_factory() as db:
+        # A worker died while running the request.
+        db.add(IdempotencyKey(
+            key="k4", fingerprint="f", expires_at=now + timedelta(hours=1), locked_until=now - timedelta(seconds=1)
+        ))
+        await db.commit()
+    assert await store.claim("k4", "f") is None
+    await store.release("k4")
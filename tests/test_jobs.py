@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.database.models.base import Base
+from core.database.models.models import Job
+from core.tasks.runner import DatabaseJobQueue, JobRunner, MemoryJobQueue
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.anyio
+async def test_retries_periodic_and_graceful_stop():
+    runner = JobRunner(queue=MemoryJobQueue(), workers=2, max_retries=2, backoff=0.01, poll_interval=0.05)
+    calls = []
+
+    @runner.task(name="flaky")
+    async def flaky(n):
+        calls.append(n)
+        if len(calls) < 3:
+            raise RuntimeError("try again")
+
+    @runner.task(name="always_fails", retries=1)
+    async def always_fails():
+        raise RuntimeError("nope")
+
+    ticks = []
+
+    @runner.periodic(0.2)
+    @runner.task(name="tick")
+    async def tick():
+        ticks.append(1)
+
+    runner.start()
+    await flaky.delay(7)
+    await always_fails.delay()
+    # `tick` also counts towards `succeeded`, so wait on the calls themselves.
+    await wait_for(lambda: len(calls) == 3 and runner.stats.failed == 1)
+    assert calls == [7, 7, 7]
+    assert runner.stats.retried == 3
+    assert runner.queue.failed[0][0].name == "always_fails"
+    assert await tick.apply_async(unique_key="tick:once")
+    assert not await tick.apply_async(unique_key="tick:once")
+
+    slow_done = []
+
+    @runner.task(name="slow")
+    async def slow():
+        await asyncio.sleep(0.1)
+        slow_done.append(1)
+
+    await slow.delay()
+    await wait_for(lambda: runner.stats.running == 1)
+    await runner.stop()
+    assert slow_done == [1]
+    assert ticks
+
+
+@pytest.mark.anyio
+async def test_database_queue_leases_and_persists_failures():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    queue = DatabaseJobQueue(Session, lease_seconds=60, poll_interval=0.01)
+    runner = JobRunner(queue=queue, max_retries=0)
+    seen = []
+
+    @runner.task(name="echo")
+    async def echo(value, suffix=""):
+        seen.append(value + suffix)
+        if value == "bad":
+            raise ValueError("bad value")
+
+    await echo.delay("a", suffix="!")
+    await echo.delay("bad")
+    assert await echo.apply_async(args=("u",), unique_key="slot-1")
+    assert not await echo.apply_async(args=("u",), unique_key="slot-1")
+
+    first, second = await queue.get(0.01), await queue.get(0.01)
+    assert (first.args, second.args) == (["a"], ["bad"])  # the leased job is not handed out twice
+    for job in (first, second, await queue.get(0.01)):
+        await runner.run_job(job)
+    assert seen == ["a!", "bad", "u"]
+    assert await queue.get(0.01) is None
+
+    async with Session() as db:
+        rows = (await db.execute(select(Job))).scalars().all()
+    assert [(r.name, r.payload["args"], r.failed_at is not None) for r in rows] == [("echo", ["bad"], True)]
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_periodic_slots_stay_taken_and_local_tasks_skip_the_table():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    queue = DatabaseJobQueue(Session, lease_seconds=60, poll_interval=0.01)
+    runner = JobRunner(queue=queue, workers=1, poll_interval=0.01)
+    sent = []
+
+    @runner.periodic(60)
+    @runner.task(name="tick")
+    async def tick():
+        pass
+
+    @runner.task(name="otp", durable=False)
+    async def otp(phone):
+        sent.append(phone)
+
+    assert await tick.apply_async(unique_key="tick:1")
+    await runner.run_job(await queue.get(0.01))
+    # After a restart the scheduler tries the same slot again.
+    assert not await tick.apply_async(unique_key="tick:1")
+    assert await queue.get(0.01) is None
+
+    runner.start()
+    await otp.delay("998901234567")
+    await wait_for(lambda: sent == ["998901234567"])
+    await runner.stop()
+    async with Session() as db:
+        rows = (await db.execute(select(Job))).scalars().all()
+    assert "otp" not in {r.name for r in rows}
+    assert [r.done_until is not None for r in rows if r.unique_key == "tick:1"] == [True]
+    assert runner.local._unique == set()
+    await engine.dispose()
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
+
+from core.crud.booking import create_booking, delete_booking
+from core.database.db_helper import db_helper
+from core.database.models.base import Base
+from core.database.models.models import Branch, Place, User, Zone
+from core.schemas.booking import BookingCreate
+from core.services.booking_index import booking_index
+from core.services.live import RESYNC, LiveBroadcaster, live_broadcaster
+from core.services.location_cache import location_cache
+
+START = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(hours=1)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def seed(url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User).values(
+            id=1, first_name="U", last_name="U", phone_number="1", password_hash="x", balance=100
+        ))
+        await conn.execute(insert(Branch).values(id=1, name="B"))
+        await conn.execute(insert(Zone), [{"id": 1, "branch_id": 1, "name": "Z1"}, {"id": 2, "branch_id": 1, "name": "Z2"}])
+        await conn.execute(insert(Place), [{"id": 1, "zone_id": 1, "name": "P1"}, {"id": 2, "zone_id": 2, "name": "P2"}])
+    await engine.dispose()
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'live.db'}"
+    asyncio.run(seed(url))
+    # NullPool: the app may run on another event loop than the test.
+    engine = create_async_engine(url, poolclass=NullPool)
+    monkeypatch.setattr(db_helper, "session_factory", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    location_cache.drop()
+    booking_index.invalidate()
+    yield db_helper.session_factory
+    location_cache.drop()
+    booking_index.invalidate()
+
+
+def booking(place_id=1, hours=0):
+    return BookingCreate(
+        place_id=place_id, start_datetime=START + timedelta(hours=hours),
+        end_datetime=START + timedelta(hours=hours + 1), amount=Decimal(1),
+    )
+
+
+@pytest.mark.anyio
+async def test_slow_subscriber_gets_resync_instead_of_unbounded_buffer():
+    broadcaster = LiveBroadcaster(buffer_size=3)
+    fast, slow, other = broadcaster.subscribe(1), broadcaster.subscribe(1), broadcaster.subscribe(2)
+    for i in range(3):
+        await broadcaster.publish(1, {"type": "booking", "booking_id": i})
+        assert (await fast.get(0.1))["booking_id"] == i
+    await broadcaster.publish(1, {"type": "booking", "booking_id": 3})
+
+    assert await slow.get(0.1) is RESYNC
+    assert slow.queue.empty()
+    assert other.queue.empty()
+    assert broadcaster.stats.resyncs == 1
+    broadcaster.unsubscribe(slow)
+    broadcaster.unsubscribe(slow)
+    assert broadcaster.stats.subscribers == 2
+
+
+@pytest.mark.anyio
+async def test_booking_writes_reach_zone_subscribers(database):
+    subscription = live_broadcaster.subscribe(1)
+    try:
+        async with database() as db:
+            created = await create_booking(db, 1, booking(), "k1")
+            await create_booking(db, 1, booking(place_id=2), "k2")
+            await delete_booking(db, created.id)
+        events = [await subscription.get(0.1) for _ in range(2)]
+        assert [(e["booking_id"], e["place_id"], e["status"]) for e in events] == [
+            (created.id, 1, "pending"),
+            (created.id, 1, None),
+        ]
+        assert subscription.queue.empty()
+    finally:
+        live_broadcaster.unsubscribe(subscription)
+
+
+def test_websocket_sends_snapshot_then_deltas(database):
+    from main import app
+
+    async def book(key, hours):
+        async with database() as db:
+            return (await create_booking(db, 1, booking(hours=hours), key)).id
+
+    first = asyncio.run(book("k1", 0))
+    with TestClient(app) as client:
+        with client.websocket_connect("/zones/1/live/ws") as ws:
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot"
+            assert [p["place_id"] for p in snapshot["places"]] == [1]
+            assert [b["booking_id"] for b in snapshot["places"][0]["bookings"]] == [first]
+
+            second = client.portal.call(book, "k2", 2)
+            event = ws.receive_json()
+            assert (event["type"], event["booking_id"], event["status"]) == ("booking", second, "pending")
+        with pytest.raises(Exception):
+            with client.websocket_connect("/zones/99/live/ws") as ws:
+                ws.receive_json()
+    assert live_broadcaster.stats.subscribers == 0
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.database.models.base import Base
+from core.database.models.models import Branch, Zone, Place
+from core.services.location_cache import LocationCache
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as sess:
+        branch = Branch(name="B")
+        zone = Zone(branch=branch, name="Z")
+        sess.add_all([branch, zone, Place(zone=zone, name="P1"), Place(zone=zone, name="P2")])
+        await sess.commit()
+        yield sess
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_snapshot_indexes_and_invalidation(session):
+    cache = LocationCache()
+    snapshot = await cache.snapshot(session)
+    assert snapshot.places_by_zone[1] == (1, 2)
+    assert snapshot.places_in_branch(1) == (1, 2)
+    assert snapshot.zone_of(2) == 1
+    assert await cache.snapshot(session) is snapshot
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    session.add(Place(zone_id=1, name="P3"))
+    await session.commit()
+    await cache.invalidate()
+    assert (await cache.snapshot(session)).places_by_zone[1] == (1, 2, 3)
+    assert cache.stats.loads == 2
@@ -0,0 +1,127 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.crud.otp import mark_phone_verified
+from core.database.models.base import Base
+from core.database.models.models import User
+from core.api.v1 import verify
+from core.services.otp_store import DatabaseOTPStore, MemoryOTPStore, OTPCooldown
+from core.services.rate_limit import MemoryRateLimiter
+from core.tasks.runner import MemoryJobQueue, runner
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_memory_store_hashes_limits_attempts_and_cooldown():
+    store = MemoryOTPStore(ttl=300, max_attempts=2, resend_seconds=60)
+    code = await store.issue("900")
+    assert code not in repr(store._codes)
+    with pytest.raises(OTPCooldown):
+        await store.issue("900")
+
+    wrong = "000000" if code != "000000" else "111111"
+    assert not await store.verify("900", wrong)
+    assert await store.verify("900", code)
+    assert not await store.verify("900", code)  # consumed
+
+    store._sent_at.clear()
+    code = await store.issue("900")
+    assert not await store.verify("900", wrong)
+    assert not await store.verify("900", wrong)
+    assert not await store.verify("900", code)  # locked after max_attempts
+
+
+@pytest.mark.anyio
+async def test_database_store_and_verified_flip():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with Session() as db:
+        db.add(User(first_name="A", last_name="B", phone_number="900", password_hash="x"))
+        await db.commit()
+
+    store = DatabaseOTPStore(Session)
+    with pytest.raises(ValueError):
+        await store.issue("901")
+    code = await store.issue("900")
+    assert await store.verify("900", code)
+    assert not await store.verify("900", code)
+
+    async with Session() as db:
+        assert await mark_phone_verified(db, "900")
+        assert not await mark_phone_verified(db, "901")
+        assert (await db.get(User, 1)).is_verified
+    await engine.dispose()
+
+
+@pytest.fixture
+async def otp_app(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with Session() as db:
+        db.add_all([
+            User(first_name="A", last_name="B", phone_number=phone, password_hash="x")
+            for phone in ("998901111111", "998902222222")
+        ])
+        await db.commit()
+
+    async def session():
+        async with Session() as db:
+            yield db
+
+    monkeypatch.setattr(verify, "otp_store", MemoryOTPStore(ttl=300, max_attempts=2, resend_seconds=0))
+    monkeypatch.setattr(verify, "otp_rate_limiter", MemoryRateLimiter(window=3600))
+    monkeypatch.setattr(verify.settings, "OTP_MAX_PER_PHONE", 2)
+    monkeypatch.setattr(verify.settings, "OTP_MAX_PER_IP", 3)
+    monkeypatch.setattr(runner, "local", MemoryJobQueue())
+    app = FastAPI()
+    app.include_router(verify.router)
+    app.dependency_overrides[verify.get_db] = session
+    yield app
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_otp_sends_are_capped_per_phone_and_ip(otp_app):
+    async with AsyncClient(transport=ASGITransport(app=otp_app), base_url="http://test") as client:
+        send = lambda phone: client.post("/auth/otp", json={"phone_number": phone, "chat_id": 1})
+        # Unknown numbers get no SMS and use up no quota, whatever the store.
+        assert (await send("998909999999")).status_code == 404
+        assert [(await send("998901111111")).status_code for _ in range(3)] == [204, 204, 429]
+        # The refused send still counts against the IP.
+        limited = await send("998902222222")
+        assert limited.status_code == 429 and int(limited.headers["Retry-After"]) > 0
+    assert len(runner.local) == 2
+
+
+@pytest.mark.anyio
+async def test_ip_cap_uses_the_forwarded_client_behind_a_trusted_proxy(otp_app, monkeypatch):
+    async with AsyncClient(transport=ASGITransport(app=otp_app), base_url="http://test") as client:
+        def send(phone, forwarded):
+            return client.post(
+                "/auth/otp", json={"phone_number": phone, "chat_id": 1},
+                headers={"X-Forwarded-For": forwarded},
+            )
+        # The proxy (127.0.0.1) appends the real client; the forged hop before it is ignored.
+        statuses = [(await send("998901111111", f"10.0.0.{i}, 203.0.113.7")).status_code for i in range(2)]
+        statuses.append((await send("998902222222", "203.0.113.7")).status_code)
+        statuses.append((await send("998902222222", "203.0.113.7")).status_code)
+        assert statuses == [204, 204, 204, 429]
+        # Another client behind the same proxy has its own quota.
+        assert (await send("998902222222", "198.51.100.1")).status_code == 204
+
+        # Without a trusted proxy the header is the client's own and is ignored.
+        monkeypatch.setattr(verify.settings, "TRUSTED_PROXIES", [])
+        monkeypatch.setattr(verify, "otp_rate_limiter", MemoryRateLimiter(window=3600))
+        monkeypatch.setattr(verify.settings, "OTP_MAX_PER_IP", 1)
+        assert (await send("998901111111", "198.51.100.2")).status_code == 204
+        assert (await send("998902222222", "198.51.100.3")).status_code == 429
@@ -0,0 +1,27 @@
+import pytest
+from datetime import datetime, timezone
+from fastapi import HTTPException
+
+from core.crud.pagination import decode_cursor, encode_cursor, page
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 6, 10, 18, 0, 5, 123, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_page_uses_extra_row_for_next_cursor():
+    class Row:
+        def __init__(self, i):
+            self.id, self.created_at = i, datetime(2025, 6, 10, 18, i)
+
+    items, next_cursor = page([Row(3), Row(2), Row(1)], 2)
+    assert [r.id for r in items] == [3, 2]
+    assert decode_cursor(next_cursor)[1] == 2
+    assert page([Row(1)], 2)[1] is None
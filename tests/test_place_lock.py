@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.crud.booking import create_booking
+from core.database.models.base import Base
+from core.database.models.models import Booking, Branch, Place, User, Zone
+from core.schemas.booking import BookingCreate
+from core.services.booking_index import booking_index
+from core.services.place_lock import (
+    AdvisoryPlaceLock, MemoryPlaceLock, PlaceLock, PlaceLockTimeout, place_lock,
+)
+
+START = datetime(2025, 6, 10, 18, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    # A file database so every client gets its own connection.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'lock.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User).values(
+            id=1, first_name="U", last_name="U", phone_number="1", password_hash="x", balance=100
+        ))
+        await conn.execute(insert(Branch).values(id=1, name="B"))
+        await conn.execute(insert(Zone).values(id=1, branch_id=1, name="Z"))
+        await conn.execute(insert(Place).values(id=1, zone_id=1, name="P1"))
+    booking_index.invalidate()
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    booking_index.invalidate()
+    await engine.dispose()
+
+
+def booking(hours=0):
+    return BookingCreate(
+        place_id=1, start_datetime=START + timedelta(hours=hours),
+        end_datetime=START + timedelta(hours=hours + 2), amount=Decimal(1),
+    )
+
+
+@pytest.mark.anyio
+async def test_memory_lock_serializes_one_place_only():
+    lock = PlaceLock(MemoryPlaceLock(), timeout=1)
+    events = []
+
+    async def hold(place_id, name):
+        async with lock.hold(None, [place_id]):
+            events.append(f"{name}+")
+            await asyncio.sleep(0.02)
+            events.append(f"{name}-")
+
+    await asyncio.gather(hold(1, "a"), hold(1, "b"), hold(2, "c"))
+    assert events.index("a-") < events.index("b+")
+    assert events.index("c+") < events.index("a-")
+    assert lock.stats.acquired == 3
+    assert lock.stats.wait_ms_max >= 15
+    # Idle places do not pile up.
+    assert lock.backend._locks == {}
+
+
+@pytest.mark.anyio
+async def test_lock_timeout_is_counted_and_releases_held_places():
+    lock = PlaceLock(MemoryPlaceLock(), timeout=0.05)
+    async with lock.hold(None, [2]):
+        with pytest.raises(PlaceLockTimeout):
+            async with lock.hold(None, [1, 2]):
+                pass
+        assert lock.stats.timeouts == 1
+        # Place 1 was taken first (id order) and given back on the timeout.
+        async with lock.hold(None, [1]):
+            pass
+    assert lock.stats.waiting == 0
+
+
+@pytest.mark.anyio
+async def test_advisory_lock_falls_back_to_memory_off_postgres(session_factory):
+    lock = PlaceLock(AdvisoryPlaceLock(), timeout=0.05)
+    async with session_factory() as a, session_factory() as b:
+        async with lock.hold(a, [1]):
+            with pytest.raises(PlaceLockTimeout):
+                async with lock.hold(b, [1]):
+                    pass
+
+
+@pytest.mark.anyio
+async def test_concurrent_clients_book_a_seat_once(session_factory):
+    async def client(i):
+        async with session_factory() as db:
+            try:
+                await create_booking(db, 1, booking(hours=i % 2), f"client-{i}")
+                return 201
+            except HTTPException as e:
+                return e.status_code
+
+    results = await asyncio.gather(*(client(i) for i in range(20)))
+    assert sorted(results) == [201] + [409] * 19
+    async with session_factory() as db:
+        assert (await db.execute(select(func.count()).select_from(Booking))).scalar_one() == 1
+        assert (await db.execute(select(User.balance))).scalar_one() == 99
+
+
+@pytest.mark.anyio
+async def test_lock_timeout_maps_to_503(session_factory, monkeypatch):
+    monkeypatch.setattr(place_lock, "timeout", 0.05)
+    async with session_factory() as holder, session_factory() as db:
+        async with place_lock.hold(holder, [1]):
+            with pytest.raises(HTTPException) as exc:
+                await create_booking(db, 1, booking(), "k")
+    assert exc.value.status_code == 503
@@ -0,0 +1,161 @@
+"""
+Query-plan regression tests: run EXPLAIN on the statements built in
+core/crud against a seeded database and fail on sequential scans.
+
+SQLite runs by default. Set TEST_POSTGRES_URL to an empty scratch
+database to check the PostgreSQL plans as well.
+"""
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.future import select
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from core.crud.availability import seat_bookings_stmt
+from core.crud.balance_transaction import transactions_page_stmt
+from core.crud.booking import (
+    batch_overlap_stmt, bookings_page_stmt, overlap_stmt, place_bookings_stmt, stale_pending_stmt,
+)
+from core.crud.otp import valid_otp_stmt
+from core.tasks.cleanup import unverified_users_stmt
+from core.crud.pagination import encode_cursor, keyset
+from core.crud.waitlist import waiting_stmt
+from core.database.models.base import Base
+from core.schemas.booking import BookingCreate
+from core.database.models.models import (
+    User, Branch, Zone, Place, Booking, BookingStatus, BalanceTransaction, TransactionType, OTP,
+)
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN (FORMAT TEXT) "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def statements():
+    cursor = encode_cursor(NOW, 100)
+    return {
+        "overlap": overlap_stmt(7, NOW, NOW + timedelta(hours=1)),
+        "recurring_conflicts": place_bookings_stmt(7, NOW, NOW + timedelta(weeks=52)),
+        "waitlist_match": waiting_stmt(2, NOW, NOW + timedelta(hours=2), 20),
+        "batch_overlap": batch_overlap_stmt([
+            BookingCreate(place_id=p, start_datetime=NOW, end_datetime=NOW + timedelta(hours=1), amount=10)
+            for p in (7, 8, 9)
+        ]),
+        "availability_zone": seat_bookings_stmt(NOW, NOW + timedelta(days=1), zone_id=2),
+        "availability_branch": seat_bookings_stmt(NOW, NOW + timedelta(days=1), branch_id=1),
+        "user_bookings": bookings_page_stmt(3, None, 10),
+        "user_bookings_next": bookings_page_stmt(3, cursor, 10),
+        "all_bookings": bookings_page_stmt(None, cursor, 10),
+        "transactions": transactions_page_stmt(3, cursor, 20),
+        "users": keyset(select(User), User, cursor, 10),
+        "otp": valid_otp_stmt(3, "123456", NOW.replace(tzinfo=None)),
+        "cleanup": unverified_users_stmt(NOW.replace(tzinfo=None), 500),
+        "expire_pending": stale_pending_stmt(NOW, 500),
+    }
+
+
+async def seed(conn) -> None:
+    await conn.run_sync(Base.metadata.create_all)
+    await conn.execute(insert(User), [
+        {"id": i, "first_name": "U", "last_name": "U", "phone_number": f"99890{i:07d}",
+         "password_hash": "x", "balance": 0}
+        for i in range(1, 201)
+    ])
+    await conn.execute(insert(Branch), [{"id": i, "name": f"B{i}"} for i in range(1, 11)])
+    await conn.execute(insert(Zone), [{"id": i, "branch_id": 1 + i % 10, "name": f"Z{i}"} for i in range(1, 41)])
+    await conn.execute(insert(Place), [{"id": i, "zone_id": 1 + i % 40, "name": f"P{i}"} for i in range(1, 401)])
+    await conn.execute(insert(Booking), [
+        {"id": i, "user_id": 1 + i % 200, "place_id": 1 + i % 200,
+         "start_datetime": NOW + timedelta(hours=i), "end_datetime": NOW + timedelta(hours=i + 1),
+         "status": BookingStatus.CANCELLED if i % 5 == 0 else BookingStatus.CONFIRMED,
+         "amount": 10, "idempotency_key": f"b{i}", "created_at": NOW + timedelta(seconds=i)}
+        for i in range(1, 2001)
+    ])
+    await conn.execute(insert(BalanceTransaction), [
+        {"id": i, "user_id": 1 + i % 200, "type": TransactionType.FREEZE, "amount": 10,
+         "idempotency_key": f"t{i}", "created_at": NOW + timedelta(seconds=i)}
+        for i in range(1, 2001)
+    ])
+    await conn.execute(insert(OTP), [
+        {"id": i, "user_id": 1 + i % 200, "code": f"{i:06d}",
+         "created_at": NOW.replace(tzinfo=None), "expires_at": NOW.replace(tzinfo=None) + timedelta(minutes=5)}
+        for i in range(1, 1001)
+    ])
+
+
+def sequential_scans(dialect: str, plan: list[str]) -> list[str]:
+    if dialect == "sqlite":
+        # "SCAN bookings" reads the whole table; "SCAN ... USING INDEX" walks
+        # an index in order (keyset pages stop after LIMIT rows).
+        return [line for line in plan if re.fullmatch(r"SCAN \w+", line.strip())]
+    return [line for line in plan if "Seq Scan" in line]
+
+
+async def explain_all(url: str) -> dict[str, list[str]]:
+    engine = create_async_engine(url)
+    found = {}
+    try:
+        async with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+                await conn.run_sync(Base.metadata.drop_all)
+            await seed(conn)
+            await conn.execute(text("ANALYZE"))
+            if engine.dialect.name == "postgresql":
+                # Tiny tables would be seq-scanned anyway; ask whether an index path exists.
+                await conn.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, stmt in statements().items():
+                rows = (await conn.execute(Explain(stmt))).all()
+                plan = [row[-1] for row in rows]
+                if sequential_scans(engine.dialect.name, plan):
+                    found[name] = plan
+            if engine.dialect.name == "postgresql":
+                await conn.run_sync(Base.metadata.drop_all)
+    finally:
+        await engine.dispose()
+    return found
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_sqlite_plans_use_indexes(tmp_path):
+    assert await explain_all(f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}") == {}
+
+
+@pytest.mark.anyio
+async def test_waitlist_match_reads_entries_in_fill_order():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            rows = (await conn.execute(Explain(statements()["waitlist_match"]))).all()
+    finally:
+        await engine.dispose()
+    plan = [row[-1] for row in rows]
+    assert not [line for line in plan if "TEMP B-TREE" in line], plan
+
+
+@pytest.mark.anyio
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+async def test_postgres_plans_use_indexes():
+    assert await explain_all(os.environ["TEST_POSTGRES_URL"]) == {}
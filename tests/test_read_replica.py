@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import text
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.database.db_helper import DatabaseHelper
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def make_request(headers: dict | None = None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+async def served_by(helper: DatabaseHelper, request: Request) -> str:
+    dependency = helper.read_session_dependency(request)
+    session = await dependency.__anext__()
+    name = (await session.execute(text("SELECT name FROM node"))).scalar_one()
+    await dependency.aclose()
+    return name
+
+
+@pytest.mark.anyio
+async def test_replica_routing_fallback_and_pinning(tmp_path):
+    urls = {name: f"sqlite+aiosqlite:///{tmp_path / name}.db" for name in ("primary", "replica")}
+    for name, url in urls.items():
+        helper = DatabaseHelper(url)
+        async with helper.engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE node (name TEXT)"))
+            await conn.execute(text("INSERT INTO node VALUES (:name)"), {"name": name})
+        await helper.engine.dispose()
+
+    broken = f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    helper = DatabaseHelper(urls["primary"], replica_urls=[broken, urls["replica"]])
+    request = make_request({"Authorization": "Bearer t"})
+
+    assert [await served_by(helper, request) for _ in range(3)] == ["replica"] * 3
+    assert 0 in helper._replica_down_until
+
+    helper.pin_primary(request, Response())
+    assert await served_by(helper, request) == "primary"
+    assert await served_by(helper, make_request({"Authorization": "Bearer other"})) == "replica"
+
+    helper._replica_down_until.clear()
+    helper._replica_down_until[1] = float("inf")
+    assert await served_by(helper, make_request()) == "primary"
+    await helper.dispose()
@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+import pytest
+
+from core.services.sms import EskizClient
+from tests.fake_eskiz import create_fake_eskiz
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def make_client(fake, **kwargs) -> EskizClient:
+    base = "http://eskiz.test/api"
+    return EskizClient(
+        auth_url=f"{base}/auth/login",
+        send_url=f"{base}/message/sms/send",
+        batch_url=f"{base}/message/sms/send-batch",
+        username="user",
+        password="pass",
+        sender="4546",
+        transport=httpx.ASGITransport(app=fake),
+        **kwargs,
+    )
+
+
+@pytest.mark.anyio
+async def test_token_is_cached_and_refreshed_on_401():
+    fake = create_fake_eskiz()
+    client = make_client(fake, max_concurrency=4)
+    await asyncio.gather(*(client.send(f"99890000000{i}", "hi") for i in range(10)))
+    assert fake.state.eskiz.logins == 1
+    assert len(fake.state.eskiz.sent) == 10
+
+    fake.state.eskiz.revoke_tokens()
+    await asyncio.gather(*(client.send("998900000000", "again") for _ in range(3)))
+    assert fake.state.eskiz.logins == 2
+    assert client.stats.sent == 13
+    await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_batch_send_chunks_messages():
+    fake = create_fake_eskiz()
+    client = make_client(fake, batch_size=4)
+    await client.send_many([(f"9989000000{i:02d}", f"m{i}") for i in range(10)], batch=True)
+    assert fake.state.eskiz.batches == 3
+    assert sorted(text for _, text in fake.state.eskiz.sent) == sorted(f"m{i}" for i in range(10))
+    await client.aclose()
@@ -0,0 +1,33 @@
+import pytest
+from jose import JWTError
+
+from core.database.models.models import User, RoleEnum
+from core.services.auth import create_access_token
+from core.services.user_cache import UserCache
+
+
+def test_snapshot_cache_and_invalidation():
+    cache = UserCache(maxsize=2, ttl=60, claims_maxsize=10, claims_ttl=60)
+    user = User(id=1, phone_number="900", role=RoleEnum.USER, is_active=True)
+    cache.put(user)
+    assert cache.get("900").role == RoleEnum.USER
+
+    cache.invalidate(1)
+    assert cache.get("900") is None
+
+    for i in range(3):
+        cache.put(User(id=10 + i, phone_number=str(i), role=RoleEnum.USER, is_active=True))
+    assert cache.get("0") is None
+    assert len(cache.users) == 2
+    # The id -> phone map follows the LRU instead of growing with every user.
+    assert sorted(cache._phone_by_id) == [11, 12]
+
+
+def test_decoded_claims_are_cached():
+    cache = UserCache(maxsize=10, ttl=60, claims_maxsize=10, claims_ttl=60)
+    token = create_access_token("900")
+    assert cache.decode_token(token)["sub"] == "900"
+    assert cache.decode_token(token)["sub"] == "900"
+    assert (cache.claims.hits, cache.claims.misses) == (1, 1)
+    with pytest.raises(JWTError):
+        cache.decode_token(token + "x")
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from core.crud.booking import create_booking, transition_booking
+from core.crud import waitlist as waitlist_crud
+from core.crud.waitlist import create_entry, fill_from_waitlist
+from core.database.models.base import Base
+from core.database.models.models import Booking, BookingStatus, Branch, Place, User, WaitlistEntry, Zone
+from core.schemas.booking import BookingCreate
+from core.schemas.waitlist import WaitlistCreate
+from core.services.booking_index import booking_index
+from core.services.location_cache import location_cache
+from core.tasks.runner import MemoryJobQueue, runner
+from core.tasks.waitlist import waitlist_stats
+
+T0 = datetime(2030, 6, 10, 18, 0, tzinfo=timezone.utc)
+
+
+def at(hours: float) -> datetime:
+    return T0 + timedelta(hours=hours)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def session(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    booking_index.invalidate()
+    location_cache.drop()
+    monkeypatch.setattr(runner, "queue", MemoryJobQueue())
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as sess:
+        branch = Branch(name="B")
+        zone = Zone(branch=branch, name="Z")
+        sess.add_all([branch, zone, Place(zone=zone, name="P1")])
+        sess.add_all([
+            User(first_name="U", last_name="U", phone_number=f"99890000000{i}", password_hash="x", balance=balance)
+            for i, balance in enumerate((Decimal(100), Decimal(100), Decimal(0), Decimal(100)), start=1)
+        ])
+        await sess.commit()
+        yield sess
+    booking_index.invalidate()
+    location_cache.drop()
+    await engine.dispose()
+
+
+def wait(zone_id=1, start=0, end=2):
+    return WaitlistCreate(zone_id=zone_id, start_datetime=at(start), end_datetime=at(end), amount=Decimal(10))
+
+
+@pytest.mark.anyio
+async def test_cancellation_books_first_fitting_entry(session):
+    booking_id = (await create_booking(
+        session, 1, BookingCreate(place_id=1, start_datetime=at(0), end_datetime=at(2), amount=Decimal(10)), "k1"
+    )).id
+    too_long = (await create_entry(session, 2, wait(start=0, end=3))).id
+    broke = (await create_entry(session, 3, wait())).id
+    first = (await create_entry(session, 4, wait())).id
+    second = (await create_entry(session, 2, wait(start=1, end=2))).id
+
+    assert await fill_from_waitlist(session, 1, at(0), at(2)) == []
+
+    cancelled = await transition_booking(session, booking_id, "cancel")
+    booked = await fill_from_waitlist(session, cancelled.place_id, cancelled.start_datetime, cancelled.end_datetime)
+
+    # User 3 cannot pay and user 2's first entry does not fit, so user 4 gets the seat;
+    # the seat is then taken for 1-2 as well, leaving user 2's second entry waiting.
+    rows = (await session.execute(select(Booking.user_id, Booking.status).where(Booking.id.in_(booked)))).all()
+    assert rows == [(4, BookingStatus.PENDING)]
+    entries = dict((await session.execute(select(WaitlistEntry.id, WaitlistEntry.booking_id))).all())
+    assert entries == {too_long: None, broke: None, first: booked[0], second: None}
+    job = await runner.queue.get(0)
+    assert (job.name, job.args) == ("notify_waitlist", ["998900000004", booked[0]])
+
+    # The next cancellation goes to the next fitting entry; user 4's filled one is skipped.
+    await transition_booking(session, booked[0], "cancel")
+    rebooked = await fill_from_waitlist(session, 1, at(0), at(2))
+    assert (await session.execute(select(Booking.user_id).where(Booking.id.in_(rebooked)))).scalars().all() == [2]
+    assert (await session.execute(select(Booking.id).where(Booking.user_id == 4))).scalars().all() == booked
+
+
+@pytest.mark.anyio
+async def test_unexpected_errors_are_retried_in_the_background(session, monkeypatch):
+    entry = (await create_entry(session, 2, wait())).id
+
+    async def broken(*args, **kwargs):
+        raise ConnectionResetError("connection reset")
+
+    monkeypatch.setattr(waitlist_crud, "create_booking", broken)
+    failures = waitlist_stats.failures
+    assert await fill_from_waitlist(session, 1, at(0), at(2)) == []
+    assert waitlist_stats.failures == failures + 1
+    job = await runner.queue.get(0)
+    assert (job.name, job.args) == ("retry_waitlist_fill", [1, at(0).isoformat(), at(2).isoformat()])
+    with pytest.raises(ConnectionResetError):
+        await fill_from_waitlist(session, 1, at(0), at(2), raise_errors=True)
+    assert (await session.execute(select(WaitlistEntry.fulfilled_at).where(WaitlistEntry.id == entry))).scalar_one() is None
+
+
+@pytest.mark.anyio
+async def test_unbookable_entry_is_closed_and_the_queue_moves_on(session):
+    # Written before WaitlistCreate checked the amount.
+    bad = WaitlistEntry(
+        user_id=1, zone_id=1, start_datetime=at(0), end_datetime=at(2), amount=Decimal(0), created_at=datetime(2020, 1, 1)
+    )
+    session.add(bad)
+    await session.commit()
+    bad = bad.id
+    good = (await create_entry(session, 2, wait())).id
+
+    booked = await fill_from_waitlist(session, 1, at(0), at(2))
+    assert len(booked) == 1
+    entries = {
+        entry_id: (booking_id, fulfilled_at is not None)
+        for entry_id, booking_id, fulfilled_at in (await session.execute(
+            select(WaitlistEntry.id, WaitlistEntry.booking_id, WaitlistEntry.fulfilled_at)
+        )).all()
+    }
+    assert entries == {bad: (None, True), good: (booked[0], True)}
+    assert (await runner.queue.get(0)).name == "notify_waitlist"
+
+
+def test_waitlist_amount_must_be_positive():
+    with pytest.raises(ValueError):
+        WaitlistCreate(zone_id=1, start_datetime=at(0), end_datetime=at(2), amount=Decimal(0))
+    with pytest.raises(ValueError):
+        WaitlistCreate(zone_id=1, start_datetime=at(0), end_datetime=at(2), amount=Decimal("1.005"))